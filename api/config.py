@@ -0,0 +1,107 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    REDIS_URL: str = "redis://localhost:6379"
+    MYSQL_HOST: str = "localhost"
+    MYSQL_USER: str = "root"
+    MYSQL_PASSWORD: str = "password"
+    MYSQL_DB: str = "pii_shield"
+    ENCRYPTION_KEY: str = "e_v12UcnKtFRt_L0oVyExFP0XGaTPpoMVckVk396YAY="
+
+    # Async request path
+    AUDIT_ASYNC_POOL_SIZE: int = 10
+    DETECTION_EXECUTOR_WORKERS: int = 4
+
+    # Sessions whose stored tokens are remembered in-process to skip rewrites,
+    # and how many tokens are remembered per session and in total (LRU)
+    VAULT_STORED_MARKER_SESSIONS: int = 10000
+    VAULT_STORED_MARKER_TOKENS_PER_SESSION: int = 10000
+    VAULT_STORED_MARKER_TOKENS: int = 200000
+
+    # HuggingFace API (Optional - for BERT)
+    HUGGINGFACE_API_KEY: str = ""
+    HUGGINGFACE_API_URL: str = "https://api-inference.huggingface.co/models/beki/en_spacy_pii_distilbert"
+
+    # Phase 1 NER backend: "hf_api" (remote), "local" (in-process model dir) or "none"
+    NER_BACKEND: str = "hf_api"
+    NER_MODEL_PATH: str = ""
+    NER_MODEL_FORMAT: str = "auto"  # auto | onnx | torch
+    NER_BATCH_SIZE: int = 16
+    NER_NUM_THREADS: int = 0  # 0 = runtime default
+
+    # BERT phase resilience: circuit breaker + p99-based timeout
+    BERT_TIMEOUT_MAX_SECONDS: float = 3.0
+    BERT_TIMEOUT_MIN_SECONDS: float = 0.25
+    BERT_TIMEOUT_P99_MULTIPLIER: float = 1.5
+    BERT_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    BERT_CIRCUIT_RESET_SECONDS: float = 30.0
+    BERT_CIRCUIT_HALF_OPEN_PROBES: int = 1
+
+    # "always": BERT on every text, concurrently with Presidio.
+    # "cascade": after Presidio, only when a PERSON/LOCATION/ORG/NRP result scores below
+    # BERT_CASCADE_CONFIDENT_SCORE or a capitalized word is left unexplained
+    BERT_MODE: str = "always"
+    BERT_CASCADE_CONFIDENT_SCORE: float = 0.7
+
+    # Batch masking
+    MASK_BATCH_MAX_ITEMS: int = 256
+    DETECT_BATCH_SIZE: int = 32
+
+    # Long documents: texts over DETECT_CHUNK_THRESHOLD_CHARS are detected as overlapping
+    # windows cut at sentence boundaries. Their Presidio/spaCy phase only runs in parallel
+    # with DETECTION_WORKERS > 0; by default one document's windows use one core.
+    DETECT_CHUNK_THRESHOLD_CHARS: int = 4000
+    DETECT_CHUNK_CHARS: int = 2000
+    DETECT_CHUNK_OVERLAP_CHARS: int = 200
+
+    # Streaming mask (POST /mask/stream): detection window and carried-over tail, in characters
+    STREAM_WINDOW_CHARS: int = 8000
+    STREAM_CARRY_CHARS: int = 500
+    STREAM_NDJSON_BATCH: int = 32
+    STREAM_MAX_LINE_CHARS: int = 1000000
+
+    # Session channel (WebSocket /session/{session_id}): per-connection token cache and message size
+    SESSION_CHANNEL_MAX_CACHED_TOKENS: int = 10000
+    SESSION_CHANNEL_MAX_MESSAGE_CHARS: int = 100000
+
+    # Incremental detection (options.incremental): a session's resent history is only
+    # analyzed from a little before the end of what was already processed
+    INCREMENTAL_DETECTION_ENABLED: bool = True
+    INCREMENTAL_OVERLAP_CHARS: int = 200
+    INCREMENTAL_MAX_SESSIONS: int = 10000
+    INCREMENTAL_SESSION_TTL_SECONDS: float = 3600.0
+
+    # Detection result cache (Redis tier optional; empty URL = in-process only)
+    DETECTION_CACHE_ENABLED: bool = True
+    DETECTION_CACHE_MAX_ENTRIES: int = 10000
+    DETECTION_CACHE_TTL_SECONDS: float = 300.0
+    DETECTION_CACHE_MAX_TEXT_CHARS: int = 20000
+    DETECTION_CACHE_REDIS_URL: str = ""
+
+    # Micro-batching of concurrent detect() calls
+    DETECT_MICROBATCH_ENABLED: bool = True
+    DETECT_MICROBATCH_MAX_SIZE: int = 32
+    DETECT_MICROBATCH_MAX_WAIT_MS: float = 5.0
+    # Batches in flight at once, so one waiting on BERT or a long document doesn't hold up the next
+    DETECT_MICROBATCH_CONCURRENCY: int = 4
+
+    # Detection profile used when a request doesn't name one: structured-only, fast or accurate
+    DETECTION_PROFILE_DEFAULT: str = "accurate"
+
+    # Build services and run a warm-up detection at startup (otherwise on first request)
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Presidio phase in forked worker processes (0 = in the API process)
+    DETECTION_WORKERS: int = 0
+    # A pool job running longer than this fails and its workers are replaced
+    DETECTION_WORKER_JOB_TIMEOUT_SECONDS: float = 30.0
+
+    # One-pass RE2 prefilter over all pattern recognizers (needs google-re2)
+    REGEX_SCANNER_ENABLED: bool = True
+
+    # Skip detection for texts with no digit/@/capitalized-name/... signal for any active recognizer
+    PREFILTER_ENABLED: bool = True
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+settings = Settings()
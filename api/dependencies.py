@@ -1,6 +1,7 @@
-from fastapi import Header, HTTPException, Security
+from fastapi import HTTPException, Security, WebSocket, WebSocketException, status
 from fastapi.security import APIKeyHeader
 from api.config import settings
+from api.services.container import services
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -24,3 +25,26 @@ async def get_api_key(api_key_header: str = Security(api_key_header)):
     #     raise HTTPException(status_code=403, detail="Invalid API Key")
         
     return api_key_header
+
+async def get_websocket_api_key(websocket: WebSocket):
+    """
+    API key for a WebSocket, checked once per connection.
+    Browsers cannot set headers on a WebSocket, so an `api_key` query parameter is accepted too.
+    """
+    api_key = websocket.headers.get("X-API-Key") or websocket.query_params.get("api_key")
+    if not api_key:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Missing API Key")
+    return api_key
+
+# Service dependencies (built lazily by the container on first use)
+def get_detector():
+    return services.detector
+
+def get_vault_service():
+    return services.vault
+
+def get_audit_service():
+    return services.audit
+
+def get_masking_service():
+    return services.masking
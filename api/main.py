@@ -1,11 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.config import settings
+from api.services.container import services
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm models in the background: the server accepts connections
+    # right away and /api/v1/ready flips to 200 once detection is warm.
+    # Gunicorn workers are already warm (gunicorn_conf.post_fork).
+    warm_up = None
+    if settings.WARM_UP_ON_STARTUP and not services.ready:
+        warm_up = asyncio.get_running_loop().run_in_executor(None, services.warm_up)
+    yield
+    if warm_up is not None and not warm_up.done():
+        await warm_up
+    await services.aclose()
 
 app = FastAPI(
     title="PII Shield API",
     description="Enterprise-grade PII masking and anonymization platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -17,10 +34,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from api.routers import mask, unmask, audit, health, admin
+from api.routers import mask, unmask, session, audit, health, admin
 
 app.include_router(mask.router, prefix="/api/v1", tags=["Masking"])
 app.include_router(unmask.router, prefix="/api/v1", tags=["Unmasking"])
+app.include_router(session.router, prefix="/api/v1", tags=["Session"])
 app.include_router(audit.router, prefix="/api/v1", tags=["Audit"])
 app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
 app.include_router(health.router, prefix="/api/v1", tags=["Health"])
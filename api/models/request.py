@@ -16,3 +16,6 @@ class UnmaskRequest(BaseModel):
 class DetectRequest(BaseModel):
     text: str
     options: Optional[Dict[str, Any]] = Field(default_factory=dict)
+
+class BatchMaskRequest(BaseModel):
+    requests: List[MaskRequest]
@@ -29,3 +29,8 @@ class DetectResponse(BaseModel):
     entities: List[PIIEntity]
     risk_score: float
     metadata: Optional[Dict[str, Any]] = None
+
+class BatchMaskResponse(BaseModel):
+    success: bool
+    results: List[MaskResponse]
+    metadata: Optional[Dict[str, Any]] = None
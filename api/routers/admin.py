@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Dict, Any
-from api.services.vault import vault_service
-from api.dependencies import get_api_key
+from api.services.vault import VaultService
+from api.dependencies import get_api_key, get_vault_service
+from api.services.container import services
+from api.services.memory import memory_report
 
 router = APIRouter()
 
 @router.get("/admin/vault", dependencies=[Depends(get_api_key)])
-async def list_vault_entries(limit: int = Query(50, le=100)):
+def list_vault_entries(limit: int = Query(50, le=100), vault_service: VaultService = Depends(get_vault_service)):
     """
     List currently stored PII tokens in Redis (Debug/Admin endpoint).
     """
@@ -14,3 +15,14 @@ async def list_vault_entries(limit: int = Query(50, le=100)):
         return vault_service.get_all_entries(limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/admin/memory", dependencies=[Depends(get_api_key)])
+def get_memory_report():
+    """
+    Per-component memory of this worker (spaCy model, recognizers, caches, pools),
+    for sizing worker counts per node.
+    """
+    try:
+        return memory_report(services)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
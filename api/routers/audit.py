@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Query
-from api.services.audit import audit_service
+from fastapi import APIRouter, HTTPException, Query, Depends
+from api.services.audit import AuditService
+from api.dependencies import get_audit_service
 
 router = APIRouter()
 
 @router.get("/audit")
-async def get_audit_logs(
-    limit: int = Query(50, le=100)
+def get_audit_logs(
+    limit: int = Query(50, le=100),
+    audit_service: AuditService = Depends(get_audit_service)
 ):
     try:
         return audit_service.get_events(limit)
@@ -1,20 +1,25 @@
 from fastapi import APIRouter
-from api.services.vault import vault_service
-from api.services.audit import audit_service
+from fastapi.responses import JSONResponse
+from api.services.container import services
 
 router = APIRouter()
 
+# Sync endpoint: the Redis/MySQL pings block, so FastAPI runs it in the threadpool
 @router.get("/health")
-async def health_check():
+def health_check():
     health_status = {
         "status": "healthy",
         "components": {
             "api": "healthy",
             "redis": "unknown",
-            "mysql": "unknown"
+            "mysql": "unknown",
+            "bert": "disabled"
         }
     }
     
+    vault_service = services.vault
+    audit_service = services.audit
+    
     # Check Redis
     try:
         if vault_service.redis.ping():
@@ -37,4 +42,51 @@ async def health_check():
         health_status["components"]["mysql"] = "unhealthy"
         health_status["status"] = "degraded"
         
+    # Detection models are loaded by the startup warm-up; don't force a load from here
+    pii_detector = services.built("detector")
+    health_status["startup"] = services.status()
+    if pii_detector is None:
+        health_status["components"]["detector"] = "loading"
+        return health_status
+    health_status["components"]["detector"] = "healthy" if services.ready else "warming_up"
+    
+    # Check BERT (optional phase; an open circuit means detection runs without it)
+    if pii_detector.use_bert:
+        bert_status = pii_detector.ner_backend.status()
+        health_status["bert"] = bert_status
+        if pii_detector.bert_mode == "cascade":
+            health_status["bert_cascade"] = pii_detector.cascade_snapshot()
+        if pii_detector.ner_backend.circuit_state() in (None, "closed"):
+            health_status["components"]["bert"] = "healthy"
+        else:
+            health_status["components"]["bert"] = "degraded"
+            health_status["status"] = "degraded"
+        
+    # Check detection worker processes (only when DETECTION_WORKERS > 0)
+    if pii_detector.worker_pool is not None:
+        pool_stats = pii_detector.worker_pool.stats()
+        health_status["detection_workers"] = pool_stats
+        if pool_stats["alive"] == pool_stats["workers"]:
+            health_status["components"]["detection_workers"] = "healthy"
+        else:
+            health_status["components"]["detection_workers"] = "degraded"
+            health_status["status"] = "degraded"
+        
+    if services.built("batcher") is not None:
+        health_status["detection_batcher"] = services.batcher.stats()
+    if pii_detector.cache is not None:
+        health_status["detection_cache"] = pii_detector.cache.stats()
+    if pii_detector.regex_scanner is not None:
+        health_status["regex_scanner"] = pii_detector.regex_scanner.stats()
+    if pii_detector.prefilter is not None:
+        health_status["prefilter"] = pii_detector.prefilter.stats()
+    if pii_detector.sessions is not None:
+        health_status["incremental"] = pii_detector.sessions.stats()
+        
     return health_status
+
+@router.get("/ready")
+def readiness_check():
+    """200 once models are loaded and warmed up, 503 before (for load balancer / k8s readiness probes)."""
+    status = services.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
@@ -1,14 +1,75 @@
-from fastapi import APIRouter, HTTPException, Depends
-from api.models.request import MaskRequest
-from api.models.response import MaskResponse
-from api.services.masking import masking_service
-from api.dependencies import get_api_key
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from api.models.request import MaskRequest, BatchMaskRequest
+from api.models.response import MaskResponse, BatchMaskResponse
+from api.services.masking import MaskingService
+from api.services.streaming import DuplexStreamingResponse, decode_stream
+from api.dependencies import get_api_key, get_masking_service
+from api.config import settings
 
 router = APIRouter()
 
 @router.post("/mask", response_model=MaskResponse, dependencies=[Depends(get_api_key)])
-async def mask_text(request: MaskRequest):
+async def mask_text(request: MaskRequest, masking_service: MaskingService = Depends(get_masking_service)):
     try:
-        return masking_service.mask(request)
+        return await masking_service.amask(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mask/batch", response_model=BatchMaskResponse, dependencies=[Depends(get_api_key)])
+async def mask_batch(request: BatchMaskRequest, masking_service: MaskingService = Depends(get_masking_service)):
+    if len(request.requests) > settings.MASK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.requests)} items (max {settings.MASK_BATCH_MAX_ITEMS})"
+        )
+    
+    try:
+        started = time.perf_counter()
+        results = await masking_service.amask_batch(request.requests)
+        elapsed = time.perf_counter() - started
+        return BatchMaskResponse(
+            success=True,
+            results=results,
+            metadata={
+                "batch_size": len(results),
+                "processing_time_ms": round(elapsed * 1000, 2)
+            }
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mask/stream", dependencies=[Depends(get_api_key)])
+async def mask_stream(request: Request, session_id: str, profile: Optional[str] = None, entities: Optional[str] = None,
+                      user_id: Optional[str] = None, user_role: Optional[str] = None, purpose: Optional[str] = None,
+                      masking_service: MaskingService = Depends(get_masking_service)):
+    """
+    Mask a chunked request body without holding it in memory.
+    - text/plain: masked text is streamed back as detection windows complete
+    - application/x-ndjson: one {"text": ...} per line in, one MaskResponse per line out
+    `entities` is a comma-separated allow-list; context fields come as query parameters.
+    """
+    options = {"profile": profile}
+    if entities:
+        options["entities"] = [entity.strip() for entity in entities.split(",") if entity.strip()]
+    try:
+        masking_service.stream_detect_options(options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    context = {"user_id": user_id, "user_role": user_role, "purpose": purpose}
+    chunks = decode_stream(request.stream())
+    if "ndjson" in request.headers.get("content-type", ""):
+        return DuplexStreamingResponse(
+            masking_service.amask_ndjson(chunks, session_id, context, options),
+            media_type="application/x-ndjson"
+        )
+    return DuplexStreamingResponse(
+        masking_service.amask_stream(chunks, session_id, context, options),
+        media_type="text/plain; charset=utf-8"
+    )
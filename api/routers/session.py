@@ -0,0 +1,75 @@
+import json
+import logging
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from api.services.masking import MaskingService, SessionChannel
+from api.dependencies import get_websocket_api_key, get_masking_service
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.websocket("/session/{session_id}")
+async def session_channel(websocket: WebSocket, session_id: str, profile: Optional[str] = None,
+                          entities: Optional[str] = None, user_id: Optional[str] = None,
+                          user_role: Optional[str] = None, purpose: Optional[str] = None,
+                          reason: Optional[str] = None, api_key: str = Depends(get_websocket_api_key),
+                          masking_service: MaskingService = Depends(get_masking_service)):
+    """
+    Persistent mask/unmask channel for one chat session.
+
+    Context and options are fixed for the connection (query parameters, as for
+    /mask/stream). Each message is a JSON object with an "op":
+    - {"op": "mask", "text": ...} -> MaskResponse fields
+    - {"op": "unmask", "text": ...} -> UnmaskResponse fields
+    - {"op": "unmask_fragment", "text": ..., "final": false} -> {"text": ...}, for streamed replies
+    An optional "id" is echoed back; failures reply {"error": ...} and keep the connection open.
+    """
+    options = {"profile": profile}
+    if entities:
+        options["entities"] = [entity.strip() for entity in entities.split(",") if entity.strip()]
+    context = {"user_id": user_id, "user_role": user_role, "purpose": purpose, "reason": reason}
+    try:
+        channel = masking_service.session_channel(session_id, context, options)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            await websocket.send_json(await _handle(channel, await websocket.receive_text()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await channel.aclose()
+
+async def _handle(channel: SessionChannel, raw: str) -> Dict[str, Any]:
+    try:
+        message = json.loads(raw)
+    except ValueError:
+        return {"error": "Message is not valid JSON"}
+    if not isinstance(message, dict):
+        return {"error": "Message must be a JSON object"}
+
+    op = message.get("op")
+    reply = {"op": op, "id": message.get("id")}
+    text = message.get("text")
+    if not isinstance(text, str):
+        return {**reply, "error": "Missing text"}
+    if len(text) > settings.SESSION_CHANNEL_MAX_MESSAGE_CHARS:
+        return {**reply, "error": f"Message too long: {len(text)} chars (max {settings.SESSION_CHANNEL_MAX_MESSAGE_CHARS})"}
+
+    try:
+        if op == "mask":
+            return {**reply, **(await channel.amask(text)).model_dump()}
+        if op == "unmask":
+            return {**reply, **(await channel.aunmask(text)).model_dump()}
+        if op == "unmask_fragment":
+            final = bool(message.get("final", False))
+            return {**reply, "text": await channel.aunmask_fragment(text, final), "final": final}
+        return {**reply, "error": f"Unknown op: {op!r}"}
+    except Exception as e:
+        logger.error(f"Session channel error: {e}")
+        return {**reply, "error": str(e)}
@@ -1,14 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
 from api.models.request import UnmaskRequest
 from api.models.response import UnmaskResponse
-from api.services.masking import masking_service
-from api.dependencies import get_api_key
+from api.services.masking import MaskingService
+from api.services.streaming import DuplexStreamingResponse, decode_stream
+from api.dependencies import get_api_key, get_masking_service
 
 router = APIRouter()
 
 @router.post("/unmask", response_model=UnmaskResponse, dependencies=[Depends(get_api_key)])
-async def unmask_text(request: UnmaskRequest):
+async def unmask_text(request: UnmaskRequest, masking_service: MaskingService = Depends(get_masking_service)):
     try:
-        return masking_service.unmask(request)
+        return await masking_service.aunmask(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/unmask/stream", dependencies=[Depends(get_api_key)])
+async def unmask_stream(request: Request, session_id: str, user_id: Optional[str] = None, user_role: Optional[str] = None,
+                        purpose: Optional[str] = None, reason: Optional[str] = None,
+                        masking_service: MaskingService = Depends(get_masking_service)):
+    """
+    Unmask text as it streams in (e.g. an LLM answer relayed fragment by fragment).
+    Unmasked text is streamed back immediately; only a possibly incomplete trailing
+    token is held until the next fragment. Context fields come as query parameters.
+    """
+    context = {"user_id": user_id, "user_role": user_role, "purpose": purpose, "reason": reason}
+    return DuplexStreamingResponse(
+        masking_service.aunmask_stream(decode_stream(request.stream()), session_id, context),
+        media_type="text/plain; charset=utf-8"
+    )
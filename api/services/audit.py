@@ -1,3 +1,5 @@
+import time
+import asyncio
 import mysql.connector
 from mysql.connector import pooling
 from api.config import settings
@@ -5,25 +7,59 @@ import json
 import uuid
 import logging
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+try:
+    import aiomysql
+except ImportError:  # async audit path falls back to the sync pool in a thread
+    aiomysql = None
+
+INSERT_EVENT_QUERY = """
+        INSERT INTO audit_events 
+        (event_id, timestamp, operation, session_id, user_id, user_role, pii_types_accessed, purpose, reason, success, metadata)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """
+
 class AuditService:
     def __init__(self):
         try:
-            self.pool = mysql.connector.pooling.MySQLConnectionPool(
-                pool_name="audit_pool",
-                pool_size=5,
-                host=settings.MYSQL_HOST,
-                user=settings.MYSQL_USER,
-                password=settings.MYSQL_PASSWORD,
-                database=settings.MYSQL_DB
-            )
+            self.pool = self._create_pool()
             self._init_db()
         except Exception as e:
             logger.error(f"Error connecting to MySQL: {e}")
             self.pool = None
+            
+        # Async pool, created lazily on the server's event loop
+        self.apool = None
+        self._apool_lock = None
+        self._apool_failed_at = 0.0
+
+    def _create_pool(self):
+        return mysql.connector.pooling.MySQLConnectionPool(
+            pool_name="audit_pool",
+            pool_size=5,
+            host=settings.MYSQL_HOST,
+            user=settings.MYSQL_USER,
+            password=settings.MYSQL_PASSWORD,
+            database=settings.MYSQL_DB
+        )
+
+    def reconnect(self):
+        """
+        Give this process its own connections after a fork (see gunicorn_conf.py).
+        Sockets inherited from the parent must not be shared between workers.
+        """
+        try:
+            self.pool = self._create_pool()
+        except Exception as e:
+            logger.error(f"Error connecting to MySQL: {e}")
+            self.pool = None
+            
+        self.apool = None
+        self._apool_lock = None
+        self._apool_failed_at = 0.0
 
     def _get_connection(self):
         """Get connection with retry if pool was not initialized."""
@@ -32,14 +68,7 @@ class AuditService:
             
         # Try to reconnect
         try:
-            self.pool = mysql.connector.pooling.MySQLConnectionPool(
-                pool_name="audit_pool",
-                pool_size=5,
-                host=settings.MYSQL_HOST,
-                user=settings.MYSQL_USER,
-                password=settings.MYSQL_PASSWORD,
-                database=settings.MYSQL_DB
-            )
+            self.pool = self._create_pool()
             self._init_db()
             return self.pool.get_connection()
         except Exception as e:
@@ -102,28 +131,10 @@ class AuditService:
              logger.warning("Audit service not connected to DB")
              return "offline_audit_id"
             
-        event_id = f"evt_{uuid.uuid4().hex[:12]}"
-        timestamp = datetime.utcnow()
-        
-        query = """
-        INSERT INTO audit_events 
-        (event_id, timestamp, operation, session_id, user_id, user_role, pii_types_accessed, purpose, reason, success, metadata)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        values = (
-            event_id,
-            timestamp,
-            operation,
-            session_id,
-            user_id,
-            user_role,
-            json.dumps(pii_types),
-            purpose,
-            reason,
-            success,
-            json.dumps(metadata) if metadata else None
-        )
+        event_id, values = self._event_row(dict(
+            operation=operation, session_id=session_id, user_id=user_id, user_role=user_role,
+            pii_types=pii_types, purpose=purpose, reason=reason, success=success, metadata=metadata
+        ))
         
         conn = None
         try:
@@ -131,7 +142,7 @@ class AuditService:
             if not conn:
                 return "offline_audit_id"
             cursor = conn.cursor()
-            cursor.execute(query, values)
+            cursor.execute(INSERT_EVENT_QUERY, values)
             conn.commit()
             cursor.close()
             return event_id
@@ -142,6 +153,120 @@ class AuditService:
             if conn:
                 conn.close()
 
+    def log_events(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Log many audit events with a single INSERT (executemany).
+        Each event is a dict of the same keyword arguments accepted by log_event.
+        """
+        if not events:
+            return []
+            
+        if not self.pool and not self._get_connection():
+             logger.warning("Audit service not connected to DB")
+             return ["offline_audit_id"] * len(events)
+            
+        event_ids, rows = zip(*(self._event_row(event) for event in events))
+        
+        conn = None
+        try:
+            conn = self._get_connection()
+            if not conn:
+                return ["offline_audit_id"] * len(events)
+            cursor = conn.cursor()
+            cursor.executemany(INSERT_EVENT_QUERY, list(rows))
+            conn.commit()
+            cursor.close()
+            return list(event_ids)
+        except Exception as e:
+            logger.error(f"Error logging audit events: {e}")
+            return ["error_logging"] * len(events)
+        finally:
+            if conn:
+                conn.close()
+
+    async def alog_event(self, **event) -> str:
+        """Async variant of log_event (same keyword arguments)."""
+        return (await self.alog_events([event]))[0]
+
+    async def alog_events(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Async variant of log_events, using an aiomysql pool."""
+        if not events:
+            return []
+            
+        if aiomysql is None:
+            return await asyncio.get_running_loop().run_in_executor(None, self.log_events, events)
+            
+        pool = await self._get_apool()
+        if pool is None:
+            return ["offline_audit_id"] * len(events)
+            
+        event_ids, rows = zip(*(self._event_row(event) for event in events))
+        
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(INSERT_EVENT_QUERY, list(rows))
+                await conn.commit()
+            return list(event_ids)
+        except Exception as e:
+            logger.error(f"Error logging audit events: {e}")
+            return ["error_logging"] * len(events)
+
+    async def _get_apool(self):
+        """Create the aiomysql pool on first use (must happen on the running loop)."""
+        if self.apool is not None:
+            return self.apool
+            
+        # Don't make every request queue up behind a reconnect attempt while MySQL is down
+        if time.monotonic() - self._apool_failed_at < 5.0:
+            return None
+            
+        if self._apool_lock is None:
+            self._apool_lock = asyncio.Lock()
+            
+        async with self._apool_lock:
+            if self.apool is None and time.monotonic() - self._apool_failed_at >= 5.0:
+                try:
+                    self.apool = await aiomysql.create_pool(
+                        minsize=1,
+                        maxsize=settings.AUDIT_ASYNC_POOL_SIZE,
+                        host=settings.MYSQL_HOST,
+                        user=settings.MYSQL_USER,
+                        password=settings.MYSQL_PASSWORD,
+                        db=settings.MYSQL_DB,
+                        autocommit=False
+                    )
+                except Exception as e:
+                    logger.error(f"Unable to create async MySQL pool: {e}")
+                    self._apool_failed_at = time.monotonic()
+                    return None
+        return self.apool
+
+    async def aclose(self):
+        if self.apool is not None:
+            self.apool.close()
+            await self.apool.wait_closed()
+            self.apool = None
+
+    def _event_row(self, event: Dict[str, Any]) -> tuple:
+        """Build (event_id, INSERT values) for one event dict (log_event keyword arguments)."""
+        event_id = f"evt_{uuid.uuid4().hex[:12]}"
+        metadata = event.get("metadata")
+        values = (
+            event_id,
+            datetime.utcnow(),
+            event["operation"],
+            event["session_id"],
+            event.get("user_id"),
+            event.get("user_role"),
+            json.dumps(event.get("pii_types", [])),
+            event.get("purpose"),
+            event.get("reason"),
+            event.get("success", True),
+            json.dumps(metadata) if metadata else None
+        )
+        return event_id, values
+
     def get_events(self, limit: int = 50) -> List[Dict]:
         """
         Retrieve audit events.
@@ -170,5 +295,3 @@ class AuditService:
         finally:
             if conn:
                 conn.close()
-
-audit_service = AuditService()
@@ -0,0 +1,158 @@
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from api.services.detection import PIIDetector
+
+logger = logging.getLogger(__name__)
+
+class DetectionBatcher:
+    """
+    Dynamic micro-batching in front of PIIDetector.
+
+    detect() calls arriving within `max_wait_ms` of each other are collected
+    (up to `max_batch_size`) and dispatched together through
+    PIIDetector.detect_batch, so spaCy sees one nlp.pipe call instead of
+    N single-document calls. Results are fanned back to the waiting callers.
+
+    A batch can spend seconds waiting on BERT or in the windowed long-document
+    path, so batches run on a small pool (`max_concurrent_batches`) rather than
+    on the collecting thread: later requests form the next batch meanwhile.
+    When every slot is busy the collector waits, and the queue grows into a
+    larger batch instead of many small ones.
+    """
+
+    def __init__(self, detector: PIIDetector, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_concurrent_batches: int = 4):
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrent_batches = max(1, max_concurrent_batches)
+
+        self._queue: "queue.Queue[Tuple[str, str, float, Optional[str], Optional[tuple], bool, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.max_concurrent_batches)
+        self._pid = None
+
+        # Stats
+        self.batches_dispatched = 0
+        self.items_dispatched = 0
+        self.max_batch_seen = 0
+
+    def submit(self, text: str, language: str = 'en', confidence_threshold: float = 0.4,
+               profile: Optional[str] = None, entities: Optional[List[str]] = None,
+               prescreened: bool = False) -> Future:
+        """Queue a detect call. The returned Future resolves to (entities, metadata)."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, language, confidence_threshold, profile, tuple(entities) if entities else None,
+                         prescreened, future))
+        return future
+
+    def detect(self, text: str, language: str = 'en', confidence_threshold: float = 0.4,
+               profile: Optional[str] = None, entities: Optional[List[str]] = None,
+               prescreened: bool = False) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Blocking drop-in replacement for PIIDetector.detect."""
+        return self.submit(text, language, confidence_threshold, profile, entities, prescreened).result()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "batches_dispatched": self.batches_dispatched,
+            "items_dispatched": self.items_dispatched,
+            "avg_batch_size": round(self.items_dispatched / self.batches_dispatched, 2) if self.batches_dispatched else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "queue_depth": self._queue.qsize()
+        }
+
+    def _ensure_worker(self):
+        """Start the dispatcher thread lazily (and again in a forked child, where threads don't survive)."""
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._pid == pid and self._thread.is_alive():
+                return
+            if self._pid != pid:
+                # Queue state inherited across fork belongs to the parent
+                self._queue = queue.Queue()
+                self._slots = threading.BoundedSemaphore(self.max_concurrent_batches)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_batches,
+                                                    thread_name_prefix="detection-batch")
+            self._pid = pid
+            self._thread = threading.Thread(target=self._run, name="detection-batcher", daemon=True)
+            self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, str, float, Optional[str], Optional[tuple], bool, Future]]:
+        """Block for the first item, then gather more until the window closes or the batch is full."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    # Window closed; still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Requests with different language/threshold/profile/entities can't share an analyze call
+            groups: Dict[tuple, List[Tuple[str, Future]]] = {}
+            for text, language, threshold, profile, entities, prescreened, future in batch:
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault((language, threshold, profile, entities, prescreened), []).append((text, future))
+
+            for (language, threshold, profile, entities, prescreened), items in groups.items():
+                self._slots.acquire()
+                try:
+                    self._executor.submit(self._dispatch, items, language, threshold, profile, entities, prescreened)
+                except Exception as e:
+                    self._slots.release()
+                    logger.error(f"Batched detection failed: {e}")
+                    for _, future in items:
+                        future.set_exception(e)
+
+    def _dispatch(self, items: List[Tuple[str, Future]], language: str, threshold: float,
+                  profile: Optional[str], entities: Optional[tuple], prescreened: bool = False):
+        try:
+            self._detect_group(items, language, threshold, profile, entities, prescreened)
+        finally:
+            self._slots.release()
+
+    def _detect_group(self, items: List[Tuple[str, Future]], language: str, threshold: float,
+                      profile: Optional[str], entities: Optional[tuple], prescreened: bool):
+        try:
+            results = self.detector.detect_batch([text for text, _ in items], language, threshold, profile, entities,
+                                                 prescreened=prescreened)
+        except Exception as e:
+            logger.error(f"Batched detection failed: {e}")
+            for _, future in items:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batches_dispatched += 1
+            self.items_dispatched += len(items)
+            self.max_batch_seen = max(self.max_batch_seen, len(items))
+
+        for (_, future), (entities, metadata) in zip(items, results):
+            future.set_result((entities, {**metadata, "detect_batch_size": len(items)}))
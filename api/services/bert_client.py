@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+from concurrent.futures import Future
+from typing import List, Dict, Any, Optional
+import httpx
+from presidio_analyzer import RecognizerResult
+from api.config import settings
+from api.services.circuit_breaker import CircuitBreaker, LatencyTracker
+from api.services.ner_backends import NERBackend, NERCallFailed
+
+logger = logging.getLogger(__name__)
+# httpx logs every request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Mapping Deberta/BERT entities to Presidio types
+ENTITY_MAP = {
+    "PER": "PERSON", "LOC": "LOCATION", "ORG": "ORGANIZATION",
+    "EMAIL": "EMAIL_ADDRESS", "PHONE": "PHONE_NUMBER",
+    "DATE": "DATE_TIME", "TIME": "DATE_TIME",
+    "MISC": "NRP"
+}
+BERT_ENTITIES = frozenset(ENTITY_MAP.values())
+
+def parse_ner_response(data: Any) -> List[RecognizerResult]:
+    """Convert a Hugging Face token-classification response into RecognizerResults."""
+    # Handle loading state
+    if isinstance(data, dict) and 'error' in data:
+        return []
+
+    results = []
+    for item in data:
+        # Handle both aggregated and raw token responses
+        label = item.get('entity_group') or item.get('entity')
+        if not label: continue
+
+        # Strip B- or I- prefix if present
+        clean_label = label.replace('B-', '').replace('I-', '')
+
+        results.append(RecognizerResult(
+            entity_type=ENTITY_MAP.get(clean_label, "NRP"),
+            start=item.get('start', 0),
+            end=item.get('end', 0),
+            score=float(item.get('score', 0.0))
+        ))
+
+    return results
+
+class BertClient(NERBackend):
+    """
+    Async client for the Hugging Face NER inference endpoint.
+
+    A single httpx.AsyncClient keeps a pool of keep-alive connections, so calls
+    no longer pay a TCP/TLS handshake each. The client lives on its own event
+    loop thread: sync callers get a concurrent Future from submit() and can run
+    Presidio while the request is in flight; async callers can await analyze().
+
+    Calls go through a circuit breaker and use a timeout derived from recent
+    p99 latency, so an upstream outage costs at most a few slow calls before
+    BERT is skipped outright. Half-open probes get the full timeout, so a
+    slower but healthy upstream can close the circuit again.
+    """
+
+    name = "hf_api"
+
+    def __init__(self, api_url: str, api_key: str, timeout: float = 3.0, max_connections: int = 20):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self.breaker = CircuitBreaker(
+            "bert",
+            failure_threshold=settings.BERT_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.BERT_CIRCUIT_RESET_SECONDS,
+            half_open_max_calls=settings.BERT_CIRCUIT_HALF_OPEN_PROBES
+        )
+        self.latency = LatencyTracker(
+            multiplier=settings.BERT_TIMEOUT_P99_MULTIPLIER,
+            min_timeout=settings.BERT_TIMEOUT_MIN_SECONDS,
+            max_timeout=timeout
+        )
+
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pid = None
+
+    def submit(self, text: str) -> Optional[Future]:
+        """
+        Schedule an NER call on the client loop; returns a concurrent Future of results,
+        or None when the circuit is open and the call was skipped.
+        """
+        if not text: return None
+        if not self.breaker.allow_request():
+            return None
+
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._call(text), loop)
+
+    def detect(self, text: str) -> List[RecognizerResult]:
+        """Blocking call, for callers that don't overlap the request with other work."""
+        future = self.submit(text)
+        if future is None:
+            return []
+        try:
+            return future.result()
+        except NERCallFailed:
+            return []
+
+    async def analyze(self, text: str) -> List[RecognizerResult]:
+        """Run NER for one text. Must be awaited on the client loop (see submit). Raises NERCallFailed."""
+        if not text: return []
+        if not self.breaker.allow_request():
+            return []
+        return await self._call(text)
+
+    async def _call(self, text: str) -> List[RecognizerResult]:
+        """
+        One guarded HTTP call; the breaker slot must already be acquired.
+        Failures raise NERCallFailed, so they can't be mistaken for "no entities found".
+        """
+        started = time.monotonic()
+        probing = self.breaker.state == CircuitBreaker.HALF_OPEN
+        timeout = self.latency.max_timeout if probing else self.latency.timeout()
+        try:
+            response = await self._get_client().post(
+                self.api_url,
+                json={"inputs": text},
+                timeout=timeout
+            )
+
+            if response.status_code != 200:
+                logger.warning(f"BERT API Error: {response.status_code}")
+                self.breaker.record_failure()
+                raise NERCallFailed(f"HTTP {response.status_code}")
+
+            data = response.json()
+            # Model still loading: treat like an outage
+            if isinstance(data, dict) and 'error' in data:
+                self.breaker.record_failure()
+                raise NERCallFailed(str(data['error']))
+
+            self.latency.record(time.monotonic() - started)
+            self.breaker.record_success()
+            return parse_ner_response(data)
+
+        except NERCallFailed:
+            raise
+        except Exception as e:
+            logger.error(f"BERT Detection Failed: {type(e).__name__}: {e}")
+            if isinstance(e, httpx.TimeoutException):
+                self.latency.record_timeout(timeout)
+            self.breaker.record_failure()
+            raise NERCallFailed(f"{type(e).__name__}: {e}") from e
+
+    def circuit_state(self) -> Optional[str]:
+        return self.breaker.state
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "circuit": self.breaker.snapshot(),
+            "latency": self.latency.snapshot()
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the client loop thread lazily (and again in a forked child)."""
+        pid = os.getpid()
+        if self._loop is not None and self._pid == pid:
+            return self._loop
+
+        with self._lock:
+            if self._loop is not None and self._pid == pid:
+                return self._loop
+
+            # Connections inherited across fork are shared with the parent; start fresh
+            self._client = None
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="bert-client", daemon=True)
+            thread.start()
+            self._loop = loop
+            self._pid = pid
+            return loop
+
+    def close(self):
+        """Close pooled connections and stop the loop thread."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            if self._client is not None:
+                asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+                self._client = None
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
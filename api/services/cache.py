@@ -0,0 +1,181 @@
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import redis
+from cryptography.fernet import Fernet
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+DetectionResult = Tuple[List[Dict[str, Any]], Dict[str, Any]]
+
+class DetectionCache:
+    """
+    Bounded cache of detect() results keyed by a hash of
+    (text, language, threshold, enabled recognizers).
+
+    - Local tier: LRU with per-entry TTL.
+    - Optional shared Redis tier (Fernet-encrypted, since results contain PII).
+    - Single-flight: concurrent lookups of the same key wait for one computation.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300.0, redis_url: str = "",
+                 max_text_chars: int = 20000):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.max_text_chars = max_text_chars
+
+        self._entries: "OrderedDict[str, Tuple[float, DetectionResult]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+        self.redis_url = redis_url
+        self.redis = None
+        self._connect_redis()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.singleflight_waits = 0
+
+    @staticmethod
+    def make_key(text: str, language: str, threshold: float, fingerprint: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{language}\0{threshold}\0{fingerprint}\0".encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def cacheable(self, text: str) -> bool:
+        return len(text) <= self.max_text_chars
+
+    def get(self, key: str) -> Optional[DetectionResult]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return _copy(value)
+                del self._entries[key]
+
+        value = self._redis_get(key)
+        if value is not None:
+            self.redis_hits += 1
+            self._local_set(key, value)
+            return _copy(value)
+        return None
+
+    def set(self, key: str, value: DetectionResult):
+        value = _copy(value)
+        self._local_set(key, value)
+        self._redis_set(key, value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], DetectionResult],
+                       should_store: Callable[[DetectionResult], bool] = lambda value: True) -> Tuple[DetectionResult, bool]:
+        """
+        Return (result, hit). On a miss only one caller per key runs `compute`;
+        concurrent callers for the same key block on its result.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            self.singleflight_waits += 1
+            self.hits += 1
+            return _copy(future.result()), True
+
+        self.misses += 1
+        try:
+            value = compute()
+            if should_store(value):
+                self.set(key, value)
+            future.set_result(_copy(value))
+            return value, False
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "redis_tier": self.redis is not None,
+            "redis_hits": self.redis_hits,
+            "singleflight_waits": self.singleflight_waits
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def reconnect(self):
+        """Re-create the Redis tier client after a fork."""
+        self._connect_redis()
+
+    def _connect_redis(self):
+        if not self.redis_url:
+            return
+        try:
+            self.redis = redis.from_url(self.redis_url, decode_responses=True)
+            self.cipher = Fernet(settings.ENCRYPTION_KEY.encode())
+        except Exception as e:
+            logger.error(f"Detection cache: Redis tier disabled: {e}")
+            self.redis = None
+
+    def _local_set(self, key: str, value: DetectionResult):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _redis_get(self, key: str) -> Optional[DetectionResult]:
+        if self.redis is None:
+            return None
+        try:
+            blob = self.redis.get(f"detcache:{key}")
+            if not blob:
+                return None
+            entities, metadata = json.loads(self.cipher.decrypt(blob.encode()).decode())
+            return entities, metadata
+        except Exception as e:
+            logger.warning(f"Detection cache: Redis read failed: {e}")
+            return None
+
+    def _redis_set(self, key: str, value: DetectionResult):
+        if self.redis is None:
+            return
+        try:
+            blob = self.cipher.encrypt(json.dumps(value).encode()).decode()
+            self.redis.setex(f"detcache:{key}", int(self.ttl), blob)
+        except Exception as e:
+            logger.warning(f"Detection cache: Redis write failed: {e}")
+
+def _copy(value: DetectionResult) -> DetectionResult:
+    """Callers mutate entity lists (e.g. sort in place); never hand out the cached objects."""
+    entities, metadata = value
+    return [dict(entity) for entity in entities], dict(metadata)
@@ -0,0 +1,86 @@
+import re
+from typing import List, Tuple
+from presidio_analyzer import RecognizerResult
+
+# Where a window may end / the next one may start: after sentence punctuation or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+WHITESPACE = re.compile(r"\s+")
+
+def split_windows(text: str, size: int, overlap: int) -> List[Tuple[int, str]]:
+    """
+    Split `text` into windows of at most `size` characters, returned as (offset, window).
+
+    Windows end at the last sentence boundary in their second half (else the last
+    whitespace, else a hard cut). Each window starts at least `overlap` characters
+    before the previous one ended (moved back to a sentence or word boundary when
+    one is near), so an entity shorter than half the overlap that crosses one
+    window's edge lies whole inside the other window's core (see merge_window_results).
+    """
+    n = len(text)
+    if n <= size:
+        return [(0, text)]
+
+    overlap = min(overlap, size // 4)
+    windows = []
+    start = 0
+    while True:
+        end = min(n, start + size)
+        if end < n:
+            end = last_boundary(text, start + size // 2, end) or end
+        windows.append((start, text[start:end]))
+        if end >= n:
+            return windows
+
+        next_start = end - overlap
+        next_start = last_boundary(text, next_start - overlap // 2, next_start) or next_start
+        start = max(next_start, start + 1)
+
+def last_boundary(text: str, lo: int, hi: int) -> int:
+    """End of the last sentence boundary (else whitespace run) in text[lo:hi], 0 if none."""
+    for pattern in (SENTENCE_BOUNDARY, WHITESPACE):
+        last = 0
+        for match in pattern.finditer(text, lo, hi):
+            last = match.end()
+        if last:
+            return last
+    return 0
+
+def merge_window_results(text: str, windows: List[Tuple[int, str]],
+                         results: List[List[RecognizerResult]]) -> List[RecognizerResult]:
+    """
+    Map per-window results back to offsets in `text`.
+
+    Each window owns a core: from the middle of its overlap with the previous
+    window to the middle of its overlap with the next one. A window's result is
+    kept only if it overlaps that core and does not touch an edge where the
+    text was cut (there it may be truncated, whether or not the cut is mid-word,
+    since entities such as card or phone numbers contain spaces). An entity
+    near a cut is therefore taken whole from the neighbour that sees it with
+    context on both sides. An entity straddling a core boundary is found by
+    both windows; Phase 3 (_optimize_results) merges such duplicates.
+    """
+    merged = []
+    last = len(windows) - 1
+    for i, ((offset, window), window_results) in enumerate(zip(windows, results)):
+        core_start = 0 if i == 0 else _midpoint(windows[i - 1], offset)
+        core_end = len(text) if i == last else _midpoint(windows[i], windows[i + 1][0])
+        for r in window_results:
+            start, end = r.start + offset, r.end + offset
+            if (i < last and r.end >= len(window)) or (i > 0 and r.start <= 0):
+                continue
+            if end <= core_start or start >= core_end:
+                continue
+            merged.append(RecognizerResult(
+                entity_type=r.entity_type,
+                start=start,
+                end=end,
+                score=r.score,
+                analysis_explanation=r.analysis_explanation,
+                recognition_metadata=r.recognition_metadata
+            ))
+    return merged
+
+def _midpoint(window: Tuple[int, str], next_offset: int) -> int:
+    """Middle of the overlap between `window` and the window starting at `next_offset`."""
+    offset, text = window
+    return (next_offset + offset + len(text)) // 2
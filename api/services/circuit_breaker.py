@@ -0,0 +1,159 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Any
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    CLOSED:    calls pass through; `failure_threshold` failures in a row open it.
+    OPEN:      calls are rejected until `reset_timeout` seconds have passed.
+    HALF_OPEN: up to `half_open_max_calls` probes are let through; `success_threshold`
+               successes close the circuit again, any failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, success_threshold: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.success_threshold = max(1, success_threshold)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._probes_in_flight = 0
+        self._opened_at = 0.0
+
+        # Stats
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed. Every allowed call must be followed by record_success/record_failure."""
+        with self._lock:
+            self._maybe_half_open()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._state = self.CLOSED
+                    self._failures = 0
+                    self._successes = 0
+            else:
+                self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._open()
+                return
+
+            self._failures += 1
+            if self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._maybe_half_open()
+            snapshot = {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls
+            }
+            if self._state == self.OPEN:
+                snapshot["retry_in_s"] = round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 2)
+            return snapshot
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._successes = 0
+        self.times_opened += 1
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+            self._successes = 0
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies used to derive an adaptive timeout:
+    p99 of recent calls times `multiplier`, clamped to [min_timeout, max_timeout].
+    Until `min_samples` calls have been seen the timeout stays at max_timeout.
+
+    A call that timed out is recorded at the timeout it was given (its latency
+    was at least that), so a slowdown raises the timeout instead of every slow
+    call failing at a floor learned while the upstream was fast.
+    """
+
+    def __init__(self, window: int = 200, percentile: float = 0.99, multiplier: float = 1.5,
+                 min_timeout: float = 0.25, max_timeout: float = 3.0, min_samples: int = 20):
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def record_timeout(self, timeout: float):
+        """A call given `timeout` seconds didn't finish; count it as at least that slow."""
+        self.record(timeout)
+
+    def quantile(self) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(self.percentile * len(samples)))
+        return samples[index]
+
+    def timeout(self) -> float:
+        with self._lock:
+            count = len(self._samples)
+        if count < self.min_samples:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.quantile() * self.multiplier))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self._samples),
+            f"p{int(self.percentile * 100)}_ms": round(self.quantile() * 1000, 1),
+            "timeout_s": round(self.timeout(), 3)
+        }
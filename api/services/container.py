@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ServiceContainer:
+    """
+    Owns the service singletons and builds each one on first use.
+
+    Importing the API (or any service module) no longer loads spaCy or opens
+    Redis/MySQL connections; that happens when a service is first requested,
+    either by a request dependency or by warm_up() from the app lifespan.
+    Construction and warm-up times are recorded for the cold-start report.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Any] = {}
+        self._created_at = time.monotonic()
+
+        # Cold-start report
+        self.timings_ms: Dict[str, float] = {}
+        self.ready = False
+        self.warm_up_error: Optional[str] = None
+        self.ready_after_ms: Optional[float] = None
+
+    @property
+    def detector(self):
+        from api.services.detection import PIIDetector
+        return self._get("detector", PIIDetector)
+
+    @property
+    def batcher(self):
+        from api.services.batching import DetectionBatcher
+        detector = self.detector
+        return self._get("batcher", lambda: DetectionBatcher(
+            detector,
+            max_batch_size=settings.DETECT_MICROBATCH_MAX_SIZE,
+            max_wait_ms=settings.DETECT_MICROBATCH_MAX_WAIT_MS,
+            max_concurrent_batches=settings.DETECT_MICROBATCH_CONCURRENCY
+        ))
+
+    @property
+    def vault(self):
+        from api.services.vault import VaultService
+        return self._get("vault", VaultService)
+
+    @property
+    def audit(self):
+        from api.services.audit import AuditService
+        return self._get("audit", AuditService)
+
+    @property
+    def masking(self):
+        from api.services.masking import MaskingService
+        # Resolve dependencies first so each one's construction time is recorded separately
+        detector, batcher, vault, audit = self.detector, self.batcher, self.vault, self.audit
+        return self._get("masking", lambda: MaskingService(
+            detector=detector,
+            batcher=batcher,
+            vault=vault,
+            audit=audit
+        ))
+
+    def built(self, name: str) -> Optional[Any]:
+        """The instance if it has been constructed, without constructing it."""
+        return self._instances.get(name)
+
+    def warm_up(self):
+        """Construct every service and run a throwaway detection. Marks the container ready."""
+        try:
+            self.masking
+            started = time.perf_counter()
+            self.detector.warm_up()
+            self.timings_ms["detector_warm_up"] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            logger.error(f"Service warm-up failed: {e}")
+            self.warm_up_error = str(e)
+            return
+
+        self.ready_after_ms = round((time.monotonic() - self._created_at) * 1000, 1)
+        self.ready = True
+        logger.info(f"✅ Services ready in {self.ready_after_ms}ms ({self.timings_ms})")
+
+    def reconnect(self):
+        """After a fork: give already-built services their own connections."""
+        if self.built("vault") is not None:
+            self.vault.reconnect()
+        if self.built("audit") is not None:
+            self.audit.reconnect()
+        detector = self.built("detector")
+        if detector is not None and detector.cache is not None:
+            detector.cache.reconnect()
+        if detector is not None and detector.worker_pool is not None:
+            # Right after the fork this process runs one thread, so the pool can fork too
+            try:
+                detector.worker_pool.start()
+            except Exception as e:
+                logger.error(f"Detection worker pool failed to start after fork: {e}")
+
+    async def aclose(self):
+        if self.built("vault") is not None:
+            await self.vault.aclose()
+        if self.built("audit") is not None:
+            await self.audit.aclose()
+        detector = self.built("detector")
+        if detector is not None and detector.worker_pool is not None:
+            detector.worker_pool.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "services": sorted(self._instances),
+            "cold_start_ms": dict(self.timings_ms),
+            "ready_after_ms": self.ready_after_ms,
+            "pid": os.getpid(),
+            "warm_up_error": self.warm_up_error
+        }
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                started = time.perf_counter()
+                instance = factory()
+                self.timings_ms[name] = round((time.perf_counter() - started) * 1000, 1)
+                self._instances[name] = instance
+        return instance
+
+services = ServiceContainer()
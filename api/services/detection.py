@@ -1,15 +1,41 @@
-import spacy
-from presidio_analyzer import AnalyzerEngine, PatternRecognizer, RecognizerResult
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, PatternRecognizer, RecognizerResult
+from presidio_analyzer.predefined_recognizers import SpacyRecognizer
 from presidio_anonymizer import AnonymizerEngine
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
-import requests
+import hashlib
+import time
+import threading
+from concurrent.futures import Future
 from api.config import settings
+from api.services.ner_backends import NERCallFailed, create_ner_backend
+from api.services.bert_client import BERT_ENTITIES
+from api.services.cache import DetectionCache
+from api.services.profiles import DetectionProfile, build_profiles, STRUCTURED_ONLY
+from api.services.regex_scanner import FusedPatternScanner
+from api.services.prefilter import PiiPrefilter, name_candidates
+from api.services.chunking import split_windows, merge_window_results
+from api.services.incremental import SessionPrefixCache, resume_point
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Exercises the NLP pipeline and the common pattern recognizers
+WARMUP_TEXT = "John Smith lives in Mumbai. Email john.smith@example.com, phone +91 98765 43210."
+
+# BERT modes: every text alongside Presidio, or only where Presidio leaves doubt
+BERT_ALWAYS = "always"
+BERT_CASCADE = "cascade"
+
+# Cascade decisions (metadata "bert_cascade")
+CASCADE_UNCERTAIN = "uncertain"
+CASCADE_UNEXPLAINED = "unexplained_names"
+CASCADE_CONFIDENT = "confident"
+
+# Entity types whose Presidio confidence decides the cascade (spaCy NER output)
+NAME_ENTITIES = frozenset({"PERSON", "LOCATION", "ORGANIZATION", "NRP"})
+
 class PIIDetector:
     """
     3-Phase PII Detection System:
@@ -30,28 +56,102 @@ class PIIDetector:
         
         nlp_engine = NlpEngineProvider(nlp_configuration=nlp_configuration).create_engine()
         self.analyzer = AnalyzerEngine(nlp_engine=nlp_engine)
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
         self.anonymizer = AnonymizerEngine()
         
-        # Load spaCy for local fallback/preprocessing
-        try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            from spacy.cli import download
-            download("en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
+        # Same Language object Presidio analyzes with; loading the model a second
+        # time would double its resident memory in every worker
+        self.nlp = nlp_engine.nlp["en"]
         
         # Phase 2: Configure Recognizers
         self._configure_recognizers()
+
+        # All regex recognizers share one scan of the text instead of one per pattern
+        # (installed over the registry by refresh_fingerprint below)
+        self.regex_scanner = FusedPatternScanner() if settings.REGEX_SCANNER_ENABLED else None
+        
+        # Texts with no signal for any active recognizer skip the pipeline entirely
+        self.prefilter = PiiPrefilter(self.regex_scanner) if settings.PREFILTER_ENABLED else None
         
-        # Phase 1: BERT Configuration
+        # Named profiles (structured-only / fast / accurate) share the registry and the model
+        self.profiles = build_profiles(self.analyzer)
+        self.default_profile = settings.DETECTION_PROFILE_DEFAULT
+        self.resolve_profile(self.default_profile)
+        self._needs_nlp: Dict[Tuple[str, Tuple[str, ...]], bool] = {}
+        
+        # Phase 1: BERT Configuration (remote HF API or local model, see NER_BACKEND)
         self.hf_api_key = settings.HUGGINGFACE_API_KEY
         self.hf_api_url = settings.HUGGINGFACE_API_URL or "https://api-inference.huggingface.co/models/dslim/bert-base-NER"
-        self.use_bert = bool(self.hf_api_key)
+        self.ner_backend = create_ner_backend()
+        self.use_bert = self.ner_backend is not None
+        
+        self.bert_mode = settings.BERT_MODE
+        if self.bert_mode not in (BERT_ALWAYS, BERT_CASCADE):
+            logger.error(f"Unknown BERT_MODE '{self.bert_mode}', using '{BERT_ALWAYS}'")
+            self.bert_mode = BERT_ALWAYS
+        # Updated from request, batcher and executor threads
+        self.cascade_stats = {"texts": 0, "bert_calls": 0, "bert_calls_avoided": 0, CASCADE_UNCERTAIN: 0, CASCADE_UNEXPLAINED: 0}
+        self._cascade_lock = threading.Lock()
         
         if self.use_bert:
-            logger.info("✅ Phase 1: BERT Integration Enabled")
+            logger.info(f"✅ Phase 1: BERT Integration Enabled ({self.ner_backend.name}, {self.bert_mode})")
         else:
-            logger.warning("⚠️ Phase 1: BERT Integration Disabled (No API Key)")
+            logger.warning("⚠️ Phase 1: BERT Integration Disabled (No API Key or local model)")
+
+        # Result cache for repeated texts
+        self.cache = DetectionCache(
+            max_entries=settings.DETECTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.DETECTION_CACHE_TTL_SECONDS,
+            redis_url=settings.DETECTION_CACHE_REDIS_URL,
+            max_text_chars=settings.DETECTION_CACHE_MAX_TEXT_CHARS
+        ) if settings.DETECTION_CACHE_ENABLED else None
+        
+        # Processed prefix per session, for callers that resend a growing history
+        self.sessions = SessionPrefixCache(
+            max_sessions=settings.INCREMENTAL_MAX_SESSIONS,
+            ttl_seconds=settings.INCREMENTAL_SESSION_TTL_SECONDS
+        ) if settings.INCREMENTAL_DETECTION_ENABLED else None
+        self.refresh_fingerprint()
+
+        # Presidio phase in worker processes (0 = run in this process).
+        # Started last so forked workers inherit the fully configured analyzer
+        # (the pool only forks when no other thread is running, see DetectionWorkerPool).
+        self.worker_pool = None
+        if settings.DETECTION_WORKERS > 0:
+            from api.services.worker_pool import DetectionWorkerPool
+            try:
+                self.worker_pool = DetectionWorkerPool(
+                    self, settings.DETECTION_WORKERS, job_timeout=settings.DETECTION_WORKER_JOB_TIMEOUT_SECONDS
+                )
+                self.worker_pool.start()
+            except Exception as e:
+                logger.error(f"❌ Detection worker pool failed to start, analyzing in-process: {e}")
+                self.worker_pool = None
+
+    def warm_up(self):
+        """
+        Run one throwaway detection (bypassing the cache) so lazily initialized
+        pieces - spaCy pipes, recognizer regexes, the BERT connection - are ready
+        before the first real request.
+        """
+        started = time.perf_counter()
+        for name in self.profiles:
+            entities, _ = self._detect_uncached(WARMUP_TEXT, 'en', 0.4, name)
+        logger.info(f"Detector warm-up: {len(entities)} entities in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def refresh_fingerprint(self):
+        """
+        Identify the current detection configuration (recognizers + NER backend) for cache keys.
+        Call again after adding/removing recognizers at runtime (this also rebuilds
+        the regex scanner so new pattern recognizers share its single pass).
+        """
+        if self.regex_scanner is not None:
+            self.regex_scanner.install(self.analyzer.registry.recognizers)
+        if self.prefilter is not None:
+            self.prefilter.reset()
+        recognizer_ids = sorted(f"{r.name}:{','.join(r.supported_entities)}" for r in self.analyzer.registry.recognizers)
+        recognizer_ids.append(f"ner:{self.ner_backend.name if self.use_bert else 'none'}:{self.bert_mode}")
+        self.fingerprint = hashlib.sha256("|".join(recognizer_ids).encode()).hexdigest()[:16]
 
     def _configure_recognizers(self):
         """
@@ -103,33 +203,394 @@ class PIIDetector:
         )
         self.analyzer.registry.add_recognizer(intl_phone)
 
-    def detect(self, text: str, language: str = 'en', confidence_threshold: float = 0.4) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    def resolve_profile(self, profile: Optional[str] = None) -> DetectionProfile:
+        """Look up a detection profile by name (None = default). Raises ValueError for unknown names."""
+        name = profile or self.default_profile
+        if name not in self.profiles:
+            raise ValueError(f"Unknown detection profile '{name}'. Available: {', '.join(self.profiles)}")
+        return self.profiles[name]
+
+    def supported_entities(self, language: str = 'en') -> List[str]:
+        """Every entity type the recognizers (and BERT, when enabled) can return."""
+        entities = set(self.analyzer.get_supported_entities(language=language))
+        if self.use_bert:
+            entities.update(BERT_ENTITIES)
+        return sorted(entities)
+
+    def resolve_entities(self, entities: Optional[List[str]], language: str = 'en') -> Optional[Tuple[str, ...]]:
+        """
+        Normalize an entity allow-list (None/empty = all types) into a sorted tuple.
+        Raises ValueError for a malformed list or types nothing can detect.
+        """
+        if not entities:
+            return None
+        if isinstance(entities, str) or not all(isinstance(entity, str) for entity in entities):
+            raise ValueError("entities must be a list of entity types")
+        requested = tuple(sorted({entity.upper() for entity in entities}))
+        unknown = set(requested) - set(self.supported_entities(language))
+        if unknown:
+            raise ValueError(f"Unsupported entity types: {', '.join(sorted(unknown))}")
+        return requested
+
+    def detect(self, text: str, language: str = 'en', confidence_threshold: float = 0.4,
+               profile: Optional[str] = None, entities: Optional[List[str]] = None,
+               prescreened: bool = False) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Execute the 3-Phase Detection Pipeline
+        `profile` selects a named detection profile (see api.services.profiles);
+        `entities` restricts detection to those types (None = all).
+        `prescreened`: the caller already ran may_contain_pii() and it passed.
         Returns: (entities, metadata)
         """
-        all_results = []
-        bert_entity_ids = set()  # Track which entities came from BERT
+        profile = self.resolve_profile(profile).name
+        entities = self.resolve_entities(entities, language)
+        if not prescreened and not self.may_contain_pii(text, language, profile, entities):
+            return self.prefiltered(text, profile, entities)
+        if self.cache is None or not self.cache.cacheable(text):
+            return self._detect_uncached(text, language, confidence_threshold, profile, entities)
+        
+        key = self.cache.make_key(text, language, confidence_threshold, self._cache_scope(profile, entities))
+        (found, metadata), hit = self.cache.get_or_compute(
+            key,
+            lambda: self._detect_uncached(text, language, confidence_threshold, profile, entities),
+            should_store=self._should_cache
+        )
+        return found, self._with_cache_metadata(metadata, hit)
+
+    def detect_incremental(self, text: str, session_id: str, language: str = 'en', confidence_threshold: float = 0.4,
+                           profile: Optional[str] = None, entities: Optional[List[str]] = None) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        detect() for texts that grow turn by turn under one session_id (a resent chat history).
+        If `text` starts with the text last processed for the session (same options),
+        entities found before the resume point are reused and only the rest - the new
+        turn plus INCREMENTAL_OVERLAP_CHARS of the old text - is analyzed. Anything
+        else falls back to a full detect().
+        """
+        if self.sessions is None:
+            return self.detect(text, language, confidence_threshold, profile, entities)
+        profile = self.resolve_profile(profile).name
+        entities = self.resolve_entities(entities, language)
+        scope = f"{language}:{confidence_threshold}:{self._cache_scope(profile, entities)}"
+        
+        prior = self.sessions.lookup(session_id, scope, text)
+        if prior is None:
+            self.sessions.misses += 1
+            self.sessions.chars_analyzed += len(text)
+            found, metadata = self.detect(text, language, confidence_threshold, profile, entities)
+            if self._should_cache((found, metadata)):
+                self.sessions.store(session_id, scope, text, found)
+            return found, {**metadata, "incremental": "full", "chars_reused": 0}
+        
+        prefix_length, prior_entities = prior
+        self.sessions.hits += 1
+        cut = resume_point(text, prefix_length, settings.INCREMENTAL_OVERLAP_CHARS, prior_entities)
+        suffix_found, metadata = self.detect(text[cut:], language, confidence_threshold, profile, entities)
+        
+        found = [dict(e) for e in prior_entities if e["end"] <= cut]
+        found.extend({**e, "start": e["start"] + cut, "end": e["end"] + cut} for e in suffix_found)
+        self.sessions.chars_reused += cut
+        self.sessions.chars_analyzed += len(text) - cut
+        if self._should_cache((found, metadata)):
+            self.sessions.store(session_id, scope, text, found)
+        return found, {**metadata, "incremental": "suffix", "chars_reused": cut, "final_entity_count": len(found)}
+
+    def _detect_uncached(self, text: str, language: str, confidence_threshold: float,
+                         profile: Optional[str] = None, entities: Optional[Tuple[str, ...]] = None) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        profile = self.resolve_profile(profile)
+        if len(text) > settings.DETECT_CHUNK_THRESHOLD_CHARS:
+            return self._detect_chunked(text, language, confidence_threshold, profile, entities)
+        use_bert = self._bert_needed(profile, entities)
+        cascade = use_bert and self.bert_mode == BERT_CASCADE
         
         # --- Phase 1: BERT Integration ---
-        bert_count = 0
-        if self.use_bert:
-            bert_results = self._detect_with_bert(text)
-            bert_count = len(bert_results)
-            # Mark BERT entities
-            for res in bert_results:
-                bert_entity_ids.add(f"{res.start}-{res.end}")
-            all_results.extend(bert_results)
+        # Fired first and left in flight on the client's connection pool,
+        # so its latency overlaps with Presidio instead of adding to it
+        # (cascade mode: only after Presidio, and only if it leaves doubt)
+        bert_future = self.ner_backend.submit(text) if use_bert and not cascade else None
             
         # --- Phase 2: Presidio (Global + India) ---
         # We run Presidio to catch structured PII (IDs, Phones, Emails)
-        presidio_results = self.analyzer.analyze(
-            text=text,
+        presidio_results = self._analyze_presidio([text], language, confidence_threshold, profile.name, entities)[0]
+        
+        decision = None
+        if cascade:
+            decision = self._cascade_decision(text, presidio_results)
+            if decision != CASCADE_CONFIDENT:
+                bert_future = self.ner_backend.submit(text)
+        
+        bert_results, bert_failed = self._collect_bert(bert_future)
+        
+        return self._finalize(text, bert_results, presidio_results, profile, entities,
+                              bert_skipped=use_bert and bool(text) and bert_future is None and decision != CASCADE_CONFIDENT,
+                              cascade=decision, bert_failed=bert_failed)
+
+    def detect_batch(self, texts: List[str], language: str = 'en', confidence_threshold: float = 0.4,
+                     profile: Optional[str] = None, entities: Optional[List[str]] = None,
+                     prescreened: bool = False) -> List[tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Run the 3-Phase pipeline over many texts at once.
+        spaCy processes the texts through nlp.pipe (via Presidio's BatchAnalyzerEngine),
+        so tokenization/NER is batched instead of dispatched per document.
+        `prescreened`: every text already passed may_contain_pii().
+        Returns one (entities, metadata) tuple per input text, in order.
+        """
+        profile = self.resolve_profile(profile).name
+        entities = self.resolve_entities(entities, language)
+        if not texts:
+            return []
+        
+        # PII-free texts are answered without entering the pipeline
+        results: List[Optional[tuple]] = [None] * len(texts)
+        todo = []
+        for i, text in enumerate(texts):
+            if prescreened or self.may_contain_pii(text, language, profile, entities):
+                todo.append(i)
+            else:
+                results[i] = self.prefiltered(text, profile, entities)
+        
+        if todo:
+            computed = self._detect_batch_cached([texts[i] for i in todo], language, confidence_threshold, profile, entities)
+            for i, value in zip(todo, computed):
+                results[i] = value
+        return results
+
+    def _detect_batch_cached(self, texts: List[str], language: str, confidence_threshold: float,
+                             profile: str, entities: Optional[Tuple[str, ...]]) -> List[tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        if self.cache is None:
+            return self._detect_batch_uncached(texts, language, confidence_threshold, profile, entities)
+        
+        # Serve hits from the cache, analyze each distinct miss once
+        results: List[Optional[tuple]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        scope = self._cache_scope(profile, entities)
+        for i, text in enumerate(texts):
+            if not self.cache.cacheable(text):
+                pending.setdefault(f"nocache:{i}", []).append(i)
+                continue
+            key = self.cache.make_key(text, language, confidence_threshold, scope)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache.hits += 1
+                results[i] = (cached[0], self._with_cache_metadata(cached[1], True))
+            else:
+                pending.setdefault(key, []).append(i)
+        
+        if pending:
+            keys = list(pending)
+            computed = self._detect_batch_uncached([texts[pending[key][0]] for key in keys], language, confidence_threshold,
+                                                   profile, entities)
+            for key, value in zip(keys, computed):
+                if not key.startswith("nocache:"):
+                    self.cache.misses += 1
+                    if self._should_cache(value):
+                        self.cache.set(key, value)
+                for n, i in enumerate(pending[key]):
+                    found, metadata = value if n == 0 else ([dict(e) for e in value[0]], value[1])
+                    results[i] = (found, self._with_cache_metadata(metadata, n > 0))
+        
+        return results
+
+    def _detect_batch_uncached(self, texts: List[str], language: str, confidence_threshold: float,
+                               profile: Optional[str] = None, entities: Optional[Tuple[str, ...]] = None) -> List[tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        profile = self.resolve_profile(profile)
+        
+        # Long documents go through the windowed path, one at a time
+        results: List[Optional[tuple]] = [None] * len(texts)
+        short = []
+        for i, text in enumerate(texts):
+            if len(text) > settings.DETECT_CHUNK_THRESHOLD_CHARS:
+                results[i] = self._detect_chunked(text, language, confidence_threshold, profile, entities)
+            else:
+                short.append(i)
+        
+        phases = self._run_phases([texts[i] for i in short], language, confidence_threshold, profile, entities)
+        for i, (bert_results, presidio_results, bert_skipped, decision, bert_failed) in zip(short, phases):
+            results[i] = self._finalize(texts[i], bert_results, presidio_results, profile, entities,
+                                        bert_skipped=bert_skipped, cascade=decision, bert_failed=bert_failed)
+        return results
+
+    def _detect_chunked(self, text: str, language: str, confidence_threshold: float,
+                        profile: DetectionProfile, entities: Optional[Tuple[str, ...]]) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Long-document mode: detect over overlapping windows split at sentence boundaries
+        (spaCy docs and BERT inputs stay small), then map offsets back and let Phase 3
+        merge the overlaps. BERT calls for the windows are concurrent; the Presidio
+        phase is one nlp.pipe batch, parallel across cores only with DETECTION_WORKERS.
+        """
+        windows = split_windows(text, settings.DETECT_CHUNK_CHARS, settings.DETECT_CHUNK_OVERLAP_CHARS)
+        phases = self._run_phases([window for _, window in windows], language, confidence_threshold, profile, entities)
+        
+        bert_results = merge_window_results(text, windows, [phase[0] for phase in phases])
+        presidio_results = merge_window_results(text, windows, [phase[1] for phase in phases])
+        decisions = [phase[3] for phase in phases]
+        decision = None
+        if decisions[0] is not None:
+            decision = next((d for d in decisions if d != CASCADE_CONFIDENT), CASCADE_CONFIDENT)
+        
+        found, metadata = self._finalize(text, bert_results, presidio_results, profile, entities,
+                                         bert_skipped=any(phase[2] for phase in phases), cascade=decision,
+                                         bert_failed=any(phase[4] for phase in phases))
+        metadata["chunks"] = len(windows)
+        if decision is not None:
+            metadata["bert_calls_avoided"] = sum(d == CASCADE_CONFIDENT for d in decisions)
+        return found, metadata
+
+    def _run_phases(self, texts: List[str], language: str, confidence_threshold: float, profile: DetectionProfile,
+                    entities: Optional[Tuple[str, ...]]) -> List[Tuple[List[RecognizerResult], List[RecognizerResult], bool, Optional[str], bool]]:
+        """Phases 1 and 2 over a batch: (bert results, presidio results, bert skipped, cascade decision, bert failed) per text."""
+        if not texts:
+            return []
+        use_bert = self._bert_needed(profile, entities)
+        cascade = use_bert and self.bert_mode == BERT_CASCADE
+        
+        # --- Phase 1: all BERT calls in flight concurrently ---
+        bert_futures = self.ner_backend.submit_batch(texts) if use_bert and not cascade else [None] * len(texts)
+        
+        # --- Phase 2: Presidio over the whole batch ---
+        presidio_batch = self._analyze_presidio(texts, language, confidence_threshold, profile.name, entities)
+        
+        # Cascade: BERT only for the texts Presidio leaves doubt about, still as one concurrent batch
+        decisions = [None] * len(texts)
+        if cascade:
+            decisions = [self._cascade_decision(text, results) for text, results in zip(texts, presidio_batch)]
+            doubtful = [i for i, decision in enumerate(decisions) if decision != CASCADE_CONFIDENT]
+            if doubtful:
+                for i, future in zip(doubtful, self.ner_backend.submit_batch([texts[i] for i in doubtful])):
+                    bert_futures[i] = future
+        
+        phases = []
+        for text, presidio_results, bert_future, decision in zip(texts, presidio_batch, bert_futures, decisions):
+            bert_results, bert_failed = self._collect_bert(bert_future)
+            bert_skipped = use_bert and bool(text) and bert_future is None and decision != CASCADE_CONFIDENT
+            phases.append((bert_results, presidio_results, bert_skipped, decision, bert_failed))
+        return phases
+
+    def may_contain_pii(self, text: str, language: str = 'en', profile: Optional[str] = None,
+                        entities: Optional[Tuple[str, ...]] = None) -> bool:
+        """Pre-screen: False only when no recognizer that would run (nor BERT) could find anything."""
+        if self.prefilter is None:
+            return True
+        use_bert = self._bert_needed(self.resolve_profile(profile), entities)
+        plan = self.prefilter.plan(
+            (language, entities, use_bert),
+            lambda: self.analyzer.registry.get_recognizers(
+                language=language, entities=list(entities) if entities else None, all_fields=entities is None
+            ),
+            use_nlp=use_bert
+        )
+        return self.prefilter.may_contain_pii(text, plan)
+
+    def prefiltered(self, text: str, profile: Optional[str] = None,
+                    entities: Optional[Tuple[str, ...]] = None) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """The empty result for a text may_contain_pii() ruled out."""
+        return self._finalize(text, [], [], self.resolve_profile(profile), entities, prefiltered=True)
+
+    def _cache_scope(self, profile: str, entities: Optional[Tuple[str, ...]]) -> str:
+        """Everything besides text/language/threshold that changes detect() output."""
+        return f"{self.fingerprint}:{profile}:{','.join(entities) if entities else '*'}"
+
+    def _bert_needed(self, profile: DetectionProfile, entities: Optional[Tuple[str, ...]]) -> bool:
+        """BERT runs for profiles that use it, unless none of the requested types can come from it."""
+        if not (self.use_bert and profile.use_bert):
+            return False
+        return entities is None or not BERT_ENTITIES.isdisjoint(entities)
+
+    def _cascade_decision(self, text: str, presidio_results: List[RecognizerResult]) -> str:
+        """
+        Cascade mode: is BERT worth calling for this text?
+        Yes if Presidio found a name-type entity with confidence below BERT_CASCADE_CONFIDENT_SCORE,
+        or a capitalized (name-like) word that no Presidio result covers.
+        """
+        decision = CASCADE_CONFIDENT
+        if any(r.entity_type in NAME_ENTITIES and r.score < settings.BERT_CASCADE_CONFIDENT_SCORE for r in presidio_results):
+            decision = CASCADE_UNCERTAIN
+        else:
+            spans = [(r.start, r.end) for r in presidio_results]
+            for start, end in name_candidates(text):
+                if not any(start < span_end and span_start < end for span_start, span_end in spans):
+                    decision = CASCADE_UNEXPLAINED
+                    break
+        
+        with self._cascade_lock:
+            self.cascade_stats["texts"] += 1
+            if decision == CASCADE_CONFIDENT:
+                self.cascade_stats["bert_calls_avoided"] += 1
+            else:
+                self.cascade_stats["bert_calls"] += 1
+                self.cascade_stats[decision] += 1
+        return decision
+
+    def cascade_snapshot(self) -> Dict[str, int]:
+        with self._cascade_lock:
+            return dict(self.cascade_stats)
+
+    def _analyzer_for(self, profile: DetectionProfile, entities: Optional[Tuple[str, ...]], language: str) -> DetectionProfile:
+        """
+        With an allow-list that no NLP-based recognizer serves (e.g. only IN_PAN/IN_AADHAAR),
+        the spaCy pipeline would run for nothing: use the tokenizer-only analyzer instead.
+        """
+        if entities is None or profile.name == STRUCTURED_ONLY:
+            return profile
+        
+        key = (language, entities)
+        needs_nlp = self._needs_nlp.get(key)
+        if needs_nlp is None:
+            recognizers = self.analyzer.registry.get_recognizers(language=language, entities=list(entities))
+            needs_nlp = any(isinstance(recognizer, SpacyRecognizer) for recognizer in recognizers)
+            self._needs_nlp[key] = needs_nlp
+        return profile if needs_nlp else self.profiles[STRUCTURED_ONLY]
+
+    def _analyze_presidio(self, texts: List[str], language: str, confidence_threshold: float,
+                          profile: str, entities: Optional[Tuple[str, ...]] = None) -> List[List[RecognizerResult]]:
+        """Presidio results per text, from the worker pool when one is running."""
+        if self.worker_pool is not None:
+            return self.worker_pool.analyze_batch(texts, language, confidence_threshold, profile, entities)
+        return self.analyze_presidio_local(texts, language, confidence_threshold, profile, entities)
+
+    def analyze_presidio_local(self, texts: List[str], language: str, confidence_threshold: float,
+                               profile: Optional[str] = None, entities: Optional[Tuple[str, ...]] = None) -> List[List[RecognizerResult]]:
+        """Presidio phase in this process (also the job body inside pool workers)."""
+        analyzer = self._analyzer_for(self.resolve_profile(profile), entities, language)
+        # Presidio only runs the recognizers serving the requested entities
+        requested = list(entities) if entities else None
+        if len(texts) == 1:
+            return [analyzer.analyzer.analyze(text=texts[0], language=language, entities=requested,
+                                              score_threshold=confidence_threshold)]
+        
+        # spaCy processes the texts through nlp.pipe
+        return list(analyzer.batch_analyzer.analyze_iterator(
+            texts=texts,
             language=language,
+            batch_size=settings.DETECT_BATCH_SIZE,
+            entities=requested,
             score_threshold=confidence_threshold
-        )
-        presidio_count = len(presidio_results)
-        all_results.extend(presidio_results)
+        ))
+
+    def _should_cache(self, value: tuple) -> bool:
+        # Don't pin degraded results (BERT skipped by an open circuit, or its call failed) for a whole TTL
+        return not (value[1].get("bert_skipped") or value[1].get("bert_failed"))
+
+    def _with_cache_metadata(self, metadata: Dict[str, Any], hit: bool) -> Dict[str, Any]:
+        stats = self.cache.stats()
+        return {
+            **metadata,
+            "cache": "hit" if hit else "miss",
+            "cache_hits": stats["hits"],
+            "cache_misses": stats["misses"]
+        }
+
+    def _finalize(self, text: str, bert_results: List[RecognizerResult], presidio_results: List[RecognizerResult],
+                  profile: DetectionProfile, allowed: Optional[Tuple[str, ...]] = None,
+                  bert_skipped: bool = False, prefiltered: bool = False,
+                  cascade: Optional[str] = None, bert_failed: bool = False) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Phase 3 + response formatting shared by detect() and detect_batch()"""
+        if allowed is not None:
+            bert_results = [res for res in bert_results if res.entity_type in allowed]
+        
+        # Track which entities came from BERT
+        bert_entity_ids = {f"{res.start}-{res.end}" for res in bert_results}
+        all_results = list(bert_results) + list(presidio_results)
+        total_before_optimization = len(all_results)
         
         # --- Phase 3: Pipeline Optimization ---
         # Handle overlaps and filter
@@ -149,11 +610,22 @@ class PIIDetector:
             })
         
         # Build metadata
+        use_bert = self._bert_needed(profile, allowed)
         metadata = {
-            "bert_enabled": self.use_bert,
-            "bert_entities_found": bert_count,
-            "presidio_entities_found": presidio_count,
-            "total_before_optimization": len(all_results),
+            "profile": profile.name,
+            "entities_requested": list(allowed) if allowed else None,
+            "bert_enabled": use_bert,
+            "bert_skipped": bert_skipped,
+            "bert_failed": bert_failed,
+            "bert_mode": self.bert_mode if use_bert else None,
+            "bert_cascade": cascade,
+            "bert_calls_avoided": int(cascade == CASCADE_CONFIDENT),
+            "prefiltered": prefiltered,
+            "bert_backend": self.ner_backend.name if use_bert else None,
+            "bert_circuit": self.ner_backend.circuit_state() if use_bert else None,
+            "bert_entities_found": len(bert_results),
+            "presidio_entities_found": len(presidio_results),
+            "total_before_optimization": total_before_optimization,
             "final_entity_count": len(entities)
         }
         
@@ -161,61 +633,24 @@ class PIIDetector:
 
     def _detect_with_bert(self, text: str) -> List[RecognizerResult]:
         """Call Hugging Face API for NER"""
-        if not text: return []
+        if not text or not self.use_bert: return []
+        return self._collect_bert(self.ner_backend.submit(text))[0]
+
+    def _collect_bert(self, future: Optional[Future]) -> Tuple[List[RecognizerResult], bool]:
+        """
+        Wait for an in-flight BERT call: (results, failed).
+        Failures degrade to no BERT results, flagged so they aren't cached as "no names".
+        """
+        if future is None:
+            return [], False
         
         try:
-            headers = {"Authorization": f"Bearer {self.hf_api_key}"}
-            response = requests.post(
-                self.hf_api_url,
-                headers=headers,
-                json={"inputs": text},
-                timeout=3.0 # Fast timeout to not block
-            )
-            
-            if response.status_code != 200:
-                logger.warning(f"BERT API Error: {response.status_code}")
-                return []
-                
-            data = response.json()
-            # Handle loading state
-            if isinstance(data, dict) and 'error' in data:
-                return []
-                
-            results = []
-            # Mapping Deberta entities to Presidio types
-            entity_map = {
-                "PER": "PERSON", "LOC": "LOCATION", "ORG": "ORGANIZATION",
-                "EMAIL": "EMAIL_ADDRESS", "PHONE": "PHONE_NUMBER",
-                "DATE": "DATE_TIME", "TIME": "DATE_TIME",
-                "MISC": "NRP"
-            }
-            
-            for item in data:
-                # Handle both aggregated and raw token responses
-                label = item.get('entity_group') or item.get('entity')
-                if not label: continue
-                
-                # Strip B- or I- prefix if present
-                clean_label = label.replace('B-', '').replace('I-', '')
-                
-                presidio_type = entity_map.get(clean_label, "NRP")
-                
-                score = item.get('score', 0.0)
-                start = item.get('start', 0)
-                end = item.get('end', 0)
-                
-                results.append(RecognizerResult(
-                    entity_type=presidio_type,
-                    start=start,
-                    end=end,
-                    score=score
-                ))
-                
-            return results
-            
+            return future.result(), False
+        except NERCallFailed:
+            return [], True  # already logged by the backend
         except Exception as e:
             logger.error(f"BERT Detection Failed: {e}")
-            return []
+            return [], True
 
     def _optimize_results(self, results: List[RecognizerResult], text: str) -> List[RecognizerResult]:
         """
@@ -287,5 +722,3 @@ class PIIDetector:
             analyzer_results=analyzer_results
         )
         return anonymized.text
-
-pii_detector = PIIDetector()
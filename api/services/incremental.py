@@ -0,0 +1,79 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from api.services.chunking import last_boundary
+
+class SessionPrefixCache:
+    """
+    Per-session memory of the last text detect_incremental() processed:
+    its length, a SHA-256 fingerprint and the entities found in it.
+
+    When the next text of the session starts with that exact prefix (a chat
+    history resent with one more turn), only the suffix needs analyzing.
+    Entities hold PII, so entries are in-process only, bounded (LRU) and expire.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl_seconds
+        self._sessions: "OrderedDict[str, Tuple[float, str, int, str, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stats
+        self.hits = 0
+        self.misses = 0
+        self.chars_reused = 0
+        self.chars_analyzed = 0
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def lookup(self, session_id: str, scope: str, text: str) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """(prefix length, entities) if `text` extends what the session processed last under `scope`."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._sessions[session_id]
+                entry = None
+        if entry is None:
+            return None
+        _, entry_scope, length, digest, entities = entry
+        if entry_scope != scope or len(text) < length or self.fingerprint(text[:length]) != digest:
+            return None
+        return length, entities
+
+    def store(self, session_id: str, scope: str, text: str, entities: List[Dict[str, Any]]):
+        entry = (time.monotonic() + self.ttl, scope, len(text), self.fingerprint(text), [dict(e) for e in entities])
+        with self._lock:
+            self._sessions[session_id] = entry
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        processed = self.chars_reused + self.chars_analyzed
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "chars_reused_ratio": round(self.chars_reused / processed, 4) if processed else 0.0
+        }
+
+def resume_point(text: str, prefix_length: int, overlap: int, entities: List[Dict[str, Any]]) -> int:
+    """
+    Where re-analysis of a grown text starts: at a sentence or word boundary up to
+    `overlap` characters before the end of the processed prefix (so a span completed
+    by the new text, or needing its context, is detected whole), and never inside
+    an entity found in the prefix.
+    """
+    limit = max(0, prefix_length - overlap)
+    cut = last_boundary(text, max(0, limit - overlap), limit) or limit
+    for entity in sorted(entities, key=lambda e: e["start"], reverse=True):
+        if entity["start"] < cut < entity["end"]:
+            cut = entity["start"]
+    return cut
@@ -1,50 +1,343 @@
+import re
+import asyncio
 import hashlib
-import uuid
-from typing import List, Dict, Any
-from api.services.detection import pii_detector
-from api.services.vault import vault_service
+from concurrent.futures import ThreadPoolExecutor
+import json
+from typing import List, Dict, Any, Tuple, AsyncIterator, Optional
 from api.models.request import MaskRequest, UnmaskRequest
 from api.models.response import MaskResponse, PIIEntity, UnmaskResponse
+from api.config import settings
+from api.services.streaming import StreamWindow, iter_lines
 
-from api.services.audit import audit_service
+# Simple regex to find tokens: [TYPE_ID]
+TOKEN_PATTERN = re.compile(r"\[([A-Z_]+)_([a-f0-9]{8})\]")
+
+# Text at the end of a stream fragment that could still grow into a token
+PARTIAL_TOKEN_PATTERN = re.compile(r"\[[A-Z_]*[a-f0-9]{0,8}\Z")
+MAX_TOKEN_CHARS = 64
 
 class MaskingService:
+    def __init__(self, detector=None, batcher=None, vault=None, audit=None):
+        # Collaborators are injected by the service container (api.services.container)
+        self.detector = detector
+        self.batcher = batcher
+        self.vault = vault
+        self.audit = audit
+        
+        # Bounded pool for CPU-bound detection on the async path (when micro-batching is off)
+        self.detection_executor = ThreadPoolExecutor(
+            max_workers=settings.DETECTION_EXECUTOR_WORKERS,
+            thread_name_prefix="detect"
+        )
+
     def mask(self, request: MaskRequest) -> MaskResponse:
-        # 1. Detect PII
-        detected_entities, detection_metadata = pii_detector.detect(request.text)
+        # 1. Detect PII (coalesced with concurrent requests when micro-batching is on)
+        options = self._detect_options(request)
+        if self._incremental(request):
+            detected_entities, detection_metadata = self.detector.detect_incremental(request.text, request.session_id, **options)
+        else:
+            detector = self.batcher if settings.DETECT_MICROBATCH_ENABLED else self.detector
+            detected_entities, detection_metadata = detector.detect(request.text, **options)
+        
+        # 2-3. Generate Tokens, Mask and Score
+        response, vault_entries, audit_event = self._prepare_mask(request, detected_entities, detection_metadata)
+        
+        # One pipelined round trip for all tokens of the request
+        self.vault.store_tokens(vault_entries)
+        
+        # 4. Audit Log
+        self.audit.log_event(**audit_event)
+        
+        return response
+
+    async def amask(self, request: MaskRequest) -> MaskResponse:
+        """Async mask: detection off the event loop, async Redis/MySQL I/O."""
+        detected_entities, detection_metadata = await self._adetect(request)
+        
+        response, vault_entries, audit_event = self._prepare_mask(request, detected_entities, detection_metadata)
+        
+        await self.vault.astore_tokens(vault_entries)
+        await self.audit.alog_event(**audit_event)
+        
+        return response
+
+    def mask_batch(self, requests: List[MaskRequest]) -> List[MaskResponse]:
+        """
+        Mask many requests at once.
+        Detection runs through the batched pipeline, all vault tokens are written
+        in one Redis pipeline and all audit events in one INSERT.
+        """
+        detections = self._detect_grouped(requests)
+        responses, vault_entries, audit_events = self._prepare_mask_batch(requests, detections)
+        
+        self.vault.store_tokens(vault_entries)
+        self.audit.log_events(audit_events)
+        
+        return responses
+
+    async def amask_batch(self, requests: List[MaskRequest]) -> List[MaskResponse]:
+        """Async variant of mask_batch."""
+        loop = asyncio.get_running_loop()
+        detections = await loop.run_in_executor(self.detection_executor, self._detect_grouped, requests)
+        responses, vault_entries, audit_events = self._prepare_mask_batch(requests, detections)
+        
+        await self.vault.astore_tokens(vault_entries)
+        await self.audit.alog_events(audit_events)
+        
+        return responses
+
+    async def amask_stream(self, chunks: AsyncIterator[str], session_id: str,
+                           context: Optional[Dict[str, Any]] = None,
+                           options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Mask a text stream, yielding masked text as each window is committed.
+        Memory is bounded by STREAM_WINDOW_CHARS; spans crossing chunk or window
+        boundaries are caught through the carried-over tail (see StreamWindow).
+        One audit event is written when the stream ends, also when it is aborted
+        (client disconnect, error), with metadata.completed = False.
+        """
+        template = MaskRequest(text="", session_id=session_id, context=context or {}, options=options or {})
+        window = StreamWindow(settings.STREAM_WINDOW_CHARS, settings.STREAM_CARRY_CHARS)
+        totals = {"entities": 0, "windows": 0, "pii_types": set()}
+        
+        completed = False
+        try:
+            async for chunk in chunks:
+                window.feed(chunk)
+                while window.ready():
+                    yield await self._amask_window(window, template, totals, final=False)
+            while window.buffer:
+                yield await self._amask_window(window, template, totals, final=True)
+            completed = True
+        finally:
+            await self.audit.alog_event(**self._stream_audit_event(template, totals, window.offset, completed))
+
+    async def amask_ndjson(self, chunks: AsyncIterator[str], session_id: str,
+                           context: Optional[Dict[str, Any]] = None,
+                           options: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Mask an NDJSON stream: each line is {"text": ...} (plus an optional "id" that is
+        echoed back) or a JSON string. Yields one MaskResponse JSON line per input line;
+        lines are masked STREAM_NDJSON_BATCH at a time through the batch pipeline.
+        """
+        pending: List[Tuple[Any, MaskRequest]] = []
+        
+        async def flush():
+            responses = await self.amask_batch([request for _, request in pending])
+            lines = []
+            for (line_id, _), response in zip(pending, responses):
+                lines.append(json.dumps({"id": line_id, **response.model_dump(mode="json")}) + "\n")
+            pending.clear()
+            return "".join(lines)
+        
+        number = 0
+        async for line, too_long in iter_lines(chunks, settings.STREAM_MAX_LINE_CHARS):
+            number += 1
+            if not too_long and not line.strip():
+                continue
+            try:
+                if too_long:
+                    raise ValueError(f"line longer than {settings.STREAM_MAX_LINE_CHARS} characters")
+                record = json.loads(line)
+                if isinstance(record, str):
+                    record = {"text": record}
+                if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+                    raise ValueError('expected {"text": ...} or a JSON string')
+            except ValueError as e:
+                if pending:
+                    yield await flush()
+                yield json.dumps({"id": number, "success": False, "error": str(e)}) + "\n"
+                continue
+            
+            pending.append((record.get("id", number), MaskRequest(
+                text=record["text"], session_id=session_id, context=context or {}, options=options or {}
+            )))
+            if len(pending) >= settings.STREAM_NDJSON_BATCH:
+                yield await flush()
+        if pending:
+            yield await flush()
+
+    def stream_detect_options(self, options: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Validate stream options up front (before the response starts). Raises ValueError."""
+        return self._detect_options(MaskRequest(text="", session_id="", options=options or {}))
+
+    async def _amask_window(self, window: StreamWindow, template: MaskRequest, totals: Dict[str, Any], final: bool) -> str:
+        """Detect over the current window, mask and emit its committed part, store its tokens."""
+        text = window.window()
+        detected_entities, _ = await self._adetect(template.model_copy(update={"text": text}))
+        cut = window.commit_point(detected_entities, final)
+        
+        committed = [entity for entity in detected_entities if entity["end"] <= cut]
+        request = template.model_copy(update={"text": text[:cut]})
+        masked_text, _, pii_types_found, vault_entries = self._apply_tokens(request, committed)
+        await self.vault.astore_tokens(vault_entries)
+        
+        window.advance(cut)
+        totals["windows"] += 1
+        totals["entities"] += len(committed)
+        totals["pii_types"].update(pii_types_found)
+        return masked_text
+
+    def _stream_audit_event(self, template: MaskRequest, totals: Dict[str, Any], characters: int,
+                            completed: bool = True) -> Dict[str, Any]:
+        context = template.context or {}
+        return dict(
+            operation="MASK",
+            session_id=template.session_id,
+            user_id=context.get('user_id'),
+            user_role=context.get('user_role'),
+            pii_types=sorted(totals["pii_types"]),
+            purpose=context.get('purpose'),
+            success=completed,
+            metadata={
+                "stream": True,
+                "completed": completed,
+                "characters": characters,
+                "windows": totals["windows"],
+                "entities_count": totals["entities"]
+            }
+        )
+
+    async def _adetect(self, request: MaskRequest, options: Optional[Dict[str, Any]] = None):
+        """Run detection without blocking the event loop (`options` as from _detect_options, if already resolved)."""
+        if options is None:
+            options = self._detect_options(request)
+        if self._incremental(request):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.detection_executor,
+                lambda: self.detector.detect_incremental(request.text, request.session_id, **options)
+            )
+        if not self.detector.may_contain_pii(request.text, **options):
+            # PII-free text: answered inline, without a queue wait or thread hop
+            return self.detector.prefiltered(request.text, **options)
+        # Screened once, here: the detector must not run the pre-filter again
+        if settings.DETECT_MICROBATCH_ENABLED:
+            return await asyncio.wrap_future(self.batcher.submit(request.text, prescreened=True, **options))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.detection_executor, lambda: self.detector.detect(request.text, prescreened=True, **options)
+        )
+
+    def _detect_options(self, request: MaskRequest) -> Dict[str, Any]:
+        """
+        Detection keyword arguments from MaskRequest.options:
+        - "profile": detection profile name (structured-only, fast, accurate)
+        - "entities" (or "pii_types"): allow-list of entity types to detect and mask
+        ("incremental" is read by _incremental, not passed to detect)
+        Raises ValueError for invalid options.
+        """
+        options = request.options or {}
+        if not isinstance(options.get("incremental", False), bool):
+            raise ValueError("options.incremental must be true or false")
+        profile = options.get("profile")
+        self.detector.resolve_profile(profile)
+        entities = options.get("entities", options.get("pii_types"))
+        if entities is not None and not isinstance(entities, list):
+            raise ValueError("options.entities must be a list of entity types")
+        return {"profile": profile, "entities": self.detector.resolve_entities(entities)}
+
+    def _incremental(self, request: MaskRequest) -> bool:
+        """
+        options.incremental: the text is the session's history so far, resent with new
+        turns appended; only the new part is analyzed (see PIIDetector.detect_incremental).
+        """
+        return bool((request.options or {}).get("incremental"))
+
+    def _detect_grouped(self, requests: List[MaskRequest]) -> List[tuple]:
+        """detect_batch per distinct set of detection options, results back in request order."""
+        groups: Dict[tuple, List[int]] = {}
+        detections: List[tuple] = [None] * len(requests)
+        for i, request in enumerate(requests):
+            options = self._detect_options(request)
+            if self._incremental(request):
+                # In request order, so a session's later history builds on its earlier one
+                detections[i] = self.detector.detect_incremental(request.text, request.session_id, **options)
+            else:
+                groups.setdefault(tuple(sorted(options.items())), []).append(i)
+        
+        for options, indexes in groups.items():
+            results = self.detector.detect_batch([requests[i].text for i in indexes], **dict(options))
+            for i, result in zip(indexes, results):
+                detections[i] = result
+        return detections
+
+    def _prepare_mask(self, request: MaskRequest, detected_entities: List[Dict[str, Any]], detection_metadata: Dict[str, Any]):
+        """
+        Everything between detection and I/O.
+        Returns (response, vault_entries, audit_event kwargs).
+        """
+        masked_text, entities_result, pii_types_found, vault_entries = self._apply_tokens(request, detected_entities)
+        
+        # Calculate Risk Score
+        risk_score = self._risk_score(detected_entities)
+        audit_event = self._mask_audit_event(request, pii_types_found, risk_score, entities_result, detection_metadata)
+        
+        response = MaskResponse(
+            success=True,
+            masked_text=masked_text,
+            entities=entities_result,
+            session_id=request.session_id,
+            risk_score=risk_score,
+            metadata=detection_metadata
+        )
+        return response, vault_entries, audit_event
+
+    def _prepare_mask_batch(self, requests: List[MaskRequest], detections: List[tuple]):
+        responses = []
+        all_vault_entries = []
+        audit_events = []
         
-        # 2. Generate Tokens and Mask
-        masked_text = request.text
+        for request, (detected_entities, detection_metadata) in zip(requests, detections):
+            response, vault_entries, audit_event = self._prepare_mask(request, detected_entities, detection_metadata)
+            responses.append(response)
+            all_vault_entries.extend(vault_entries)
+            audit_events.append(audit_event)
+        
+        return responses, all_vault_entries, audit_events
+
+    def _apply_tokens(self, request: MaskRequest, detected_entities: List[Dict[str, Any]]):
+        """
+        Replace detected entities with tokens.
+        Returns (masked_text, entities_result, pii_types_found, vault_entries) where
+        vault_entries are (session_id, token_id, vault_data) tuples still to be stored.
+        """
         entities_result = []
+        vault_entries = []
+        replacements = []
         
-        # Sort entities by start index in reverse order to replace without messing up indices
+        # Sort entities by start index in reverse order (response order)
         detected_entities.sort(key=lambda x: x['start'], reverse=True)
         
         pii_types_found = []
+        # Repeated values share one token: hash and queue each (pii_type, value) once
+        issued_tokens = {}
         
         for entity in detected_entities:
             original_text = entity['text']
             pii_type = entity['type']
             pii_types_found.append(pii_type)
             
-            # Generate deterministic token for this session + value
-            token_id = self._generate_token_id(request.session_id, pii_type, original_text)
+            token_id = issued_tokens.get((pii_type, original_text))
+            if token_id is None:
+                # Generate deterministic token for this session + value
+                token_id = self._generate_token_id(request.session_id, pii_type, original_text)
+                issued_tokens[(pii_type, original_text)] = token_id
+                
+                # Queue for the Vault
+                vault_data = {
+                    "original_value": original_text,
+                    "pii_type": pii_type,
+                    "source": entity.get('source', 'Unknown'),
+                    "context": request.context,
+                    "created_at": "now" # TODO: use real timestamp
+                }
+                vault_entries.append((request.session_id, token_id, vault_data))
             token = f"[{pii_type}_{token_id}]"
             
-            # Store in Vault
-            vault_data = {
-                "original_value": original_text,
-                "pii_type": pii_type,
-                "source": entity.get('source', 'Unknown'),
-                "context": request.context,
-                "created_at": "now" # TODO: use real timestamp
-            }
-            vault_service.store_token(request.session_id, token_id, vault_data)
-            
-            # Replace in text
             start = entity['start']
             end = entity['end']
-            masked_text = masked_text[:start] + token + masked_text[end:]
+            replacements.append((start, end, token))
             
             entities_result.append(PIIEntity(
                 type=pii_type,
@@ -54,13 +347,21 @@ class MaskingService:
                 score=entity['score'],
                 token=token
             ))
-            
-        # 3. Calculate Risk Score
-        risk_score = min(len(detected_entities) * 1.5, 10.0)
         
-        # 4. Audit Log
+        # Replace in text
+        replacements.reverse()
+        masked_text = self._splice(request.text, replacements)
+            
+        return masked_text, entities_result, pii_types_found, vault_entries
+
+    def _risk_score(self, detected_entities: List[Dict[str, Any]]) -> float:
+        return min(len(detected_entities) * 1.5, 10.0)
+
+    def _mask_audit_event(self, request: MaskRequest, pii_types_found: List[str], risk_score: float,
+                          entities_result: List[PIIEntity], detection_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the keyword arguments for a MASK audit event."""
         context = request.context or {}
-        audit_service.log_event(
+        return dict(
             operation="MASK",
             session_id=request.session_id,
             user_id=context.get('user_id'),
@@ -74,15 +375,27 @@ class MaskingService:
                 **detection_metadata
             }
         )
+
+    @staticmethod
+    def _splice(text: str, replacements: List[Tuple[int, int, str]]) -> str:
+        """
+        Build `text` with each (start, end, replacement) span substituted, in one pass.
+        `replacements` must be sorted by start. Spans overlapping an earlier one are skipped.
         
-        return MaskResponse(
-            success=True,
-            masked_text=masked_text,
-            entities=entities_result,
-            session_id=request.session_id,
-            risk_score=risk_score,
-            metadata=detection_metadata
-        )
+        Cost: O(n + r) for n input chars and r total replacement chars - every
+        untouched slice is copied once into the parts list and once by join,
+        instead of the whole string being rebuilt per span (O(n * k)).
+        """
+        parts = []
+        cursor = 0
+        for start, end, replacement in replacements:
+            if start < cursor:
+                continue
+            parts.append(text[cursor:start])
+            parts.append(replacement)
+            cursor = end
+        parts.append(text[cursor:])
+        return "".join(parts)
 
     def _generate_token_id(self, session_id: str, pii_type: str, value: str) -> str:
         """Generate a short hash for the token."""
@@ -90,34 +403,91 @@ class MaskingService:
         return hashlib.sha256(data.encode()).hexdigest()[:8]
 
     def unmask(self, request: UnmaskRequest) -> UnmaskResponse:
-        unmasked_text = request.text
-        entities_unmasked = []
-        pii_types_unmasked = []
+        # Check Access Control, then fetch every permitted token in one round trip
+        permitted = self._permitted_tokens(request)
+        vault_data_by_token = self.vault.get_tokens(request.session_id, [match.group(2) for match in permitted])
+        
+        unmasked_text, entities_unmasked, pii_types_unmasked = self._apply_unmask(request, permitted, vault_data_by_token)
+        
+        # Audit Log
+        audit_id = self.audit.log_event(**self._unmask_audit_event(request, pii_types_unmasked, entities_unmasked))
+        
+        return UnmaskResponse(
+            success=True,
+            unmasked_text=unmasked_text,
+            entities_unmasked=entities_unmasked,
+            audit_id=audit_id
+        )
+
+    async def aunmask(self, request: UnmaskRequest) -> UnmaskResponse:
+        """Async unmask: one MGET and the audit insert without blocking the event loop."""
+        permitted = self._permitted_tokens(request)
+        vault_data_by_token = await self.vault.aget_tokens(request.session_id, [match.group(2) for match in permitted])
         
-        # Simple regex to find tokens: [TYPE_ID]
-        import re
-        token_pattern = r"\[([A-Z_]+)_([a-f0-9]{8})\]"
+        unmasked_text, entities_unmasked, pii_types_unmasked = self._apply_unmask(request, permitted, vault_data_by_token)
         
-        matches = list(re.finditer(token_pattern, unmasked_text))
+        audit_id = await self.audit.alog_event(**self._unmask_audit_event(request, pii_types_unmasked, entities_unmasked))
+        
+        return UnmaskResponse(
+            success=True,
+            unmasked_text=unmasked_text,
+            entities_unmasked=entities_unmasked,
+            audit_id=audit_id
+        )
+
+    def unmask_stream(self, session_id: str, context: Optional[Dict[str, Any]] = None) -> "StreamingUnmasker":
+        """Incremental unmasking of text that arrives in fragments (e.g. an LLM token stream)."""
+        return StreamingUnmasker(self, session_id, context)
+
+    async def aunmask_stream(self, fragments: AsyncIterator[str], session_id: str,
+                             context: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Unmask an async stream of fragments, yielding text as soon as it is safe to emit.
+        The UNMASK audit event is written however the stream ends (see StreamingUnmasker.aclose).
+        """
+        unmasker = self.unmask_stream(session_id, context)
+        completed = False
+        try:
+            async for fragment in fragments:
+                text = await unmasker.afeed(fragment)
+                if text:
+                    yield text
+            completed = True
+        finally:
+            text = await unmasker.aclose(completed)
+        if text:
+            yield text
+
+    def session_channel(self, session_id: str, context: Optional[Dict[str, Any]] = None,
+                        options: Optional[Dict[str, Any]] = None) -> "SessionChannel":
+        """Long-lived mask/unmask channel bound to one session (e.g. a chat WebSocket). Raises ValueError for bad options."""
+        return SessionChannel(self, session_id, context, options)
+
+    def _permitted_tokens(self, request: UnmaskRequest) -> List[re.Match]:
+        """Token matches in the text whose PII type the caller may unmask."""
+        return [
+            match for match in TOKEN_PATTERN.finditer(request.text)
+            if self._check_access(request.context, match.group(1))
+        ]
+
+    def _apply_unmask(self, request: UnmaskRequest, permitted: List[re.Match], vault_data_by_token: Dict[str, Dict[str, Any]]):
+        """Returns (unmasked_text, entities_unmasked, pii_types_unmasked)."""
+        replacements = []
+        entities_unmasked = []
+        pii_types_unmasked = []
         
-        for match in reversed(matches):
+        for match in reversed(permitted):
             full_token = match.group(0)
             pii_type = match.group(1)
             token_id = match.group(2)
             
-            # Check Access Control
-            if not self._check_access(request.context, pii_type):
-                continue
-            
             # Retrieve from Vault
-            vault_data = vault_service.get_token(request.session_id, token_id)
+            vault_data = vault_data_by_token.get(token_id)
             
             if vault_data:
                 original_value = vault_data.get("original_value")
                 if original_value:
-                    start = match.start()
-                    end = match.end()
-                    unmasked_text = unmasked_text[:start] + original_value + unmasked_text[end:]
+                    replacements.append((match.start(), match.end(), original_value))
                     
                     entities_unmasked.append({
                         "type": pii_type,
@@ -126,9 +496,15 @@ class MaskingService:
                     })
                     pii_types_unmasked.append(pii_type)
         
-        # Audit Log
+        replacements.reverse()
+        unmasked_text = self._splice(request.text, replacements)
+        return unmasked_text, entities_unmasked, pii_types_unmasked
+
+    def _unmask_audit_event(self, request: UnmaskRequest, pii_types_unmasked: List[str],
+                            entities_unmasked: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the keyword arguments for an UNMASK audit event."""
         context = request.context or {}
-        audit_id = audit_service.log_event(
+        return dict(
             operation="UNMASK",
             session_id=request.session_id,
             user_id=context.get('user_id'),
@@ -139,13 +515,6 @@ class MaskingService:
             success=True,
             metadata={"entities_count": len(entities_unmasked)}
         )
-        
-        return UnmaskResponse(
-            success=True,
-            unmasked_text=unmasked_text,
-            entities_unmasked=entities_unmasked,
-            audit_id=audit_id
-        )
 
     def _check_access(self, context: Dict, pii_type: str) -> bool:
         """
@@ -168,5 +537,193 @@ class MaskingService:
             
         return False
 
-masking_service = MaskingService()
 
+
+class StreamingUnmasker:
+    """
+    Re-identifies a masked text that arrives in fragments.
+
+    feed() returns everything that can be emitted now: the fragment with its
+    complete tokens unmasked, minus a trailing partial "[TYPE_xxxx" that a later
+    fragment may complete. Each feed does at most one vault lookup (MGET) for
+    tokens not seen earlier in the stream; per-role access checks
+    (MaskingService._check_access) apply to every token. close() emits the
+    held-back tail and writes one UNMASK audit event for the stream; call it
+    with completed=False when the stream was aborted, so the re-identified
+    values already sent are still audited.
+    """
+
+    def __init__(self, service: MaskingService, session_id: str, context: Optional[Dict[str, Any]] = None,
+                 vault_data: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.service = service
+        self.request = UnmaskRequest(text="", session_id=session_id, context=context or {})
+        self.held = ""
+        self.entities_unmasked: List[Dict[str, Any]] = []
+        # token_id -> vault data; may be shared with a SessionChannel
+        self._vault_data: Dict[str, Dict[str, Any]] = {} if vault_data is None else vault_data
+        self.vault_lookups = 0
+
+    def feed(self, fragment: str) -> str:
+        text, permitted, missing = self._split(fragment)
+        if missing:
+            self._remember(missing, self.service.vault.get_tokens(self.request.session_id, missing))
+        return self._unmask(text, permitted)
+
+    async def afeed(self, fragment: str) -> str:
+        text, permitted, missing = self._split(fragment)
+        if missing:
+            self._remember(missing, await self.service.vault.aget_tokens(self.request.session_id, missing))
+        return self._unmask(text, permitted)
+
+    def close(self, completed: bool = True) -> str:
+        tail = self.feed("") + self.held if completed else ""
+        self.held = ""
+        self.service.audit.log_event(**self._audit_event(completed))
+        return tail
+
+    async def aclose(self, completed: bool = True) -> str:
+        tail = await self.afeed("") + self.held if completed else ""
+        self.held = ""
+        await self.service.audit.alog_event(**self._audit_event(completed))
+        return tail
+
+    def _split(self, fragment: str) -> Tuple[str, List[re.Match], List[str]]:
+        """(emittable text, its permitted token matches, token ids still to fetch); keeps back a partial token."""
+        buffer = self.held + fragment
+        hold = 0
+        start = buffer.rfind("[", max(0, len(buffer) - MAX_TOKEN_CHARS))
+        if start >= 0 and PARTIAL_TOKEN_PATTERN.match(buffer, start):
+            hold = len(buffer) - start
+        text = buffer[:len(buffer) - hold]
+        self.held = buffer[len(buffer) - hold:]
+        
+        permitted = self.service._permitted_tokens(self.request.model_copy(update={"text": text}))
+        missing = list(dict.fromkeys(m.group(2) for m in permitted if m.group(2) not in self._vault_data))
+        return text, permitted, missing
+
+    def _remember(self, token_ids: List[str], found: Dict[str, Dict[str, Any]]):
+        self.vault_lookups += 1
+        for token_id in token_ids:
+            # Unknown tokens are remembered too, so they aren't looked up again
+            self._vault_data[token_id] = found.get(token_id, {})
+
+    def _unmask(self, text: str, permitted: List[re.Match]) -> str:
+        if not permitted:
+            return text
+        request = self.request.model_copy(update={"text": text})
+        unmasked_text, entities_unmasked, _ = self.service._apply_unmask(request, permitted, self._vault_data)
+        self.entities_unmasked.extend(reversed(entities_unmasked))
+        return unmasked_text
+
+    def _audit_event(self, completed: bool = True) -> Dict[str, Any]:
+        pii_types = [entity["type"] for entity in self.entities_unmasked]
+        event = self.service._unmask_audit_event(self.request, pii_types, self.entities_unmasked)
+        event["success"] = completed
+        event["metadata"] = {**event["metadata"], "stream": True, "completed": completed,
+                             "vault_lookups": self.vault_lookups}
+        return event
+
+class SessionChannel:
+    """
+    Mask and unmask messages of one session over a long-lived connection.
+
+    Context and detection options are validated once, when the channel opens.
+    Every token the channel issues or looks up is cached (token_id -> vault
+    data), so unmasking the model's reply needs no vault round trip for tokens
+    this channel issued. Masking still hands every token to the vault, which
+    refreshes the TTL of ones it already holds. Access checks still run per token. Audit events are queued
+    and written in the background, coalesced into multi-row inserts, so no
+    message waits on MySQL; close() flushes what is left.
+    """
+
+    def __init__(self, service: MaskingService, session_id: str, context: Optional[Dict[str, Any]] = None,
+                 options: Optional[Dict[str, Any]] = None):
+        self.service = service
+        self.template = MaskRequest(text="", session_id=session_id, context=context or {}, options=options or {})
+        self.unmask_template = UnmaskRequest(text="", session_id=session_id, context=context or {})
+        self.detect_options = service._detect_options(self.template)
+        self._vault_data: Dict[str, Dict[str, Any]] = {}
+        self._unmasker: Optional[StreamingUnmasker] = None
+        self._audit_queue: List[Dict[str, Any]] = []
+        self._audit_task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.messages = 0
+        self.vault_lookups_avoided = 0
+
+    async def amask(self, text: str) -> MaskResponse:
+        request = self.template.model_copy(update={"text": text})
+        detected_entities, detection_metadata = await self.service._adetect(request, self.detect_options)
+        response, vault_entries, audit_event = self.service._prepare_mask(request, detected_entities, detection_metadata)
+        
+        # Always through the vault, even for cached tokens: it extends their TTL
+        if vault_entries and await self.service.vault.astore_tokens(vault_entries):
+            self._cache({token_id: vault_data for _, token_id, vault_data in vault_entries})
+        
+        self.messages += 1
+        self._audit(audit_event)
+        return response
+
+    async def aunmask(self, text: str) -> UnmaskResponse:
+        request = self.unmask_template.model_copy(update={"text": text})
+        permitted = self.service._permitted_tokens(request)
+        token_ids = list(dict.fromkeys(match.group(2) for match in permitted))
+        missing = [token_id for token_id in token_ids if token_id not in self._vault_data]
+        self.vault_lookups_avoided += len(token_ids) - len(missing)
+        if missing:
+            found = await self.service.vault.aget_tokens(request.session_id, missing)
+            self._cache({token_id: found.get(token_id, {}) for token_id in missing})
+        
+        unmasked_text, entities_unmasked, pii_types_unmasked = self.service._apply_unmask(request, permitted, self._vault_data)
+        self.messages += 1
+        self._audit(self.service._unmask_audit_event(request, pii_types_unmasked, entities_unmasked))
+        return UnmaskResponse(success=True, unmasked_text=unmasked_text, entities_unmasked=entities_unmasked)
+
+    async def aunmask_fragment(self, fragment: str, final: bool = False) -> str:
+        """
+        Unmask a streamed reply fragment by fragment (see StreamingUnmasker), sharing
+        the channel's token cache. `final` ends the current stream.
+        """
+        if self._unmasker is None:
+            self._unmasker = StreamingUnmasker(self.service, self.template.session_id, self.template.context,
+                                               vault_data=self._vault_data)
+        text = await self._unmasker.afeed(fragment)
+        if final:
+            unmasker, self._unmasker = self._unmasker, None
+            text += unmasker.held
+            self.messages += 1
+            self._audit(unmasker._audit_event())
+        return text
+
+    async def aclose(self):
+        """Flush queued audit events (including those of an unfinished fragment stream)."""
+        if self._unmasker is not None:
+            self._audit(self._unmasker._audit_event(completed=False))
+            self._unmasker = None
+        if self._audit_task is not None:
+            await self._audit_task
+        await self._flush_audit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": self.messages,
+            "cached_tokens": len(self._vault_data),
+            "vault_lookups_avoided": self.vault_lookups_avoided
+        }
+
+    def _cache(self, entries: Dict[str, Dict[str, Any]]):
+        if len(self._vault_data) + len(entries) > settings.SESSION_CHANNEL_MAX_CACHED_TOKENS:
+            # Bounded: start over rather than track recency per token
+            self._vault_data.clear()
+        self._vault_data.update(entries)
+
+    def _audit(self, event: Dict[str, Any]):
+        self._audit_queue.append(event)
+        if self._audit_task is None or self._audit_task.done():
+            self._audit_task = asyncio.create_task(self._flush_audit())
+
+    async def _flush_audit(self):
+        # Events queued while an insert is in flight go out together in the next one
+        while self._audit_queue:
+            events, self._audit_queue = self._audit_queue, []
+            await self.service.audit.alog_events(events)
@@ -0,0 +1,169 @@
+import os
+import sys
+import gc
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+def process_memory(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    RSS/PSS/private memory of a process in MB, from /proc (Linux).
+
+    PSS splits copy-on-write pages shared with forked siblings, and private
+    memory is what each extra worker actually costs, so these are the numbers
+    to size worker counts with rather than RSS.
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    fields = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        # No smaps_rollup (non-Linux / old kernel): peak RSS is the best we have
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss_mb": round(peak / 1024, 1)} if sys.platform != "darwin" else {"rss_mb": round(peak / MB, 1)}
+
+    return {
+        "rss_mb": round(fields.get("Rss", 0) / MB, 1),
+        "pss_mb": round(fields.get("Pss", 0) / MB, 1),
+        "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / MB, 1),
+        "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / MB, 1)
+    }
+
+def available_memory_mb() -> Optional[float]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def deep_size(obj: Any, limit: int = 200000) -> int:
+    """
+    Approximate bytes held by Python objects reachable from `obj`
+    (containers, instance dicts, slots). Visits at most `limit` objects.
+    Native buffers (numpy arrays, model weights) only count their header.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, type):
+            continue
+        seen.add(id(current))
+        try:
+            total += sys.getsizeof(current)
+        except TypeError:
+            continue
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        else:
+            if hasattr(current, "__dict__"):
+                stack.append(current.__dict__)
+            for slot in getattr(type(current), "__slots__", ()):
+                if isinstance(slot, str) and hasattr(current, slot):
+                    stack.append(getattr(current, slot))
+    return total
+
+def spacy_model_report(nlp) -> Dict[str, Any]:
+    """Serialized size of each pipeline component plus the vocab and vectors."""
+    components = {}
+    for name, pipe in nlp.pipeline:
+        try:
+            components[name] = round(len(pipe.to_bytes()) / MB, 2)
+        except Exception:
+            # Rule-based components without serializable state
+            components[name] = 0.0
+
+    vectors = nlp.vocab.vectors
+    return {
+        "model": f"{nlp.meta.get('lang', '')}_{nlp.meta.get('name', '')}",
+        "components_mb": components,
+        "vocab_strings": len(nlp.vocab.strings),
+        "vectors_mb": round(vectors.data.nbytes / MB, 2) if vectors.size else 0.0,
+        "total_mb": round(sum(components.values()) + (vectors.data.nbytes / MB if vectors.size else 0.0), 2)
+    }
+
+def ner_backend_report(backend) -> Dict[str, Any]:
+    report = {"backend": backend.name}
+    model = getattr(getattr(backend, "pipeline", None), "model", None)
+    if model is None:
+        return report
+    try:
+        report["parameters_mb"] = round(sum(p.numel() * p.element_size() for p in model.parameters()) / MB, 1)
+    except Exception:
+        # ONNX Runtime sessions don't expose their weights
+        report["parameters_mb"] = None
+    return report
+
+def memory_report(services) -> Dict[str, Any]:
+    """
+    Per-component memory for the services already built in `services`
+    (a ServiceContainer). Nothing is constructed by reporting.
+    """
+    gc.collect()
+    report: Dict[str, Any] = {
+        "process": {"pid": os.getpid(), **process_memory()},
+        "available_mb": available_memory_mb(),
+        "cold_start_ms": dict(services.timings_ms),
+        "components": {}
+    }
+    components = report["components"]
+
+    detector = services.built("detector")
+    if detector is not None:
+        components["spacy"] = spacy_model_report(detector.nlp)
+        components["recognizer_registry"] = {
+            "recognizers": len(detector.analyzer.registry.recognizers),
+            "python_objects_mb": round(deep_size(detector.analyzer.registry) / MB, 2)
+        }
+        if detector.use_bert:
+            components["ner_backend"] = ner_backend_report(detector.ner_backend)
+        if detector.cache is not None:
+            components["detection_cache"] = {
+                "entries": len(detector.cache._entries),
+                "max_entries": detector.cache.max_entries,
+                "python_objects_mb": round(deep_size(detector.cache._entries) / MB, 2)
+            }
+        if detector.worker_pool is not None:
+            executor = detector.worker_pool._executor
+            processes = getattr(executor, "_processes", None) or {}
+            components["detection_workers"] = {
+                pid: process_memory(pid) for pid in processes
+            }
+
+    vault = services.built("vault")
+    if vault is not None:
+        components["vault_markers"] = {
+            "sessions": len(vault._stored),
+            "tokens": sum(len(tokens) for tokens in vault._stored.values()),
+            "python_objects_mb": round(deep_size(vault._stored) / MB, 2)
+        }
+
+    audit = services.built("audit")
+    if audit is not None:
+        components["audit_pools"] = {
+            "sync_pool_size": audit.pool.pool_size if audit.pool else 0,
+            "async_pool_size": audit.apool.size if audit.apool else 0
+        }
+
+    # A new worker costs roughly this process's private memory once models are shared
+    private = report["process"].get("private_mb")
+    if private and report["available_mb"]:
+        report["additional_workers_fit"] = int(report["available_mb"] // private)
+
+    return report
@@ -0,0 +1,202 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from presidio_analyzer import RecognizerResult
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+class NERCallFailed(Exception):
+    """An NER call that failed (error status, model loading, timeout), as opposed to one that found nothing."""
+
+class NERBackend(ABC):
+    """
+    Phase 1 (BERT-class token classification) backend interface.
+
+    submit() returns a concurrent Future of RecognizerResults so the caller can
+    run Presidio while NER is in flight, or None when the call was skipped
+    (e.g. an open circuit). A failed call sets an exception on the Future.
+    Results use the Presidio entity names from ENTITY_MAP.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def submit(self, text: str) -> Optional[Future]:
+        ...
+
+    def submit_batch(self, texts: List[str]) -> List[Optional[Future]]:
+        """Submit many texts; backends that can run true batches override this."""
+        return [self.submit(text) for text in texts]
+
+    def circuit_state(self) -> Optional[str]:
+        """Circuit breaker state for remote backends, None when not applicable."""
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+    def close(self):
+        pass
+
+class LocalNERBackend(NERBackend):
+    """
+    In-process CPU token classification from a local model directory.
+
+    Loads either an ONNX export (via optimum + onnxruntime) or a regular
+    transformers/torch checkpoint and runs it through a token-classification
+    pipeline with aggregation, so output has the same shape as the Hugging Face
+    API and goes through the same entity_map. Inference runs on a single
+    dedicated thread (the runtime parallelizes across cores itself) and
+    submit_batch() sends the whole list through the model in padded batches.
+    """
+
+    name = "local"
+
+    def __init__(self, model_path: str, model_format: str = "auto", batch_size: int = 16, num_threads: int = 0):
+        self.model_path = model_path
+        self.batch_size = max(1, batch_size)
+        self.num_threads = num_threads
+        self.model_format = self._resolve_format(model_path, model_format)
+
+        self.pipeline = self._load_pipeline()
+        self._executor = None
+        self._pid = None
+
+        # Stats
+        self.batches_run = 0
+        self.sequences_run = 0
+
+    @staticmethod
+    def _resolve_format(model_path: str, model_format: str) -> str:
+        if model_format != "auto":
+            return model_format
+        has_onnx = any(name.endswith(".onnx") for name in os.listdir(model_path))
+        return "onnx" if has_onnx else "torch"
+
+    def _load_pipeline(self):
+        from transformers import AutoTokenizer, pipeline
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+
+        if self.model_format == "onnx":
+            from optimum.onnxruntime import ORTModelForTokenClassification
+            model = ORTModelForTokenClassification.from_pretrained(self.model_path)
+        else:
+            import torch
+            from transformers import AutoModelForTokenClassification
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            model = AutoModelForTokenClassification.from_pretrained(self.model_path)
+            model.eval()
+
+        logger.info(f"✅ Phase 1: Local NER model loaded from {self.model_path} ({self.model_format})")
+        return pipeline(
+            "token-classification",
+            model=model,
+            tokenizer=tokenizer,
+            aggregation_strategy="simple",
+            device=-1
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Executor threads don't survive fork; recreate in the child
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-ner")
+            self._pid = os.getpid()
+        return self._executor
+
+    def predict_batch(self, texts: List[str]) -> List[List[RecognizerResult]]:
+        """Run the model over `texts` in batches of `batch_size`."""
+        from api.services.bert_client import parse_ner_response
+
+        if not texts:
+            return []
+
+        outputs = self.pipeline(list(texts), batch_size=self.batch_size)
+        self.batches_run += 1
+        self.sequences_run += len(texts)
+        return [parse_ner_response(items) for items in outputs]
+
+    def submit(self, text: str) -> Optional[Future]:
+        if not text: return None
+        return self.submit_batch([text])[0]
+
+    def submit_batch(self, texts: List[str]) -> List[Optional[Future]]:
+        # Empty texts are answered without touching the model
+        indexed = [(i, text) for i, text in enumerate(texts) if text]
+        futures: List[Optional[Future]] = [None] * len(texts)
+        if not indexed:
+            return futures
+
+        for i, _ in indexed:
+            futures[i] = Future()
+
+        def run():
+            try:
+                results = self.predict_batch([text for _, text in indexed])
+                for (i, _), result in zip(indexed, results):
+                    futures[i].set_result(result)
+            except Exception as e:
+                logger.error(f"Local NER inference failed: {e}")
+                for i, _ in indexed:
+                    futures[i].set_exception(e)
+
+        self._get_executor().submit(run)
+        return futures
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "model_path": self.model_path,
+            "format": self.model_format,
+            "batch_size": self.batch_size,
+            "batches_run": self.batches_run,
+            "sequences_run": self.sequences_run
+        }
+
+    def close(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+def create_ner_backend() -> Optional[NERBackend]:
+    """
+    Build the Phase 1 backend selected by settings.NER_BACKEND:
+    "hf_api" (remote Hugging Face inference, needs HUGGINGFACE_API_KEY),
+    "local" (in-process model from NER_MODEL_PATH) or "none".
+    Returns None when the phase is disabled or cannot be initialized.
+    """
+    backend = settings.NER_BACKEND.lower()
+
+    if backend == "local":
+        if not settings.NER_MODEL_PATH:
+            logger.error("❌ Phase 1: NER_BACKEND=local but NER_MODEL_PATH is not set")
+            return None
+        try:
+            return LocalNERBackend(
+                settings.NER_MODEL_PATH,
+                model_format=settings.NER_MODEL_FORMAT,
+                batch_size=settings.NER_BATCH_SIZE,
+                num_threads=settings.NER_NUM_THREADS
+            )
+        except ImportError as e:
+            logger.error(f"❌ Phase 1: Local NER needs transformers (and torch or optimum[onnxruntime]): {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Phase 1: Failed to load local NER model: {e}")
+            return None
+
+    if backend == "hf_api":
+        if not settings.HUGGINGFACE_API_KEY:
+            return None
+        from api.services.bert_client import BertClient
+        return BertClient(
+            settings.HUGGINGFACE_API_URL or "https://api-inference.huggingface.co/models/dslim/bert-base-NER",
+            settings.HUGGINGFACE_API_KEY,
+            timeout=settings.BERT_TIMEOUT_MAX_SECONDS
+        )
+
+    return None
@@ -0,0 +1,160 @@
+import re
+import logging
+import threading
+from typing import Callable, Dict, FrozenSet, Iterator, List, Tuple
+from presidio_analyzer import PatternRecognizer
+from presidio_analyzer.predefined_recognizers import PhoneRecognizer, SpacyRecognizer
+
+logger = logging.getLogger(__name__)
+
+# Every predefined pattern recognizer (IDs, cards, phones, dates, IPs, emails, URLs,
+# crypto wallets) needs at least one of: a digit, '@', ':' or a dot inside a word
+STRUCTURED_SIGNAL = re.compile(r"[\d@:]|\w\.\w")
+DIGIT = re.compile(r"\d")
+
+WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?")
+SENTENCE_END = re.compile(r"[.!?\n]")
+
+# Words spaCy/BERT tag as DATE_TIME without any digit or capital letter
+TEMPORAL_WORDS = frozenset("""
+today tomorrow yesterday tonight morning afternoon evening night noon midnight
+day days week weeks weekend weekends month months year years decade decades century
+hour hours minute minutes second seconds ago annual annually daily weekly monthly yearly
+quarter quarterly fortnight spring summer autumn fall winter am pm
+monday tuesday wednesday thursday friday saturday sunday
+january february march april june july august september october november december
+one two three four five six seven eight nine ten eleven twelve thirteen fourteen fifteen
+sixteen seventeen eighteen nineteen twenty thirty forty fifty sixty seventy eighty ninety
+hundred thousand million billion dozen half first third fourth fifth sixth
+""".split())
+
+# Capitalized sentence openers that are never names/places on their own
+SAFE_OPENERS = frozenset("""
+hello hi hey thanks thank please sure okay ok yes no yeah nope sorry great good fine
+welcome regards cheers bye goodbye dear kindly hope let lets what when where why how who
+which is are can could would should will do does did have has had i i'm i've i'll i'd
+""".split())
+
+PRONOUN_I = frozenset({"i", "i'm", "i've", "i'll", "i'd", "i’m", "i’ve", "i’ll", "i’d"})
+
+def _stop_words() -> FrozenSet[str]:
+    try:
+        from spacy.lang.en.stop_words import STOP_WORDS
+        return frozenset(STOP_WORDS)
+    except ImportError:
+        return frozenset()
+
+STOP_WORDS = _stop_words()
+
+def _scan_words(text: str) -> Iterator[Tuple[re.Match, bool]]:
+    """Each word with whether it looks like (part of) a name: capitalized outside a sentence opener, or caseless script."""
+    sentence_start = True
+    position = 0
+    for match in WORD.finditer(text):
+        if SENTENCE_END.search(text, position, match.start()):
+            sentence_start = True
+        position = match.end()
+
+        word = match.group()
+        lower = word.lower()
+        if any(c.isalpha() and not c.islower() and not c.isupper() for c in word):
+            candidate = True  # caseless script (Devanagari, CJK, Arabic...): no capitalization to go by
+        elif word != lower and lower not in PRONOUN_I:
+            candidate = not (sentence_start and word[1:] == lower[1:] and (lower in SAFE_OPENERS or lower in STOP_WORDS))
+        else:
+            candidate = False
+        yield match, candidate
+        sentence_start = False
+
+def name_candidates(text: str) -> List[Tuple[int, int]]:
+    """Spans of words spaCy NER / BERT could tag as a person, place or organization."""
+    return [match.span() for match, candidate in _scan_words(text) if candidate]
+
+def nlp_signal(text: str) -> bool:
+    """Could spaCy NER or BERT find a name, place, organization, group or date in `text`?"""
+    if DIGIT.search(text):
+        return True
+    return any(candidate or match.group().lower() in TEMPORAL_WORDS for match, candidate in _scan_words(text))
+
+class PiiPrefilter:
+    """
+    Conservative pre-screen ahead of detect(): decides, from cheap character-level
+    signals, whether a text can contain any entity the active recognizers look for.
+
+    - predefined pattern recognizers: digit, '@', ':' or an inner dot
+    - custom pattern recognizers (deny lists, fallbacks): the fused RE2 set,
+      whose relaxed patterns match a superset of the originals
+    - PhoneRecognizer: a digit
+    - spaCy NER / BERT: digits, capitalized tokens outside sentence openers,
+      letters from caseless scripts, temporal or number words
+    - anything else: always analyzed
+
+    A text is skipped only if no signal fires for any recognizer that would run.
+    """
+
+    def __init__(self, scanner=None):
+        self.scanner = scanner
+        self._plans: Dict[Tuple, Tuple] = {}
+        self._lock = threading.Lock()
+
+        # Stats
+        self.checked = 0
+        self.skipped = 0
+
+    def reset(self):
+        """Forget per-request plans (call after the recognizer registry changes)."""
+        with self._lock:
+            self._plans = {}
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "skip_rate": round(self.skipped / self.checked, 4) if self.checked else 0.0
+        }
+
+    def plan(self, key: Tuple, recognizers: Callable[[], List], use_nlp: bool) -> Tuple:
+        """
+        Which signals matter for the recognizers that would run, memoized by `key`
+        (language, entities, BERT). Returns (always_run, structured, digits,
+        nlp, custom pattern recognizer ids).
+        """
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        always_run, structured, digits = False, False, False
+        custom_ids = []
+        for recognizer in recognizers():
+            if isinstance(recognizer, SpacyRecognizer):
+                use_nlp = True
+            elif isinstance(recognizer, PhoneRecognizer):
+                digits = True
+            elif isinstance(recognizer, PatternRecognizer) and _is_predefined(recognizer):
+                structured = True
+            elif isinstance(recognizer, PatternRecognizer) and self.scanner is not None and self.scanner.covers(recognizer):
+                custom_ids.append(recognizer.id)
+            else:
+                always_run = True
+
+        plan = (always_run, structured, digits, use_nlp, tuple(custom_ids))
+        with self._lock:
+            self._plans[key] = plan
+        return plan
+
+    def may_contain_pii(self, text: str, plan: Tuple) -> bool:
+        always_run, structured, digits, nlp, custom_ids = plan
+        self.checked += 1
+        found = (
+            always_run
+            or (structured and STRUCTURED_SIGNAL.search(text) is not None)
+            or (digits and DIGIT.search(text) is not None)
+            or (nlp and nlp_signal(text))
+            or (bool(custom_ids) and self.scanner.may_match(text, custom_ids))
+        )
+        if not found:
+            self.skipped += 1
+        return found
+
+def _is_predefined(recognizer) -> bool:
+    return type(recognizer).__module__.startswith("presidio_analyzer.predefined_recognizers")
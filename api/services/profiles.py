@@ -0,0 +1,136 @@
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
+from presidio_analyzer.nlp_engine import NlpArtifacts, SpacyNlpEngine
+
+logger = logging.getLogger(__name__)
+
+STRUCTURED_ONLY = "structured-only"
+FAST = "fast"
+ACCURATE = "accurate"
+
+class TrimmedSpacyNlpEngine(SpacyNlpEngine):
+    """
+    SpacyNlpEngine over an already loaded engine's Language objects that runs
+    only part of the pipeline.
+
+    - `disable`: pipe names skipped on every call (passed to nlp()/nlp.pipe(),
+      so the shared Language object itself is never modified).
+    - `tokenizer_only`: no pipes at all; artifacts carry tokens and lowercased
+      words as lemmas, which keeps Presidio's context enhancement working.
+
+    Either way, without the lemmatizer the lemmas are the lowercased words.
+    With `as_tuples`, process_batch takes (text, context) pairs and yields
+    ((text, artifacts), context), like spaCy's nlp.pipe.
+    """
+
+    def __init__(self, base: SpacyNlpEngine, disable: Optional[List[str]] = None, tokenizer_only: bool = False):
+        super().__init__(models=base.models, ner_model_configuration=base.ner_model_configuration)
+        self.nlp = base.nlp
+        self.disable = list(disable or [])
+        self.tokenizer_only = tokenizer_only
+        self._lemmatizes = {
+            language: "lemmatizer" in nlp.pipe_names and "lemmatizer" not in self.disable
+            for language, nlp in self.nlp.items()
+        }
+
+    def process_text(self, text: str, language: str) -> NlpArtifacts:
+        nlp = self.nlp[language]
+        if self.tokenizer_only:
+            return self._tokens_to_nlp_artifact(nlp.make_doc(text), language)
+        return self._doc_to_nlp_artifact(nlp(text, disable=self.disable), language)
+
+    def process_batch(self, texts: Union[List[str], List[Tuple[str, object]]], language: str,
+                      batch_size: int = 1, n_process: int = 1, as_tuples: bool = False) -> Iterator[Optional[NlpArtifacts]]:
+        nlp = self.nlp[language]
+        if self.tokenizer_only:
+            for item in texts:
+                text, context = item if as_tuples else (item, None)
+                result = text, self._tokens_to_nlp_artifact(nlp.make_doc(text), language)
+                yield (result, context) if as_tuples else result
+            return
+
+        for item in nlp.pipe(texts, as_tuples=as_tuples, batch_size=batch_size, n_process=n_process, disable=self.disable):
+            doc, context = item if as_tuples else (item, None)
+            result = doc.text, self._doc_to_nlp_artifact(doc, language)
+            yield (result, context) if as_tuples else result
+
+    def _doc_to_nlp_artifact(self, doc, language: str) -> NlpArtifacts:
+        artifacts = super()._doc_to_nlp_artifact(doc, language)
+        if not self._lemmatizes.get(language, False):
+            # Context words are matched against lemmas; empty ones would never match
+            artifacts.lemmas = [token.lower_ for token in doc]
+            artifacts.keywords = artifacts.set_keywords(self, artifacts.lemmas, language)
+        return artifacts
+
+    def _tokens_to_nlp_artifact(self, doc, language: str) -> NlpArtifacts:
+        return NlpArtifacts(
+            entities=[],
+            tokens=doc,
+            tokens_indices=[token.idx for token in doc],
+            lemmas=[token.lower_ for token in doc],
+            nlp_engine=self,
+            language=language
+        )
+
+class DetectionProfile:
+    """
+    A named detection configuration: which analyzer (and so which spaCy work)
+    runs for Phase 2, and whether Phase 1 (BERT) runs at all.
+    All profiles share one recognizer registry and one loaded spaCy model.
+    """
+
+    def __init__(self, name: str, analyzer: AnalyzerEngine, use_bert: bool, description: str):
+        self.name = name
+        self.analyzer = analyzer
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=analyzer)
+        self.use_bert = use_bert
+        self.description = description
+
+def build_profiles(analyzer: AnalyzerEngine) -> Dict[str, DetectionProfile]:
+    """
+    Build the standard profiles around the detector's fully configured analyzer:
+
+    - structured-only: pattern/checksum recognizers; spaCy only tokenizes
+    - fast:            spaCy NER pipe only (tagger, parser, lemmatizer... skipped), no BERT
+    - accurate:        full spaCy pipeline plus BERT when configured
+    """
+    base = analyzer.nlp_engine
+
+    def trimmed_analyzer(nlp_engine: SpacyNlpEngine) -> AnalyzerEngine:
+        return AnalyzerEngine(
+            registry=analyzer.registry,
+            nlp_engine=nlp_engine,
+            supported_languages=analyzer.supported_languages
+        )
+
+    return {
+        STRUCTURED_ONLY: DetectionProfile(
+            STRUCTURED_ONLY,
+            trimmed_analyzer(TrimmedSpacyNlpEngine(base, tokenizer_only=True)),
+            use_bert=False,
+            description="Regex/checksum recognizers only (IDs, phones, emails, cards); no spaCy models"
+        ),
+        FAST: DetectionProfile(
+            FAST,
+            trimmed_analyzer(TrimmedSpacyNlpEngine(base, disable=_pipes_not_needed_for_ner(base))),
+            use_bert=False,
+            description="Recognizers plus spaCy NER only; no parser/tagger/lemmatizer, no BERT"
+        ),
+        ACCURATE: DetectionProfile(
+            ACCURATE,
+            analyzer,
+            use_bert=True,
+            description="Full spaCy pipeline, all recognizers and BERT (when configured)"
+        )
+    }
+
+def _pipes_not_needed_for_ner(nlp_engine: SpacyNlpEngine) -> List[str]:
+    """Every pipe except ner and any shared tok2vec/transformer that ner listens to."""
+    disabled = set()
+    for nlp in nlp_engine.nlp.values():
+        for name, pipe in nlp.pipeline:
+            if name == "ner" or "ner" in getattr(pipe, "listening_components", []):
+                continue
+            disabled.add(name)
+    return sorted(disabled)
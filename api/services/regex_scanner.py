@@ -0,0 +1,348 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+import regex
+from presidio_analyzer import EntityRecognizer, PatternRecognizer, RecognizerResult
+
+logger = logging.getLogger(__name__)
+
+try:
+    import re2
+except ImportError:  # scanner disabled; recognizers keep scanning the text one pattern at a time
+    re2 = None
+
+# Python's str classes are Unicode-aware, RE2's are ASCII-only: widen them so
+# the prefilter never rejects text the original pattern would match
+_CLASS_ESCAPES = {
+    "w": r"\p{L}\p{N}\p{M}_",
+    "d": r"\p{Nd}",
+    "s": r"\s\x{0b}\x{1c}-\x{1f}\x{85}\p{Z}",
+}
+
+class FusedPatternScanner:
+    """
+    One-pass prefilter for all regex-based recognizers.
+
+    Every Pattern of every eligible PatternRecognizer is compiled into a single
+    RE2 set (a DFA), so one linear pass over the text tells which patterns can
+    match at all. Each recognizer then runs Presidio's own matching,
+    validation/checksum and scoring logic only for those patterns; results are
+    identical to PatternRecognizer.analyze because every pattern that can match
+    is still evaluated with the original `regex` expression.
+
+    The set holds a relaxed form of each pattern (lookarounds, word boundaries
+    and anchors dropped, character classes widened to Unicode) that accepts a
+    superset of what the original matches. Patterns RE2 still can't compile
+    (backreferences, atomic groups, ...) are always evaluated.
+    """
+
+    def __init__(self):
+        self._set = None
+        self._slots: Dict[Tuple[str, int], int] = {}       # (recognizer id, pattern index) -> set slot
+        self._always: Set[Tuple[str, int]] = set()         # patterns the set can't represent
+        self._installed: List[PatternRecognizer] = []
+        self._local = threading.local()
+
+        # Stats
+        self.texts_scanned = 0
+        self.patterns_total = 0
+        self.patterns_evaluated = 0
+        self.prefilter_errors = 0
+
+    @staticmethod
+    def eligible(recognizer) -> bool:
+        """Only recognizers that use PatternRecognizer's stock pattern loop can be fused."""
+        return (
+            isinstance(recognizer, PatternRecognizer)
+            and bool(recognizer.patterns)
+            and type(recognizer).analyze is PatternRecognizer.analyze
+            and getattr(type(recognizer), "_PatternRecognizer__analyze_patterns") is getattr(PatternRecognizer, "_PatternRecognizer__analyze_patterns")
+        )
+
+    def install(self, recognizers: List) -> int:
+        """Compile the fused set and route eligible recognizers' analyze() through it."""
+        if re2 is None:
+            logger.info("Fused regex scanner disabled (google-re2 not installed)")
+            return 0
+
+        self.uninstall()
+        options = re2.Options()
+        options.max_mem = 64 << 20
+        fused = re2.Set.SearchSet(options)
+        slots, always = {}, set()
+        members = [recognizer for recognizer in recognizers if self.eligible(recognizer)]
+
+        for recognizer in members:
+            for index, pattern in enumerate(recognizer.patterns):
+                relaxed = relax_pattern(pattern.regex, recognizer.global_regex_flags)
+                try:
+                    if relaxed is None:
+                        raise ValueError("unsupported construct")
+                    slots[(recognizer.id, index)] = fused.Add(relaxed)
+                except Exception:
+                    always.add((recognizer.id, index))
+
+        try:
+            fused.Compile()
+        except Exception as e:
+            logger.error(f"Fused regex scanner disabled: RE2 set failed to compile: {e}")
+            return 0
+
+        self._set, self._slots, self._always = fused, slots, always
+        for recognizer in members:
+            # Instance attribute shadows PatternRecognizer.analyze; uninstall() removes it
+            recognizer.analyze = self._bind(recognizer)
+        self._installed = members
+
+        logger.info(f"✅ Fused regex scanner: {len(slots)} patterns from {len(members)} recognizers "
+                    f"in one pass ({len(always)} evaluated separately)")
+        return len(members)
+
+    def uninstall(self):
+        for recognizer in self._installed:
+            recognizer.__dict__.pop("analyze", None)
+        self._installed = []
+        self._set = None
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "enabled": self._set is not None,
+            "recognizers": len(self._installed),
+            "fused_patterns": len(self._slots),
+            "separate_patterns": len(self._always),
+            "texts_scanned": self.texts_scanned,
+            "pattern_evaluation_rate": round(self.patterns_evaluated / self.patterns_total, 4) if self.patterns_total else 0.0,
+            "prefilter_errors": self.prefilter_errors
+        }
+
+    def covers(self, recognizer) -> bool:
+        """Whether every pattern of `recognizer` is in the fused set (so may_match() is exact about it)."""
+        patterns = getattr(recognizer, "patterns", None) or []
+        return self._set is not None and bool(patterns) and all(
+            (recognizer.id, index) in self._slots for index in range(len(patterns))
+        )
+
+    def may_match(self, text: str, recognizer_ids: Tuple[str, ...]) -> bool:
+        """False only if no pattern of the given (covered) recognizers can match `text`."""
+        matched = self._matched_slots(text)
+        if matched is None:
+            return True
+        return any(
+            slot in matched for (recognizer_id, _), slot in self._slots.items() if recognizer_id in recognizer_ids
+        )
+
+    def _bind(self, recognizer: PatternRecognizer):
+        def analyze(text: str, entities: List[str], nlp_artifacts=None, regex_flags: Optional[int] = None) -> List[RecognizerResult]:
+            return self.analyze(recognizer, text, regex_flags)
+        return analyze
+
+    def _matched_slots(self, text: str) -> Optional[Set[int]]:
+        """Set slots that match somewhere in `text`; memoized for the analyze() call in progress."""
+        cached = getattr(self._local, "last", None)
+        if cached is not None and cached[0] is text:
+            return cached[1]
+
+        try:
+            matched = set(self._set.Match(text) or ())  # None when nothing matches
+        except Exception:
+            # e.g. lone surrogates that can't be encoded as UTF-8: evaluate everything
+            self.prefilter_errors += 1
+            matched = None
+        self.texts_scanned += 1
+        self._local.last = (text, matched)
+        return matched
+
+    def analyze(self, recognizer: PatternRecognizer, text: str, flags: Optional[int] = None) -> List[RecognizerResult]:
+        """PatternRecognizer.analyze for one recognizer, skipping patterns the prefilter ruled out."""
+        matched = self._matched_slots(text) if flags is None else None
+
+        patterns = []
+        for index, pattern in enumerate(recognizer.patterns):
+            key = (recognizer.id, index)
+            if matched is None or key in self._always or self._slots.get(key) in matched:
+                patterns.append(pattern)
+        self.patterns_total += len(recognizer.patterns)
+        self.patterns_evaluated += len(patterns)
+
+        if not patterns:
+            return []
+        return analyze_patterns(recognizer, patterns, text, flags)
+
+def analyze_patterns(recognizer: PatternRecognizer, patterns: List, text: str, flags: Optional[int] = None) -> List[RecognizerResult]:
+    """
+    Same logic as PatternRecognizer.__analyze_patterns (presidio-analyzer 2.2.358),
+    restricted to `patterns`.
+    """
+    flags = flags if flags else recognizer.global_regex_flags
+    results = []
+    for pattern in patterns:
+        # Compile regex if flags differ from flags the regex was compiled with
+        if not pattern.compiled_regex or pattern.compiled_with_flags != flags:
+            pattern.compiled_with_flags = flags
+            pattern.compiled_regex = regex.compile(pattern.regex, flags=flags)
+
+        for match in pattern.compiled_regex.finditer(text):
+            start, end = match.span()
+            current_match = text[start:end]
+
+            # Skip empty results
+            if current_match == "":
+                continue
+
+            score = pattern.score
+            validation_result = recognizer.validate_result(current_match)
+            description = recognizer.build_regex_explanation(
+                recognizer.name, pattern.name, pattern.regex, score, validation_result, flags
+            )
+            pattern_result = RecognizerResult(
+                entity_type=recognizer.supported_entities[0],
+                start=start,
+                end=end,
+                score=score,
+                analysis_explanation=description,
+                recognition_metadata={
+                    RecognizerResult.RECOGNIZER_NAME_KEY: recognizer.name,
+                    RecognizerResult.RECOGNIZER_IDENTIFIER_KEY: recognizer.id,
+                },
+            )
+
+            if validation_result is not None:
+                if validation_result:
+                    pattern_result.score = EntityRecognizer.MAX_SCORE
+                else:
+                    pattern_result.score = EntityRecognizer.MIN_SCORE
+
+            invalidation_result = recognizer.invalidate_result(current_match)
+            if invalidation_result is not None and invalidation_result:
+                pattern_result.score = EntityRecognizer.MIN_SCORE
+
+            if pattern_result.score > EntityRecognizer.MIN_SCORE:
+                results.append(pattern_result)
+
+            # Update analysis explanation score following validation or invalidation
+            description.score = pattern_result.score
+
+    return EntityRecognizer.remove_duplicates(results)
+
+def relax_pattern(pattern: str, flags: int) -> Optional[str]:
+    """
+    Rewrite a Python `regex` pattern into an RE2 pattern matching a superset of it:
+    lookarounds, \\b/\\B and ^/$ anchors are dropped, \\w/\\d/\\s widened to Unicode,
+    `{,n}` spelled out. Returns None for constructs that have no safe rewrite
+    (backreferences, atomic groups, possessive quantifiers, conditionals).
+    """
+    out = []
+    i, n = 0, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i]
+
+        if c == "\\" and i + 1 < n:
+            e = pattern[i + 1]
+            if e.isdigit() and e != "0" and not in_class:
+                return None  # numbered backreference
+            if e in ("w", "d", "s"):
+                widened = _CLASS_ESCAPES[e]
+                out.append(widened if in_class else f"[{widened}]")
+            elif e in ("b", "B") and not in_class:
+                pass  # word boundary: dropping it only widens the match
+            elif e == "Z":
+                out.append(r"\z")
+            elif e in ("g", "k", "K", "G"):
+                return None
+            else:
+                out.append(pattern[i:i + 2])
+            i += 2
+            continue
+
+        if in_class:
+            if c == "[" and pattern.startswith("[:", i):
+                return None  # POSIX class syntax differs
+            out.append(c)
+            if c == "]" and not _class_just_opened(out):
+                in_class = False
+            i += 1
+            continue
+
+        if c == "[":
+            in_class = True
+            out.append(c)
+            i += 1
+            if i < n and pattern[i] == "^":
+                out.append("^")
+                i += 1
+            if i < n and pattern[i] == "]":
+                out.append(r"\]")
+                i += 1
+            continue
+
+        if c == "(" and pattern.startswith("(?", i):
+            head = pattern[i:i + 4]
+            if head.startswith(("(?=", "(?!", "(?<=", "(?<!")):
+                end = _group_end(pattern, i)
+                if end is None:
+                    return None
+                i = end  # lookaround: drop it
+                continue
+            if head.startswith(("(?>", "(?P=", "(?(", "(?|", "(?&", "(?R")) or head[2:3].isdigit():
+                return None
+            out.append(c)
+            i += 1
+            continue
+
+        if c in "+*?}" and i + 1 < n and pattern[i + 1] == "+":
+            return None  # possessive quantifier
+
+        if c == "{" and pattern.startswith("{,", i):
+            out.append("{0,")
+            i += 2
+            continue
+
+        if c in "^$":
+            i += 1  # anchor: dropping it only widens the match
+            continue
+
+        out.append(c)
+        i += 1
+
+    inline = ""
+    if flags & regex.IGNORECASE:
+        inline += "i"
+    if flags & regex.MULTILINE:
+        inline += "m"
+    if flags & regex.DOTALL:
+        inline += "s"
+    body = "".join(out)
+    return f"(?{inline}){body}" if inline else body
+
+def _class_just_opened(out: List[str]) -> bool:
+    """True when the ']' just appended is the first character of a class (a literal)."""
+    return len(out) >= 2 and (out[-2] == "[" or (out[-2] == "^" and len(out) >= 3 and out[-3] == "["))
+
+def _group_end(pattern: str, start: int) -> Optional[int]:
+    """Index just past the group opening at `start`, honouring escapes and character classes."""
+    depth = 0
+    i, n = start, len(pattern)
+    in_class = False
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if in_class:
+            if c == "]":
+                in_class = False
+        elif c == "[":
+            in_class = True
+            if pattern.startswith("[^]", i):
+                i += 2
+            elif pattern.startswith("[]", i):
+                i += 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return None
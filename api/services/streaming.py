@@ -0,0 +1,109 @@
+import codecs
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from starlette.responses import StreamingResponse
+from api.services.chunking import last_boundary
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still being read.
+
+    Starlette's StreamingResponse listens for client disconnects by calling receive(),
+    which would swallow the request chunks our generator is waiting for. Here only the
+    generator reads from receive(); a disconnect surfaces as ClientDisconnect from
+    request.stream(). The body generator is always closed before returning, so its
+    cleanup (e.g. the stream's audit event) runs even when sending fails.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        if self.background is not None:
+            await self.background()
+
+async def decode_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """UTF-8 decode a byte stream chunk by chunk (multi-byte characters may straddle chunks)."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def iter_lines(chunks: AsyncIterator[str], max_chars: int) -> AsyncIterator[Tuple[Optional[str], bool]]:
+    """
+    Split a text stream into lines, yielding (line, too_long).
+    Lines longer than `max_chars` are not buffered: they yield (None, True) once.
+    """
+    pending: List[str] = []
+    size = 0
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find("\n", start)
+            piece = chunk[start:] if newline < 0 else chunk[start:newline]
+            if not overflow:
+                size += len(piece)
+                if size > max_chars:
+                    overflow, pending = True, []
+                else:
+                    pending.append(piece)
+            if newline < 0:
+                break
+            yield (None, True) if overflow else ("".join(pending), False)
+            pending, size, overflow = [], 0, False
+            start = newline + 1
+    if overflow:
+        yield None, True
+    elif size:
+        yield "".join(pending), False
+
+class StreamWindow:
+    """
+    Sliding detection window over a text stream.
+
+    Text is detected `window_chars` at a time. Only the part before the commit
+    point is masked and emitted: the last `carry_chars` of a window (cut back to a
+    sentence or word boundary, and to the start of any entity crossing it) carry
+    over into the next window, so a span split across network chunks or windows
+    is detected whole. Memory stays bounded by the window, not the input.
+    """
+
+    def __init__(self, window_chars: int, carry_chars: int):
+        self.window_chars = window_chars
+        self.carry_chars = min(carry_chars, window_chars // 2)
+        self.buffer = ""
+        self.offset = 0  # characters of the stream already emitted
+
+    def feed(self, text: str):
+        self.buffer += text
+
+    def ready(self) -> bool:
+        return len(self.buffer) >= self.window_chars
+
+    def window(self) -> str:
+        return self.buffer[:self.window_chars]
+
+    def commit_point(self, entities: List[Dict[str, Any]], final: bool) -> int:
+        """How much of the current window can be emitted, given the entities found in it."""
+        size = min(len(self.buffer), self.window_chars)
+        if final and len(self.buffer) <= self.window_chars:
+            return size
+
+        limit = size - self.carry_chars
+        cut = last_boundary(self.buffer, size // 2, limit) or limit
+        # Never emit part of an entity: move the cut to the start of anything crossing it
+        for entity in sorted(entities, key=lambda e: e["start"], reverse=True):
+            if entity["start"] < cut < entity["end"]:
+                cut = entity["start"]
+        return cut if cut > 0 else size
+
+    def advance(self, cut: int):
+        self.buffer = self.buffer[cut:]
+        self.offset += cut
@@ -1,8 +1,12 @@
 import redis
+import redis.asyncio as aioredis
 import json
+import time
+import threading
+from collections import OrderedDict
 from cryptography.fernet import Fernet
 from api.config import settings
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,9 +18,28 @@ class VaultService:
     
     def __init__(self):
         self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        # Async client for the request path (binds to the server's event loop on first use)
+        self.aredis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
         self.cipher = Fernet(settings.ENCRYPTION_KEY.encode())
         self.default_ttl = 86400  # 24 hours
 
+        # Per-session "already stored" markers: session_id -> {token: marker expiry}.
+        # Tokens are deterministic per (session, type, value), so a marked token
+        # only needs its TTL refreshed, not another encrypt + write.
+        # LRU-bounded by sessions, tokens per session and tokens overall, so one
+        # long session (e.g. bulk_mask's default "bulk") can't grow without limit.
+        self._stored = OrderedDict()
+        self._stored_lock = threading.Lock()
+        self._marked_tokens = 0
+        self.max_marked_sessions = settings.VAULT_STORED_MARKER_SESSIONS
+        self.max_marked_tokens_per_session = max(1, settings.VAULT_STORED_MARKER_TOKENS_PER_SESSION)
+        self.max_marked_tokens = max(1, settings.VAULT_STORED_MARKER_TOKENS)
+
+    def reconnect(self):
+        """Replace Redis clients inherited across a fork with fresh ones (see gunicorn_conf.py)."""
+        self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self.aredis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+
     def encrypt(self, data: str) -> str:
         """Encrypt string data."""
         return self.cipher.encrypt(data.encode()).decode()
@@ -48,6 +71,115 @@ class VaultService:
             logger.error(f"Error storing token: {e}")
             return False
 
+    def store_tokens(self, entries: List[Tuple[str, str, Dict[str, Any]]], ttl: int = None) -> bool:
+        """
+        Store many (session_id, token, pii_data) entries in a single Redis round trip.
+        Same key layout and encryption as store_token, sent through one pipeline.
+        Tokens this process already stored for the session are not re-encrypted
+        or rewritten; their TTL is refreshed in the same pipeline instead.
+        """
+        if not entries:
+            return True
+
+        try:
+            expiration = ttl if ttl is not None else self.default_ttl
+            pipe = self.redis.pipeline(transaction=False)
+            written = self._queue_store(pipe, entries, expiration)
+            results = pipe.execute()
+
+            # A marked key that no longer exists (expired/flushed) is written again (rare second trip)
+            missing = self._missing_entries(entries, results)
+            if missing:
+                pipe = self.redis.pipeline(transaction=False)
+                written.extend(self._queue_store(pipe, missing, expiration, force=True))
+                pipe.execute()
+
+            self._mark(written, expiration)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing tokens: {e}")
+            return False
+
+    async def astore_tokens(self, entries: List[Tuple[str, str, Dict[str, Any]]], ttl: int = None) -> bool:
+        """Async variant of store_tokens (same single pipelined round trip)."""
+        if not entries:
+            return True
+
+        try:
+            expiration = ttl if ttl is not None else self.default_ttl
+            pipe = self.aredis.pipeline(transaction=False)
+            written = self._queue_store(pipe, entries, expiration)
+            results = await pipe.execute()
+
+            missing = self._missing_entries(entries, results)
+            if missing:
+                pipe = self.aredis.pipeline(transaction=False)
+                written.extend(self._queue_store(pipe, missing, expiration, force=True))
+                await pipe.execute()
+
+            self._mark(written, expiration)
+            return True
+        except Exception as e:
+            logger.error(f"Error storing tokens: {e}")
+            return False
+
+    def _queue_store(self, pipe, entries: List[Tuple[str, str, Dict[str, Any]]], expiration: int,
+                     force: bool = False) -> List[Tuple[str, str]]:
+        """Queue SETEX (or EXPIRE for already-stored tokens) on a sync or async pipeline."""
+        written = []
+        for session_id, token, pii_data in entries:
+            key = f"session:{session_id}:{token}"
+            if not force and self._is_marked(session_id, token):
+                pipe.expire(key, expiration)
+                continue
+            encrypted_blob = self.encrypt(json.dumps(pii_data))
+            pipe.setex(key, expiration, encrypted_blob)
+            written.append((session_id, token))
+        return written
+
+    @staticmethod
+    def _missing_entries(entries, results) -> List[Tuple[str, str, Dict[str, Any]]]:
+        # SETEX replies True; EXPIRE replies False when the key is gone
+        return [entry for entry, result in zip(entries, results) if result is False]
+
+    def _is_marked(self, session_id: str, token: str) -> bool:
+        with self._stored_lock:
+            tokens = self._stored.get(session_id)
+            if not tokens:
+                return False
+            expires_at = tokens.get(token)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del tokens[token]
+                self._marked_tokens -= 1
+                return False
+            tokens.move_to_end(token)
+            return True
+
+    def _mark(self, written: List[Tuple[str, str]], expiration: int):
+        if not written:
+            return
+        # Marker lapses a little before the key itself does
+        expires_at = time.monotonic() + max(0, expiration - 60)
+        with self._stored_lock:
+            for session_id, token in written:
+                tokens = self._stored.get(session_id)
+                if tokens is None:
+                    tokens = self._stored[session_id] = OrderedDict()
+                if token not in tokens:
+                    self._marked_tokens += 1
+                tokens[token] = expires_at
+                tokens.move_to_end(token)
+                if len(tokens) > self.max_marked_tokens_per_session:
+                    tokens.popitem(last=False)
+                    self._marked_tokens -= 1
+                self._stored.move_to_end(session_id)
+            while self._stored and (len(self._stored) > self.max_marked_sessions
+                                    or self._marked_tokens > self.max_marked_tokens):
+                _, tokens = self._stored.popitem(last=False)
+                self._marked_tokens -= len(tokens)
+
     def get_token(self, session_id: str, token: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve and decrypt PII data for a token.
@@ -65,6 +197,46 @@ class VaultService:
             logger.error(f"Error retrieving token: {e}")
             return None
 
+    def get_tokens(self, session_id: str, tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve and decrypt many tokens of one session with a single MGET.
+        Returns {token: pii_data} for the tokens that exist.
+        """
+        if not tokens:
+            return {}
+
+        try:
+            unique_tokens = list(dict.fromkeys(tokens))
+            blobs = self.redis.mget([f"session:{session_id}:{token}" for token in unique_tokens])
+            return self._decrypt_many(unique_tokens, blobs)
+        except Exception as e:
+            logger.error(f"Error retrieving tokens: {e}")
+            return {}
+
+    async def aget_tokens(self, session_id: str, tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async variant of get_tokens (single MGET)."""
+        if not tokens:
+            return {}
+
+        try:
+            unique_tokens = list(dict.fromkeys(tokens))
+            blobs = await self.aredis.mget([f"session:{session_id}:{token}" for token in unique_tokens])
+            return self._decrypt_many(unique_tokens, blobs)
+        except Exception as e:
+            logger.error(f"Error retrieving tokens: {e}")
+            return {}
+
+    def _decrypt_many(self, tokens: List[str], blobs: List[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for token, encrypted_blob in zip(tokens, blobs):
+            if not encrypted_blob:
+                continue
+            try:
+                results[token] = json.loads(self.decrypt(encrypted_blob))
+            except Exception as e:
+                logger.warning(f"Failed to decrypt token {token}: {e}")
+        return results
+
     def get_all_entries(self, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Retrieve all stored PII tokens (Debug/Admin only).
@@ -94,4 +266,5 @@ class VaultService:
             logger.error(f"Error listing entries: {e}")
             return []
 
-vault_service = VaultService()
+    async def aclose(self):
+        await self.aredis.aclose()
@@ -0,0 +1,221 @@
+import os
+import time
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional, Tuple
+from presidio_analyzer import RecognizerResult
+
+logger = logging.getLogger(__name__)
+
+# Compact IPC format: a result is (entity_type, start, end, score)
+CompactResult = Tuple[str, int, int, float]
+
+# Set in the parent before the workers are forked; children inherit the loaded
+# detector (spaCy model + recognizer registry) copy-on-write instead of reloading it.
+# Spawned workers build their own in _init_spawned_worker.
+_detector = None
+
+# After a failed restart, jobs run in-process this long before the next attempt
+RESTART_RETRY_SECONDS = 30.0
+
+def _ping() -> int:
+    return os.getpid()
+
+def _init_spawned_worker():
+    """Initializer of spawned workers: load a detector for the Presidio phase only."""
+    global _detector
+    from api.config import settings
+    from api.services.detection import PIIDetector
+
+    # No nested pool, BERT backend or caches: the API process owns those
+    settings.DETECTION_WORKERS = 0
+    settings.NER_BACKEND = "none"
+    settings.DETECTION_CACHE_ENABLED = False
+    _detector = PIIDetector()
+
+def _analyze_job(texts: List[str], language: str, score_threshold: float, profile: str,
+                 entities: Optional[Tuple[str, ...]]) -> List[List[CompactResult]]:
+    """Runs in a worker: Presidio phase only, results packed as plain tuples."""
+    results = _detector.analyze_presidio_local(texts, language, score_threshold, profile, entities)
+    return [
+        [(r.entity_type, r.start, r.end, float(r.score)) for r in text_results]
+        for text_results in results
+    ]
+
+def _unpack(rows: List[CompactResult]) -> List[RecognizerResult]:
+    return [RecognizerResult(entity_type=t, start=s, end=e, score=score) for t, s, e, score in rows]
+
+class DetectionWorkerPool:
+    """
+    Runs the CPU-bound Presidio/spaCy phase of detection in worker processes.
+
+    Jobs carry only (texts, language, threshold, profile name, entity allow-list)
+    and return compact tuples; BERT calls, caching and Phase 3 stay in the API process.
+
+    Workers are forked when that is safe: while the process runs no other
+    thread (gunicorn's master, or a gunicorn worker in post_fork), so the spaCy
+    model and the recognizer registry are shared copy-on-write. Otherwise (the
+    lazy container builds the detector on an executor thread) they are started
+    with "spawn" and each loads its own Presidio-only detector, which costs
+    memory and startup time but can't inherit a lock held by another thread.
+
+    A pool that breaks (a worker died, or a job timed out) is replaced on a
+    background thread; until the new one is up, jobs run in-process. A crashed
+    job is retried in-process; a timed-out one fails.
+    """
+
+    def __init__(self, detector, size: int, startup_timeout: float = 60.0, job_timeout: Optional[float] = None):
+        self.detector = detector
+        self.size = max(1, size)
+        self.startup_timeout = startup_timeout
+        self.job_timeout = job_timeout
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid = None
+        self._restarting = False
+        self._retry_at = 0.0
+
+        # Stats
+        self.jobs = 0
+        self.texts = 0
+        self.restarts = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.in_process_jobs = 0
+        self.last_restart_at: Optional[float] = None
+
+    def start(self, method: Optional[str] = None):
+        """
+        Start the workers now and wait until all are up. `method` defaults to
+        "fork" when this process runs a single thread, else "spawn".
+        """
+        global _detector
+        _detector = self.detector
+        if method is None:
+            method = "fork" if threading.active_count() == 1 else "spawn"
+
+        if method == "fork":
+            executor = ProcessPoolExecutor(max_workers=self.size, mp_context=multiprocessing.get_context("fork"))
+        else:
+            executor = ProcessPoolExecutor(max_workers=self.size, mp_context=multiprocessing.get_context(method),
+                                           initializer=_init_spawned_worker)
+        # Processes are started on demand; occupy every slot once so all are up front
+        pings = [executor.submit(_ping) for _ in range(self.size)]
+        try:
+            for ping in pings:
+                ping.result(timeout=self.startup_timeout)
+        except Exception:
+            self._terminate(executor)
+            raise
+
+        self._executor = executor
+        self._pid = os.getpid()
+        logger.info(f"✅ Detection worker pool started ({self.size} processes, {method})")
+
+    def analyze(self, text: str, language: str, score_threshold: float, profile: str,
+                entities: Optional[Tuple[str, ...]] = None) -> List[RecognizerResult]:
+        return self.analyze_batch([text], language, score_threshold, profile, entities)[0]
+
+    def analyze_batch(self, texts: List[str], language: str, score_threshold: float, profile: str,
+                      entities: Optional[Tuple[str, ...]] = None) -> List[List[RecognizerResult]]:
+        """Split `texts` across the workers and return Presidio results per text, in order."""
+        if not texts:
+            return []
+
+        executor = self._get_executor()
+        if executor is None:
+            return self._analyze_in_process(texts, language, score_threshold, profile, entities)
+
+        chunk = -(-len(texts) // self.size)
+        chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+        try:
+            futures = [executor.submit(_analyze_job, part, language, score_threshold, profile, entities) for part in chunks]
+            packed = [row for future in futures for row in future.result(timeout=self.job_timeout)]
+        except TimeoutError:
+            # The worker may be stuck for good: replace the pool, don't retry the job
+            self.timeouts += 1
+            logger.error(f"Detection job timed out after {self.job_timeout}s ({len(texts)} texts)")
+            self._restart(executor)
+            raise
+        except BrokenProcessPool as e:
+            self.failures += 1
+            logger.error(f"Detection worker crashed, analyzing in-process: {e}")
+            self._restart(executor)
+            return self._analyze_in_process(texts, language, score_threshold, profile, entities)
+
+        self.jobs += len(chunks)
+        self.texts += len(texts)
+        return [_unpack(rows) for rows in packed]
+
+    def stats(self) -> Dict[str, Any]:
+        executor = self._executor
+        processes = getattr(executor, "_processes", None) or {}
+        return {
+            "workers": self.size,
+            "alive": sum(1 for process in processes.values() if process.is_alive()),
+            "jobs": self.jobs,
+            "texts": self.texts,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "restarting": self._restarting,
+            "in_process_jobs": self.in_process_jobs,
+            "last_restart_at": self.last_restart_at
+        }
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _analyze_in_process(self, texts: List[str], language: str, score_threshold: float, profile: str,
+                            entities: Optional[Tuple[str, ...]]) -> List[List[RecognizerResult]]:
+        self.in_process_jobs += 1
+        return self.detector.analyze_presidio_local(texts, language, score_threshold, profile, entities)
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """The running pool, or None while one is being (re)started in the background."""
+        executor = self._executor
+        if executor is not None and self._pid == os.getpid():
+            return executor
+        # A forked child of the API process must not reuse the parent's pool
+        self._restart(executor)
+        return None
+
+    def _restart(self, failed: Optional[ProcessPoolExecutor]):
+        """Replace `failed` on a background thread; request threads never wait for workers to load."""
+        with self._lock:
+            if self._executor is not failed or self._restarting or time.monotonic() < self._retry_at:
+                return  # another caller already replaced it, is replacing it, or the last attempt just failed
+            if failed is not None and self._pid == os.getpid():
+                self._terminate(failed)
+                self.restarts += 1
+                self.last_restart_at = time.time()
+                logger.warning(f"Restarting detection worker pool (restart #{self.restarts})")
+            self._executor = None
+            self._restarting = True
+        threading.Thread(target=self._start_in_background, name="detection-pool-restart", daemon=True).start()
+
+    def _start_in_background(self):
+        try:
+            # Other threads are running, so never fork here
+            self.start("spawn")
+        except Exception as e:
+            logger.error(f"Detection worker pool failed to restart, analyzing in-process: {e}")
+            self._retry_at = time.monotonic() + RESTART_RETRY_SECONDS
+        finally:
+            self._restarting = False
+
+    @staticmethod
+    def _terminate(executor: ProcessPoolExecutor):
+        # shutdown() alone would leave a stuck worker running its job
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
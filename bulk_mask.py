@@ -0,0 +1,236 @@
+"""
+Offline bulk masking of JSONL/CSV corpora, without the HTTP API.
+
+Records are masked in batches by forked worker processes that share one loaded
+detector (copy-on-write, as in api.services.worker_pool). The parent writes each
+batch's vault tokens in one Redis pipeline and its audit events in one INSERT,
+then appends the masked records to the output in input order and records a
+checkpoint. A killed run continues from the last checkpoint with --resume.
+
+JSONL: one object per line; the --text-field value is replaced by the masked text
+(other fields are kept). Lines that can't be masked become {"line": n, "error": ...}.
+CSV: same columns, the --text-field column masked; bad rows are reported and skipped.
+
+Usage:
+    python bulk_mask.py chats.jsonl masked.jsonl
+    python bulk_mask.py export.csv masked.csv --text-field body --session-field ticket_id --workers 8
+    python bulk_mask.py chats.jsonl masked.jsonl --resume
+"""
+import os
+
+# The CLI forks its own pool; the detector must not start another one
+os.environ.setdefault("DETECTION_WORKERS", "0")
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from api.models.request import MaskRequest
+from api.services.container import services
+from api.services.masking import MaskingService
+
+# Set in the parent before forking; workers only detect and build tokens (no Redis/MySQL)
+_masking = None
+
+def _mask_job(records, options):
+    """
+    Runs in a worker: [(session_id, text)] -> (masked texts, vault entries, audit events, error).
+    A batch that fails as a whole comes back with no masked texts and the error.
+    """
+    requests = [MaskRequest(text=text, session_id=session_id, options=options) for session_id, text in records]
+    try:
+        detections = _masking._detect_grouped(requests)
+        responses, vault_entries, audit_events = _masking._prepare_mask_batch(requests, detections)
+    except Exception as e:
+        return None, [], [], str(e)
+    return [response.masked_text for response in responses], vault_entries, audit_events, None
+
+class JsonlFormat:
+    def __init__(self, args):
+        self.text_field = args.text_field
+        self.session_field = args.session_field
+        self.default_session = args.session_id
+
+    def prepare(self, path):
+        pass
+
+    def read(self, path):
+        """(record, session_id, text or None, error) per input line."""
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    yield None, None, None, None
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None, None, None, "invalid JSON"
+                    continue
+                if not isinstance(record, dict) or not isinstance(record.get(self.text_field), str):
+                    yield None, None, None, f"missing '{self.text_field}'"
+                    continue
+                yield record, str(record.get(self.session_field) or self.default_session), record[self.text_field], None
+
+    def open_writer(self, f, resumed):
+        self.out = f
+
+    def write(self, position, record, masked_text, error):
+        if error is not None:
+            self.out.write(json.dumps({"line": position + 1, "error": error}) + "\n")
+        elif record is not None:
+            self.out.write(json.dumps({**record, self.text_field: masked_text}, ensure_ascii=False) + "\n")
+
+class CsvFormat(JsonlFormat):
+    def prepare(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            self.fieldnames = csv.DictReader(f).fieldnames or []
+        if self.text_field not in self.fieldnames:
+            raise SystemExit(f"CSV has no '{self.text_field}' column (columns: {', '.join(self.fieldnames)})")
+
+    def read(self, path):
+        with open(path, newline="", encoding="utf-8") as f:
+            for record in csv.DictReader(f):
+                yield record, str(record.get(self.session_field) or self.default_session), record[self.text_field] or "", None
+
+    def open_writer(self, f, resumed):
+        self.writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+        if not resumed:
+            self.writer.writeheader()
+
+    def write(self, position, record, masked_text, error):
+        if error is not None:
+            print(f"row {position + 1}: {error}", file=sys.stderr)
+        elif record is not None:
+            self.writer.writerow({**record, self.text_field: masked_text})
+
+def load_checkpoint(path, args):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint["input"] != os.path.abspath(args.input) or checkpoint["output"] != os.path.abspath(args.output):
+        raise SystemExit(f"{path} belongs to another run ({checkpoint['input']} -> {checkpoint['output']})")
+    return checkpoint
+
+def save_checkpoint(path, args, records, output_bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"input": os.path.abspath(args.input), "output": os.path.abspath(args.output),
+                   "records": records, "output_bytes": output_bytes}, f)
+    os.replace(tmp, path)
+
+def batches(items, size):
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def main():
+    parser = argparse.ArgumentParser(description="Mask a JSONL/CSV corpus offline")
+    parser.add_argument("input", help=".jsonl or .csv file")
+    parser.add_argument("output", help="masked output (same format as the input)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--session-field", default="session_id", help="field holding each record's session id")
+    parser.add_argument("--session-id", default="bulk", help="session id for records without one")
+    parser.add_argument("--profile", default=None, help="detection profile (default: DETECTION_PROFILE_DEFAULT)")
+    parser.add_argument("--entities", default=None, help="comma-separated entity types to mask (default: all)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint", default=None, help="default: <output>.checkpoint")
+    parser.add_argument("--resume", action="store_true", help="continue a killed run from its checkpoint")
+    parser.add_argument("--no-vault", action="store_true", help="don't store tokens (masking can't be reversed)")
+    args = parser.parse_args()
+
+    fmt = CsvFormat(args) if args.input.lower().endswith(".csv") else JsonlFormat(args)
+    options = {"profile": args.profile}
+    if args.entities:
+        options["entities"] = [entity.strip() for entity in args.entities.split(",") if entity.strip()]
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+
+    if not args.resume and os.path.exists(checkpoint_path):
+        raise SystemExit(f"{args.output} is a partial run; pass --resume or delete {checkpoint_path}")
+    checkpoint = load_checkpoint(checkpoint_path, args) if args.resume else None
+    done = checkpoint["records"] if checkpoint else 0
+    if checkpoint:
+        print(f"Resuming after record {done}", file=sys.stderr)
+    fmt.prepare(args.input)
+
+    # Load the detector once, validate the options, then fork the workers
+    global _masking
+    _masking = MaskingService(detector=services.detector)
+    try:
+        _masking._detect_options(MaskRequest(text="", session_id="", options=options))
+    except ValueError as e:
+        raise SystemExit(str(e))
+    executor = ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=multiprocessing.get_context("fork"))
+    vault = None if args.no_vault else services.vault
+    audit = services.audit
+
+    records = islice(enumerate(fmt.read(args.input)), done, None)
+    with open(args.output, "r+" if checkpoint else "w", newline="", encoding="utf-8") as out:
+        if checkpoint:
+            # Drop anything written after the last checkpoint
+            out.truncate(checkpoint["output_bytes"])
+            out.seek(checkpoint["output_bytes"])
+        fmt.open_writer(out, resumed=checkpoint is not None)
+
+        started = time.perf_counter()
+        masked_count, error_count, last_report = 0, 0, started
+        pending = deque()
+
+        def finish(batch, future):
+            nonlocal done, masked_count, error_count, last_report
+            masked_texts, vault_entries, audit_events, batch_error = future.result() if future else ([], [], [], None)
+            if vault is not None and not vault.store_tokens(vault_entries):
+                raise SystemExit(f"Vault write failed after record {done}; fix Redis and rerun with --resume")
+            audit.log_events(audit_events)
+
+            masked = iter(masked_texts or ())
+            for position, (record, _, text, error) in batch:
+                if text is not None:
+                    masked_text = next(masked, None)
+                    error = batch_error
+                    record = record if masked_text is not None else None
+                    fmt.write(position, record, masked_text, error)
+                    masked_count += masked_text is not None
+                elif error is not None:
+                    fmt.write(position, None, None, error)
+                error_count += error is not None
+            out.flush()
+            done += len(batch)
+            save_checkpoint(checkpoint_path, args, done, out.tell())
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                print(f"{done} records, {masked_count / (now - started):.0f} records/sec", file=sys.stderr)
+
+        try:
+            for batch in batches(records, args.batch_size):
+                jobs = [(session_id, text) for _, (_, session_id, text, _) in batch if text is not None]
+                pending.append((batch, executor.submit(_mask_job, jobs, options) if jobs else None))
+                # Bounded read-ahead; output stays in input order
+                while len(pending) > 2 * args.workers:
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    # No checkpoint is written when the input had nothing to process
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Masked {masked_count} records in {elapsed:.1f}s ({masked_count / elapsed if elapsed else 0:.0f} records/sec), "
+          f"{error_count} errors -> {args.output}")
+
+if __name__ == "__main__":
+    main()
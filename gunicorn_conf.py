@@ -0,0 +1,52 @@
+"""
+Production server configuration.
+
+    gunicorn api.main:app -c gunicorn_conf.py
+
+The app (spaCy model, recognizer registry, optional local NER model) is
+loaded once in the master and the workers are forked from it, so model memory
+is shared copy-on-write. Each worker then opens its own Redis/MySQL
+connections and runs a warm-up detection in post_fork, before it starts
+serving; the app lifespan skips its background warm-up for a warm worker.
+
+Environment:
+    WEB_CONCURRENCY   number of worker processes (default: CPU count)
+    BIND              listen address (default: 0.0.0.0:8000)
+    WORKER_TIMEOUT    seconds before a stuck worker is restarted (default: 120)
+
+Multiple gunicorn workers and DETECTION_WORKERS are alternative ways to use
+more cores; leave DETECTION_WORKERS=0 when running several workers here.
+Several workers scale throughput. A single long document is still analyzed on
+one core. When that latency matters, run fewer workers with DETECTION_WORKERS
+set instead.
+"""
+import os
+import multiprocessing
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("WORKER_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+def when_ready(server):
+    """Runs in the master after the app is imported and before any worker is forked."""
+    from api.services.container import services
+
+    services.detector
+    server.log.info(f"Detection models loaded in master: {services.timings_ms}")
+
+def post_fork(server, worker):
+    """Runs in each worker right after the fork, before it serves requests."""
+    from api.config import settings
+    from api.services.container import services
+
+    # Connections opened in the master belong to the master
+    services.reconnect()
+    # Warm up here, not in the master: a detection there could start threads
+    # (BERT client loop, batcher) that a fork would leave behind
+    if settings.WARM_UP_ON_STARTUP:
+        services.warm_up()
@@ -0,0 +1,38 @@
+"""
+Memory footprint of one API worker, per component.
+
+Builds the detector the same way the API does (no Redis/MySQL needed) and
+prints RSS/PSS/private memory together with the size of the spaCy pipeline,
+recognizer registry, NER backend and caches. Run it with the same
+environment (.env) as the service to size WEB_CONCURRENCY / DETECTION_WORKERS.
+
+Usage:
+    python memory_report.py
+    python memory_report.py --with-backends   # also build vault/audit clients
+"""
+import argparse
+import json
+
+from api.services.container import services
+from api.services.memory import memory_report, process_memory
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-component memory report")
+    parser.add_argument("--with-backends", action="store_true", help="also build vault and audit services")
+    args = parser.parse_args()
+
+    baseline = process_memory()
+    services.detector
+    loaded = process_memory()
+    if args.with_backends:
+        services.vault
+        services.audit
+    services.detector.warm_up()
+
+    report = memory_report(services)
+    report["baseline"] = baseline
+    report["detector_load_rss_delta_mb"] = round(loaded["rss_mb"] - baseline["rss_mb"], 1)
+    print(json.dumps(report, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
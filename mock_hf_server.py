@@ -0,0 +1,88 @@
+"""
+Local stand-in for the Hugging Face inference API (token classification).
+
+Returns aggregated NER results for capitalized word runs after a configurable
+delay, and counts TCP connections so keep-alive pooling can be verified.
+
+Usage:
+    python mock_hf_server.py --port 8001 --latency-ms 150
+
+    # then point the API at it
+    HUGGINGFACE_API_URL=http://localhost:8001/models/mock-ner
+    HUGGINGFACE_API_KEY=dummy
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CAPITALIZED_RUN = re.compile(r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b")
+
+stats = {"connections": 0, "requests": 0}
+stats_lock = threading.Lock()
+
+class MockNERHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def setup(self):
+        super().setup()
+        with stats_lock:
+            stats["connections"] += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        text = payload.get("inputs", "")
+
+        with stats_lock:
+            stats["requests"] += 1
+
+        time.sleep(self.latency)
+
+        entities = [
+            {
+                "entity_group": "PER",
+                "score": 0.97,
+                "word": match.group(0),
+                "start": match.start(),
+                "end": match.end()
+            }
+            for match in CAPITALIZED_RUN.finditer(text)
+        ]
+        self._send(200, entities)
+
+    def do_GET(self):
+        # /stats exposes connection reuse: requests >> connections means keep-alive works
+        with stats_lock:
+            self._send(200, dict(stats))
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Hugging Face NER endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    args = parser.parse_args()
+
+    MockNERHandler.latency = args.latency_ms / 1000.0
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer((args.host, args.port), MockNERHandler)
+    print(f"Mock HF NER server on http://{args.host}:{args.port} (latency {args.latency_ms} ms)")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Recall and skip rate of the PII pre-filter.
+
+Runs the full detection pipeline (pre-filter bypassed) over a corpus and
+checks that every text in which it finds an entity would have been let
+through by the pre-filter. Prints the skip rate and any missed texts, and
+exits non-zero when recall is below --min-recall.
+
+Usage:
+    python prefilter_recall.py
+    python prefilter_recall.py --file corpus.txt              # one text per line
+    python prefilter_recall.py --file corpus.jsonl --profile fast   # {"text": ...} per line
+"""
+import argparse
+import json
+import sys
+
+from api.services.container import services
+
+# Messages from test_accuracy.py / demo_stress_test.py / test_indian_pii.py plus typical PII-free chat
+CORPUS = [
+    "my credit card number is 123456, i am pawan bhatt and my dob is 15-05-1905, i live on street-7 koramangala, can you share the details please?",
+    "Hello world, this is a safe sentence.",
+    "Contact John Doe at john.doe@example.com.",
+    "My SSN is 999-01-1234 and card is 4111 1111 1111 1111.",
+    "My name is Ananya Sharma and I live in Bangalore.",
+    "My name is John Doe, born on 12/05/1990. My PAN is ABCDE1234F and Aadhaar is 3675 9834 6015.",
+    "My name is John Doe, email is john.doe@example.com, and my SSN is 123-45-6789.",
+    "Please send the report to the finance team before the meeting tomorrow.",
+    "Thanks, that worked perfectly.",
+    "Can you help me reset my password?",
+    "I would like to know more about your pricing plans.",
+    "The delivery was delayed but the support agent was very helpful.",
+    "Ok, I will check and get back to you.",
+    "What is the status of my order?",
+    "we spoke last week about the refund, any update?",
+    "my friend priya said the app crashes on startup",
+    "Visit example.com for details.",
+    "Reach me on +91 98765 43210 after lunch.",
+    "Rahul from Infosys called about the invoice.",
+    "नमस्ते, मेरा नाम राहुल है",
+    "The quick brown fox jumps over the lazy dog.",
+    "Is this service available on weekends?",
+    "Yes please go ahead and cancel it.",
+    "I'm not sure the payment went through, can you confirm?",
+]
+
+def load(path):
+    texts = []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if path.endswith(".jsonl"):
+                line = json.loads(line)["text"]
+            texts.append(line)
+    return texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-filter recall and skip rate")
+    parser.add_argument("--file", help="corpus: .txt (one text per line) or .jsonl with a 'text' field")
+    parser.add_argument("--profile", default=None, help="detection profile (default: DETECTION_PROFILE_DEFAULT)")
+    parser.add_argument("--threshold", type=float, default=0.4)
+    parser.add_argument("--min-recall", type=float, default=1.0)
+    args = parser.parse_args()
+
+    texts = load(args.file) if args.file else CORPUS
+    detector = services.detector
+    if detector.prefilter is None:
+        print("Pre-filter is disabled (PREFILTER_ENABLED=false)")
+        sys.exit(1)
+
+    passed, with_pii, missed = 0, 0, []
+    for text in texts:
+        keep = detector.may_contain_pii(text, profile=args.profile)
+        passed += keep
+        found, _ = detector._detect_uncached(text, 'en', args.threshold, args.profile)
+        if found:
+            with_pii += 1
+            if not keep:
+                missed.append((text, found))
+
+    recall = (with_pii - len(missed)) / with_pii if with_pii else 1.0
+    print(f"Texts:      {len(texts)} ({with_pii} with PII)")
+    print(f"Skip rate:  {(len(texts) - passed) / len(texts):.1%} ({len(texts) - passed} skipped)")
+    print(f"Recall:     {recall:.2%}")
+    for text, found in missed:
+        print(f"MISSED: {text!r} -> {[(e['type'], e['text']) for e in found]}")
+    sys.exit(0 if recall >= args.min_recall else 1)
+
+if __name__ == "__main__":
+    main()
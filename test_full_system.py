@@ -17,8 +17,8 @@ def test_masking_and_detection():
     payload = {
         "session_id": "test_session_123",
         "text": text,
-        "pii_types": ["PERSON", "DATE_TIME", "IN_PAN", "IN_AADHAAR"],
-        "purpose": "Test Automation"
+        "options": {"entities": ["PERSON", "DATE_TIME", "IN_PAN", "IN_AADHAAR"]},
+        "context": {"purpose": "Test Automation"}
     }
 
     try:
@@ -0,0 +1,90 @@
+import re
+import pytest
+from api.config import settings
+from api.services.masking import MaskingService
+
+EMAIL = re.compile(r"[\w.]+@[\w.]+\.\w+")
+
+class FakeDetector:
+    """Finds e-mail addresses only; enough to drive the masking service without spaCy/Presidio."""
+
+    def resolve_profile(self, profile=None):
+        return profile
+
+    def resolve_entities(self, entities, language='en'):
+        return tuple(entities) if entities else None
+
+    def may_contain_pii(self, text, **options):
+        return True
+
+    def detect(self, text, **options):
+        found = [{"type": "EMAIL_ADDRESS", "start": m.start(), "end": m.end(), "score": 1.0,
+                  "text": m.group(), "source": "Presidio"} for m in EMAIL.finditer(text)]
+        return found, {}
+
+    def detect_batch(self, texts, **options):
+        return [self.detect(text) for text in texts]
+
+class FakeVault:
+    def __init__(self):
+        self.data = {}
+        self.writes = []
+
+    def store_tokens(self, entries, ttl=None):
+        self.writes.append(list(entries))
+        for session_id, token, pii_data in entries:
+            self.data[(session_id, token)] = pii_data
+        return True
+
+    async def astore_tokens(self, entries, ttl=None):
+        return self.store_tokens(entries, ttl)
+
+    def get_tokens(self, session_id, tokens):
+        return {token: self.data[(session_id, token)] for token in tokens if (session_id, token) in self.data}
+
+    async def aget_tokens(self, session_id, tokens):
+        return self.get_tokens(session_id, tokens)
+
+class FakeAudit:
+    def __init__(self):
+        self.events = []
+
+    def log_event(self, **event):
+        self.events.append(event)
+        return f"evt_{len(self.events)}"
+
+    def log_events(self, events):
+        return [self.log_event(**event) for event in events]
+
+    async def alog_event(self, **event):
+        return self.log_event(**event)
+
+    async def alog_events(self, events):
+        return self.log_events(events)
+
+@pytest.fixture(scope="session")
+def detector():
+    """The real detector (spaCy + Presidio); loaded once per test run."""
+    from api.services.detection import PIIDetector
+    try:
+        return PIIDetector()
+    except OSError as e:  # spaCy model not installed
+        pytest.skip(f"detector unavailable: {e}")
+
+@pytest.fixture
+def vault():
+    """VaultService over in-memory fakeredis (sync and async clients share one server)."""
+    fakeredis = pytest.importorskip("fakeredis")
+    from api.services.vault import VaultService
+    service = VaultService()
+    server = fakeredis.FakeServer()
+    service.redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    service.aredis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    return service
+
+@pytest.fixture
+def masking(monkeypatch):
+    monkeypatch.setattr(settings, "DETECT_MICROBATCH_ENABLED", False)
+    service = MaskingService(detector=FakeDetector(), vault=FakeVault(), audit=FakeAudit())
+    yield service
+    service.detection_executor.shutdown(wait=False)
@@ -0,0 +1,70 @@
+import threading
+import time
+import pytest
+from api.services.batching import DetectionBatcher
+
+class RecordingDetector:
+    """detect_batch echoes each text back as its result; texts starting with "slow" take 0.5s."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def detect_batch(self, texts, language, threshold, profile, entities, prescreened=False):
+        with self.lock:
+            self.calls.append((list(texts), language, threshold, profile, entities, prescreened))
+        if any(text == "boom" for text in texts):
+            raise RuntimeError("detector failed")
+        if any(text.startswith("slow") for text in texts):
+            time.sleep(0.5)
+        return [([{"text": text}], {"profile": profile}) for text in texts]
+
+@pytest.fixture
+def detector():
+    return RecordingDetector()
+
+def test_results_follow_their_callers(detector):
+    batcher = DetectionBatcher(detector, max_batch_size=8, max_wait_ms=50)
+    texts = [f"text {i}" for i in range(20)]
+    futures = [batcher.submit(text) for text in texts]
+    assert [future.result(timeout=5)[0][0]["text"] for future in futures] == texts
+    assert all(future.result()[1]["detect_batch_size"] <= 8 for future in futures)
+    assert max(len(call[0]) for call in detector.calls) > 1  # actually batched
+    assert batcher.stats()["items_dispatched"] == 20
+
+def test_batches_are_grouped_by_options(detector):
+    batcher = DetectionBatcher(detector, max_batch_size=8, max_wait_ms=100)
+    fast = [batcher.submit(f"f{i}", profile="fast") for i in range(3)]
+    accurate = [batcher.submit(f"a{i}", profile="accurate", entities=["PERSON"]) for i in range(2)]
+    screened = batcher.submit("s", profile="fast", prescreened=True)
+    for future in fast + accurate + [screened]:
+        future.result(timeout=5)
+
+    groups = sorted((call[3], call[4], call[5], sorted(call[0])) for call in detector.calls)
+    assert groups == [
+        ("accurate", ("PERSON",), False, ["a0", "a1"]),
+        ("fast", None, False, ["f0", "f1", "f2"]),
+        ("fast", None, True, ["s"]),
+    ]
+    assert [future.result()[1]["profile"] for future in fast] == ["fast"] * 3
+
+def test_errors_reach_every_caller_of_the_failed_group_only(detector):
+    batcher = DetectionBatcher(detector, max_batch_size=8, max_wait_ms=100)
+    failed = [batcher.submit("boom", profile="fast"), batcher.submit("x", profile="fast")]
+    other = batcher.submit("y", profile="accurate")
+    for future in failed:
+        with pytest.raises(RuntimeError, match="detector failed"):
+            future.result(timeout=5)
+    assert other.result(timeout=5)[0] == [{"text": "y"}]
+
+    # The batcher keeps serving after a failure
+    assert batcher.detect("z")[0] == [{"text": "z"}]
+
+def test_slow_batch_does_not_hold_up_the_next(detector):
+    batcher = DetectionBatcher(detector, max_batch_size=8, max_wait_ms=5)
+    slow = batcher.submit("slow text")
+    time.sleep(0.05)
+    started = time.monotonic()
+    batcher.detect("quick text")
+    assert time.monotonic() - started < 0.3
+    slow.result(timeout=5)
@@ -0,0 +1,100 @@
+from concurrent.futures import Future
+import httpx
+import pytest
+from api.services.bert_client import BertClient
+from api.services.circuit_breaker import CircuitBreaker, LatencyTracker
+from api.services.ner_backends import NERBackend, NERCallFailed
+
+def client_answering(handler):
+    client = BertClient("http://bert.test/ner", "key", timeout=1.0)
+    client._ensure_loop()
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(503, json={}),
+    httpx.Response(200, json={"error": "Model dslim/bert-base-NER is currently loading"}),
+])
+def test_failed_call_is_not_an_empty_result(response):
+    client = client_answering(lambda request: response)
+    try:
+        with pytest.raises(NERCallFailed):
+            client.submit("John lives in Paris").result(timeout=5)
+        assert client.detect("John lives in Paris") == []
+    finally:
+        client.close()
+
+def test_transport_error_raises():
+    def handler(request):
+        raise httpx.ConnectError("refused")
+    client = client_answering(handler)
+    try:
+        with pytest.raises(NERCallFailed):
+            client.submit("John lives in Paris").result(timeout=5)
+    finally:
+        client.close()
+
+def test_successful_call_parses_entities():
+    body = [{"entity_group": "PER", "start": 0, "end": 4, "score": 0.99}]
+    client = client_answering(lambda request: httpx.Response(200, json=body))
+    try:
+        results = client.submit("John lives in Paris").result(timeout=5)
+        assert [(r.entity_type, r.start, r.end) for r in results] == [("PERSON", 0, 4)]
+    finally:
+        client.close()
+
+def test_failed_bert_results_are_flagged_and_not_cached(detector):
+    failed = Future()
+    failed.set_exception(NERCallFailed("HTTP 503"))
+    assert detector._collect_bert(failed) == ([], True)
+
+    found = Future()
+    found.set_result([])
+    assert detector._collect_bert(found) == ([], False)
+
+    assert not detector._should_cache(([], {"bert_failed": True, "bert_skipped": False}))
+    assert detector._should_cache(([], {"bert_failed": False, "bert_skipped": False}))
+
+def test_ner_backend_requires_submit():
+    class Incomplete(NERBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_timeouts_raise_a_learned_timeout():
+    tracker = LatencyTracker(multiplier=1.5, min_timeout=0.25, max_timeout=3.0)
+    for _ in range(200):
+        tracker.record(0.1)
+    assert tracker.timeout() == 0.25
+
+    # An upstream slowdown: each timed-out call pushes the timeout up instead of failing forever at the floor
+    timeouts = []
+    for _ in range(12):
+        timeouts.append(tracker.timeout())
+        tracker.record_timeout(timeouts[-1])
+    assert timeouts == sorted(timeouts) and timeouts[-1] > 0.4
+
+def test_timed_out_calls_are_recorded_and_probes_get_the_full_timeout():
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"]["read"])
+        raise httpx.ReadTimeout("slow", request=request)
+
+    client = client_answering(handler)
+    client.breaker = CircuitBreaker("bert", failure_threshold=1, reset_timeout=0)
+    for _ in range(200):
+        client.latency.record(0.1)
+    try:
+        with pytest.raises(NERCallFailed):
+            client.submit("John lives in Paris").result(timeout=5)
+        assert seen == [0.25]
+        assert max(client.latency._samples) == 0.25
+
+        # The circuit is open and half-opens right away (reset_timeout=0): the probe isn't held to 0.25s
+        with pytest.raises(NERCallFailed):
+            client.submit("John lives in Paris").result(timeout=5)
+        assert seen[-1] == client.latency.max_timeout
+    finally:
+        client.close()
@@ -0,0 +1,75 @@
+import json
+import sys
+import pytest
+import bulk_mask
+from api.services.container import services
+from tests.conftest import FakeAudit, FakeDetector, FakeVault
+
+class FailingVault(FakeVault):
+    """Fails the write of the `fail_at`-th batch, like Redis going away mid-run."""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.fail_at = fail_at
+
+    def store_tokens(self, entries, ttl=None):
+        if len(self.writes) + 1 == self.fail_at:
+            return False
+        return super().store_tokens(entries, ttl)
+
+@pytest.fixture
+def corpus(tmp_path):
+    lines = []
+    for n in range(25):
+        if n == 7:
+            lines.append("not json")
+        else:
+            lines.append(json.dumps({"id": n, "session_id": f"s{n % 3}", "text": f"mail user{n}@example.com please"}))
+    path = tmp_path / "in.jsonl"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+def run(monkeypatch, vault, *argv):
+    monkeypatch.setitem(services._instances, "detector", FakeDetector())
+    monkeypatch.setitem(services._instances, "audit", FakeAudit())
+    monkeypatch.setitem(services._instances, "vault", vault)
+    monkeypatch.setattr(sys, "argv", ["bulk_mask.py", *map(str, argv), "--workers", "1", "--batch-size", "4"])
+    bulk_mask.main()
+
+def read(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+def test_output_in_input_order(monkeypatch, corpus, tmp_path):
+    out = tmp_path / "out.jsonl"
+    run(monkeypatch, FakeVault(), corpus, out)
+    rows = read(out)
+    assert [row.get("id") for row in rows] == [n if n != 7 else None for n in range(25)]
+    assert rows[7] == {"line": 8, "error": "invalid JSON"}
+    assert all("@" not in row["text"] and "[EMAIL_ADDRESS_" in row["text"] for row in rows if "text" in row)
+    assert not (tmp_path / "out.jsonl.checkpoint").exists()
+
+def test_resume_after_failure_matches_a_clean_run(monkeypatch, corpus, tmp_path):
+    clean = tmp_path / "clean.jsonl"
+    run(monkeypatch, FakeVault(), corpus, clean)
+
+    out = tmp_path / "out.jsonl"
+    with pytest.raises(SystemExit, match="Vault write failed"):
+        run(monkeypatch, FailingVault(fail_at=3), corpus, out)
+    checkpoint = json.loads((tmp_path / "out.jsonl.checkpoint").read_text())
+    assert checkpoint["records"] == 8
+
+    with pytest.raises(SystemExit, match="partial run"):
+        run(monkeypatch, FakeVault(), corpus, out)
+    run(monkeypatch, FakeVault(), corpus, out, "--resume")
+
+    # Token ids hash session:type:value, so the resumed output, masked text included,
+    # is identical to the clean run
+    assert read(out) == read(clean)
+    assert all("@" not in row["text"] for row in read(out) if "text" in row)
+
+def test_empty_input(monkeypatch, tmp_path):
+    source = tmp_path / "empty.jsonl"
+    source.write_text("")
+    out = tmp_path / "out.jsonl"
+    run(monkeypatch, FakeVault(), source, out)
+    assert out.read_text() == ""
@@ -0,0 +1,58 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from api.services.cache import DetectionCache
+
+RESULT = ([{"type": "PERSON", "start": 0, "end": 4}], {"bert_used": False})
+
+def test_single_flight_computes_once():
+    cache = DetectionCache(max_entries=10)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return ([dict(RESULT[0][0])], dict(RESULT[1]))
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(8)]
+        while cache.stats()["singleflight_waits"] < 7:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False] + [True] * 7
+    assert all(value == RESULT for value, _ in results)
+    # Waiters get copies: mutating one result can't corrupt another or the cache
+    waiter = next(value for value, hit in results if hit)
+    waiter[0][0]["type"] = "CHANGED"
+    assert all(value == RESULT for value, _ in results if value is not waiter)
+    assert cache.get("k") == RESULT
+
+def test_leader_failure_reaches_waiters_and_is_not_cached():
+    cache = DetectionCache(max_entries=10)
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(3)]
+        while cache.stats()["singleflight_waits"] < 2:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result()
+
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: RESULT) == (RESULT, False)
+
+def test_should_store_false_is_shared_but_not_kept():
+    cache = DetectionCache(max_entries=10)
+    assert cache.get_or_compute("k", lambda: RESULT, should_store=lambda value: False) == (RESULT, False)
+    assert cache.get("k") is None
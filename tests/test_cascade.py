@@ -0,0 +1,91 @@
+import threading
+from concurrent.futures import Future
+import pytest
+from presidio_analyzer import RecognizerResult
+from api.services.detection import (BERT_ALWAYS, BERT_CASCADE, CASCADE_CONFIDENT, CASCADE_UNCERTAIN,
+                                    CASCADE_UNEXPLAINED)
+from api.services.ner_backends import NERBackend
+
+CONFIDENT_TEXT = "reach me at jane@example.com please"
+UNEXPLAINED_TEXT = "the Qwzx report is due"
+
+class RecordingBackend(NERBackend):
+    """Tags every capitalized "Qwzx" as an organization and records what it was asked."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.texts = []
+
+    def submit(self, text):
+        self.texts.append(text)
+        future = Future()
+        start = text.find("Qwzx")
+        future.set_result([RecognizerResult("ORGANIZATION", start, start + 4, 0.9)] if start >= 0 else [])
+        return future
+
+@pytest.fixture
+def cascade(detector, monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(detector, "ner_backend", backend)
+    monkeypatch.setattr(detector, "use_bert", True)
+    monkeypatch.setattr(detector, "bert_mode", BERT_CASCADE)
+    monkeypatch.setattr(detector, "fingerprint", detector.fingerprint)
+    detector.refresh_fingerprint()
+    return backend
+
+def test_decisions(detector, cascade):
+    name = RecognizerResult("PERSON", 0, 5, 0.85)
+    assert detector._cascade_decision("Maria called", [name]) == CASCADE_CONFIDENT
+    assert detector._cascade_decision("Maria called", [RecognizerResult("PERSON", 0, 5, 0.3)]) == CASCADE_UNCERTAIN
+    assert detector._cascade_decision("Maria called Pedro", [name]) == CASCADE_UNEXPLAINED
+    assert detector._cascade_decision("nothing capitalized here", []) == CASCADE_CONFIDENT
+
+def test_single_text_path_calls_bert_only_when_in_doubt(detector, cascade):
+    before = detector.cascade_snapshot()
+    found, metadata = detector._detect_uncached(CONFIDENT_TEXT, "en", 0.4, "accurate")
+    assert cascade.texts == []
+    assert metadata["bert_cascade"] == CASCADE_CONFIDENT and metadata["bert_calls_avoided"] == 1
+
+    found, metadata = detector._detect_uncached(UNEXPLAINED_TEXT, "en", 0.4, "accurate")
+    assert cascade.texts == [UNEXPLAINED_TEXT]
+    assert metadata["bert_cascade"] == CASCADE_UNEXPLAINED and metadata["bert_calls_avoided"] == 0
+    assert [(e["type"], e["text"]) for e in found] == [("ORGANIZATION", "Qwzx")]
+
+    after = detector.cascade_snapshot()
+    assert after["texts"] - before["texts"] == 2
+    assert after["bert_calls_avoided"] - before["bert_calls_avoided"] == 1
+    assert after[CASCADE_UNEXPLAINED] - before[CASCADE_UNEXPLAINED] == 1
+
+def test_batch_path_sends_only_doubtful_texts(detector, cascade):
+    results = detector._detect_batch_uncached([CONFIDENT_TEXT, UNEXPLAINED_TEXT, CONFIDENT_TEXT], "en", 0.4, "accurate")
+    assert cascade.texts == [UNEXPLAINED_TEXT]
+    assert [metadata["bert_cascade"] for _, metadata in results] == [CASCADE_CONFIDENT, CASCADE_UNEXPLAINED, CASCADE_CONFIDENT]
+    assert [metadata["bert_calls_avoided"] for _, metadata in results] == [1, 0, 1]
+
+def test_bert_mode_is_part_of_the_cache_fingerprint(detector, cascade, monkeypatch):
+    cascade_fingerprint = detector.fingerprint
+    monkeypatch.setattr(detector, "bert_mode", BERT_ALWAYS)
+    detector.refresh_fingerprint()
+    assert detector.fingerprint != cascade_fingerprint
+    key = lambda: detector.cache.make_key("x", "en", 0.4, detector._cache_scope("accurate", None))
+    always_key = key()
+    monkeypatch.setattr(detector, "bert_mode", BERT_CASCADE)
+    detector.refresh_fingerprint()
+    assert key() != always_key
+
+def test_stats_are_consistent_under_threads(detector, cascade):
+    before = detector.cascade_snapshot()
+
+    def decide():
+        for _ in range(500):
+            detector._cascade_decision("nothing here", [])
+
+    threads = [threading.Thread(target=decide) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = detector.cascade_snapshot()
+    assert after["texts"] - before["texts"] == 4000
+    assert after["bert_calls_avoided"] - before["bert_calls_avoided"] == 4000
@@ -0,0 +1,51 @@
+import random
+import re
+from presidio_analyzer import RecognizerResult
+from api.services.chunking import split_windows, merge_window_results
+
+# Space-containing entities, like cards, phones and Aadhaar numbers
+ENTITY = re.compile(r"\d{4} \d{4} \d{4} \d{4}|\+\d{2} \d{2} \d{4} \d{4}|\d{4} \d{4} \d{4}")
+
+def find(text):
+    return [RecognizerResult("ID", m.start(), m.end(), 1.0) for m in ENTITY.finditer(text)]
+
+def spans(results):
+    # Duplicates from both windows of an overlap are merged later, by Phase 3
+    return sorted({(r.start, r.end) for r in results})
+
+def single_line_document(seed, size=21000):
+    """Tokens joined by '-': the only spaces are inside entities, so every cut lands in one."""
+    rng = random.Random(seed)
+    entities = ["4111 1111 1111 1111", "+44 20 7946 0958", "3675 9834 6015"]
+    parts = []
+    while sum(len(part) + 1 for part in parts) < size:
+        parts.append(rng.choice(entities) if rng.random() < 0.04 else f"word{rng.randint(0, 99)}")
+    return "-".join(parts)
+
+def test_short_text_is_one_window():
+    assert split_windows("short text", 100, 20) == [(0, "short text")]
+
+def test_windows_cover_text_with_overlap():
+    text = single_line_document(0)
+    windows = split_windows(text, 2000, 200)
+    assert windows[0][0] == 0
+    assert windows[-1][0] + len(windows[-1][1]) == len(text)
+    for (offset, window), (next_offset, _) in zip(windows, windows[1:]):
+        assert text[offset:offset + len(window)] == window
+        assert len(window) <= 2000
+        assert offset + len(window) - next_offset >= 200
+
+def test_entities_with_spaces_survive_window_edges():
+    for seed in range(20):
+        text = single_line_document(seed)
+        windows = split_windows(text, 2000, 200)
+        merged = merge_window_results(text, windows, [find(window) for _, window in windows])
+        assert spans(merged) == spans(find(text)), seed
+
+def test_window_edge_cutting_an_entity():
+    # Both cuts fall on spaces inside the same card number
+    text = "x" * 1500 + " 4111 1111 1111 1111 " + "y" * 1500
+    windows = split_windows(text, 1519, 200)
+    assert len(windows) > 1
+    merged = merge_window_results(text, windows, [find(window) for _, window in windows])
+    assert spans(merged) == [(1501, 1520)]
@@ -0,0 +1,49 @@
+import pytest
+from api.services import circuit_breaker
+from api.services.circuit_breaker import CircuitBreaker
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("bert", failure_threshold=3, reset_timeout=10)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    breaker.record_success()  # resets the run
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["rejected_calls"] == 1
+    assert breaker.snapshot()["retry_in_s"] == 10
+
+def test_half_open_probe_closes_or_reopens(clock):
+    breaker = CircuitBreaker("bert", failure_threshold=1, reset_timeout=10, half_open_max_calls=1)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.times_opened == 2
+
+    clock[0] += 10
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.snapshot()["consecutive_failures"] == 0
+
+def test_half_open_needs_success_threshold(clock):
+    breaker = CircuitBreaker("bert", failure_threshold=1, reset_timeout=5, half_open_max_calls=2, success_threshold=2)
+    breaker.record_failure()
+    clock[0] += 5
+    assert breaker.allow_request() and breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
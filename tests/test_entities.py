@@ -0,0 +1,20 @@
+import pytest
+from api.models.request import MaskRequest
+from api.services.masking import MaskingService
+
+@pytest.mark.parametrize("entities", [[1], [None], [["PERSON"]], "PERSON"])
+def test_malformed_entities_are_a_value_error(detector, entities):
+    with pytest.raises(ValueError, match="list of entity types"):
+        detector.resolve_entities(entities)
+
+def test_entities_are_normalized(detector):
+    assert detector.resolve_entities(["person", "EMAIL_ADDRESS", "PERSON"]) == ("EMAIL_ADDRESS", "PERSON")
+    assert detector.resolve_entities([]) is None
+    with pytest.raises(ValueError, match="Unsupported entity types: NOPE"):
+        detector.resolve_entities(["NOPE"])
+
+def test_mask_options_reject_non_string_entities(detector):
+    service = MaskingService(detector=detector)
+    with pytest.raises(ValueError):
+        service._detect_options(MaskRequest(text="x", session_id="s", options={"entities": [{"type": "PERSON"}]}))
+    service.detection_executor.shutdown(wait=False)
@@ -0,0 +1,72 @@
+from api.services.incremental import resume_point
+
+HISTORY = "User: hi there. Assistant: hello! User: my card is 4111 1111 1111 1111 thanks. Assistant: noted."
+
+def test_resume_point_backs_off_to_a_sentence_boundary():
+    text = "User: hi there. Assistant: hello there friend"
+    cut = resume_point(text, len(text), 15, [])
+    assert text[cut:] == "Assistant: hello there friend"
+
+def test_resume_point_falls_back_to_a_word_boundary():
+    cut = resume_point(HISTORY, len(HISTORY), 20, [])
+    assert cut <= len(HISTORY) - 20
+    assert HISTORY[cut - 1] == " " and HISTORY[cut] != " "
+
+def test_resume_point_never_splits_an_entity():
+    start = HISTORY.index("4111")
+    card = {"type": "CREDIT_CARD", "start": start, "end": start + 19}
+    for prefix_length in range(start, len(HISTORY)):
+        cut = resume_point(HISTORY, prefix_length, 10, [card])
+        assert not card["start"] < cut < card["end"]
+        assert cut <= max(0, prefix_length - 10)
+
+def test_resume_point_short_prefix_starts_over():
+    assert resume_point(HISTORY, 5, 20, []) == 0
+
+def test_resume_point_without_boundaries_uses_the_limit():
+    text = "x" * 100
+    assert resume_point(text, 100, 20, []) == 80
+
+TURNS = [
+    "User: hi, I'm writing about my order.\n",
+    "Assistant: Sure, can I have your email?\n",
+    "User: it's jane.doe@example.com and my phone is 212-555-0199.\n",
+    "Assistant: Thanks. Anything else?\n",
+    "User: charge card 4111 1111 1111 1111 please, billing to jane@work.example.org.\n",
+    "Assistant: Done.\n" * 30,
+    "User: also my IP was 192.168.10.20 yesterday.\n",
+]
+
+def spans(found):
+    return sorted((e["type"], e["start"], e["end"]) for e in found)
+
+def test_incremental_matches_full_detection(detector):
+    history = ""
+    for n, turn in enumerate(TURNS):
+        history += turn
+        found, metadata = detector.detect_incremental(history, "inc-match")
+        assert spans(found) == spans(detector.detect(history)[0]), n
+        assert metadata["incremental"] == ("full" if n == 0 else "suffix")
+    assert metadata["chars_reused"] > 0
+
+def test_changed_prefix_falls_back(detector):
+    detector.detect_incremental(TURNS[0] + TURNS[2], "inc-edit")
+    edited = TURNS[0].replace("order", "refund") + TURNS[2] + TURNS[4]
+    found, metadata = detector.detect_incremental(edited, "inc-edit")
+    assert metadata["incremental"] == "full"
+    assert spans(found) == spans(detector.detect(edited)[0])
+
+def test_other_options_fall_back(detector):
+    detector.detect_incremental(TURNS[2], "inc-options")
+    text = TURNS[2] + TURNS[4]
+    found, metadata = detector.detect_incremental(text, "inc-options", entities=["EMAIL_ADDRESS"])
+    assert metadata["incremental"] == "full"
+    assert {e["type"] for e in found} == {"EMAIL_ADDRESS"}
+    _, metadata = detector.detect_incremental(text, "inc-options", profile="structured-only")
+    assert metadata["incremental"] == "full"
+
+def test_expired_session_falls_back(detector, monkeypatch):
+    monkeypatch.setattr(detector.sessions, "ttl", -1)
+    detector.detect_incremental(TURNS[2], "inc-expired")
+    _, metadata = detector.detect_incremental(TURNS[2] + TURNS[4], "inc-expired")
+    assert metadata["incremental"] == "full"
@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+from api.config import settings
+from api.dependencies import get_masking_service
+from api.main import app
+from tests.conftest import FakeDetector
+
+HEADERS = {"X-API-Key": "test"}
+
+class RecordingDetector(FakeDetector):
+    def __init__(self):
+        self.batches = []
+
+    def detect_batch(self, texts, **options):
+        self.batches.append((list(texts), options))
+        return super().detect_batch(texts, **options)
+
+@pytest.fixture
+def client(masking):
+    masking.detector = RecordingDetector()
+    app.dependency_overrides[get_masking_service] = lambda: masking
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def item(n, **options):
+    return {"text": f"item {n}: write to user{n}@example.com", "session_id": "s1", "options": options}
+
+def test_results_follow_input_order_across_option_groups(client, masking):
+    items = [item(0), item(1, profile="fast"), item(2), item(3, entities=["EMAIL_ADDRESS"]), item(4, profile="fast")]
+    response = client.post("/api/v1/mask/batch", json={"requests": items}, headers=HEADERS)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["masked_text"].split(":")[0] for r in results] == [f"item {n}" for n in range(5)]
+    assert all("@" not in r["masked_text"] for r in results)
+    assert response.json()["metadata"]["batch_size"] == 5
+
+    # One detect_batch per distinct set of options
+    groups = {(len(texts), options["profile"], options["entities"]) for texts, options in masking.detector.batches}
+    assert len(masking.detector.batches) == 3
+    assert groups == {(2, None, None), (1, None, ("EMAIL_ADDRESS",)), (2, "fast", None)}
+    # All tokens in one vault write, all audit events in one call
+    assert len(masking.vault.writes) == 1 and len(masking.vault.writes[0]) == 5
+    assert len(masking.audit.events) == 5
+
+def test_oversized_batch_is_rejected(client, masking, monkeypatch):
+    monkeypatch.setattr(settings, "MASK_BATCH_MAX_ITEMS", 3)
+    response = client.post("/api/v1/mask/batch", json={"requests": [item(n) for n in range(4)]}, headers=HEADERS)
+    assert response.status_code == 413
+    assert "max 3" in response.json()["detail"]
+    assert masking.detector.batches == [] and masking.vault.writes == []
+
+def test_invalid_options_are_a_400(client):
+    response = client.post("/api/v1/mask/batch", json={"requests": [item(0, entities="EMAIL_ADDRESS")]}, headers=HEADERS)
+    assert response.status_code == 400
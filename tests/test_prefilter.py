@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from api.config import settings
+from api.models.request import MaskRequest
+from api.services.batching import DetectionBatcher
+from api.services.masking import MaskingService
+from tests.conftest import FakeAudit, FakeVault
+
+TEXTS = ["Contact jane.doe@example.com about the invoice", "the meeting moved to the blue room"]
+
+@pytest.fixture
+def service(detector):
+    if detector.prefilter is None:
+        pytest.skip("PREFILTER_ENABLED is off")
+    service = MaskingService(detector=detector, batcher=DetectionBatcher(detector), vault=FakeVault(), audit=FakeAudit())
+    yield service
+    service.detection_executor.shutdown(wait=False)
+
+@pytest.mark.parametrize("microbatch", [False, True])
+def test_async_detect_screens_each_text_once(service, detector, monkeypatch, microbatch):
+    monkeypatch.setattr(settings, "DETECT_MICROBATCH_ENABLED", microbatch)
+    checked, skipped = detector.prefilter.checked, detector.prefilter.skipped
+
+    async def run():
+        return [await service._adetect(MaskRequest(text=text, session_id="s")) for text in TEXTS]
+
+    (found, _), (clean, metadata) = asyncio.run(run())
+    assert [e["type"] for e in found] == ["EMAIL_ADDRESS"]
+    assert clean == [] and metadata["prefiltered"]
+    assert detector.prefilter.checked - checked == len(TEXTS)
+    assert detector.prefilter.skipped - skipped == 1
+
+def test_direct_detect_still_screens(detector):
+    checked = detector.prefilter.checked
+    assert detector.detect(TEXTS[1])[1]["prefiltered"]
+    assert detector.detect_batch(TEXTS)[1][1]["prefiltered"]
+    assert detector.prefilter.checked - checked == 3
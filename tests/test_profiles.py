@@ -0,0 +1,26 @@
+from api.services.profiles import FAST, STRUCTURED_ONLY, TrimmedSpacyNlpEngine
+
+TEXT = "Call me on my phone tomorrow"
+
+def nlp_engine(detector, name) -> TrimmedSpacyNlpEngine:
+    return detector.resolve_profile(name).analyzer.nlp_engine
+
+def test_fast_profile_has_lemmas_for_context(detector):
+    engine = nlp_engine(detector, FAST)
+    artifacts = engine.process_text(TEXT, "en")
+    assert artifacts.lemmas == ["call", "me", "on", "my", "phone", "tomorrow"]
+    assert "phone" in artifacts.keywords
+
+def test_fast_profile_enhances_with_context(detector):
+    analyzer = detector.resolve_profile(FAST).analyzer
+    with_context = analyzer.analyze("my phone number is 212-555-0199", "en", entities=["PHONE_NUMBER"])
+    without = analyzer.analyze("the reference value is 212-555-0199", "en", entities=["PHONE_NUMBER"])
+    assert with_context[0].score > without[0].score
+
+def test_process_batch_as_tuples(detector):
+    for name in (FAST, STRUCTURED_ONLY):
+        engine = nlp_engine(detector, name)
+        out = list(engine.process_batch([("a b", 1), ("c", 2)], "en", as_tuples=True))
+        assert [(text, context) for (text, _), context in out] == [("a b", 1), ("c", 2)]
+        plain = list(engine.process_batch(["a b", "c"], "en"))
+        assert [text for text, _ in plain] == ["a b", "c"]
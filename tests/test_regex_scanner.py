@@ -0,0 +1,35 @@
+import random
+import pytest
+from presidio_analyzer import PatternRecognizer
+from bench_regex_scanner import SAMPLES, pattern_results
+
+def corpus(seed=0, count=40):
+    """The benchmark samples plus shuffled mixes of their words, so matches land at every offset."""
+    rng = random.Random(seed)
+    words = " ".join(SAMPLES).split(" ")
+    mixes = [" ".join(rng.sample(words, rng.randint(3, 30))) for _ in range(count)]
+    return SAMPLES + mixes + ["", " ", "4111111111111111", "abc@def"]
+
+@pytest.fixture
+def scanner(detector):
+    scanner = detector.regex_scanner
+    if scanner is None or not scanner.stats()["enabled"]:
+        pytest.skip("regex scanner disabled (REGEX_SCANNER_ENABLED=false or google-re2 missing)")
+    return scanner
+
+def test_every_pattern_recognizer_matches_without_the_scanner(detector, scanner):
+    registry = detector.analyzer.registry.recognizers
+    recognizers = [r for r in registry if isinstance(r, PatternRecognizer)]
+    assert any(scanner.covers(r) for r in recognizers)
+
+    texts = corpus()
+    fused = [pattern_results(recognizers, text) for text in texts]
+    scanner.uninstall()
+    try:
+        plain = [pattern_results(recognizers, text) for text in texts]
+    finally:
+        scanner.install(registry)
+
+    for text, a, b in zip(texts, fused, plain):
+        assert a == b, text
+    assert any(fused)
@@ -0,0 +1,33 @@
+import asyncio
+from api.services.masking import SessionChannel
+
+ADMIN = {"user_role": "admin"}
+
+def test_repeated_tokens_still_reach_the_vault(masking):
+    async def run():
+        channel = SessionChannel(masking, "s1")
+        first = await channel.amask("write to jane@example.com")
+        second = await channel.amask("again: jane@example.com")
+        await channel.aclose()
+        return channel, first, second
+
+    channel, first, second = asyncio.run(run())
+    token = first.entities[0].token
+    token_id = token[1:-1].rsplit("_", 1)[1]
+    assert second.entities[0].token == token
+    # The vault refreshes the TTL of a token it already holds, so the second write must happen
+    assert [[entry[1] for entry in write] for write in masking.vault.writes] == [[token_id], [token_id]]
+    assert channel.stats()["cached_tokens"] == 1
+
+def test_unmask_uses_tokens_the_channel_issued(masking):
+    async def run():
+        channel = SessionChannel(masking, "s1", ADMIN)
+        masked = await channel.amask("write to jane@example.com")
+        masking.vault.data.clear()  # a lookup would now find nothing
+        reply = await channel.aunmask(f"Sure, I'll email {masked.entities[0].token}")
+        await channel.aclose()
+        return channel, reply
+
+    channel, reply = asyncio.run(run())
+    assert reply.unmasked_text == "Sure, I'll email jane@example.com"
+    assert channel.stats()["vault_lookups_avoided"] == 1
@@ -0,0 +1,38 @@
+import pytest
+from api.services.masking import MaskingService
+
+splice = MaskingService._splice
+
+def naive(text, replacements):
+    """Reference: right to left, one span at a time (skipping overlaps first)."""
+    kept, cursor = [], 0
+    for start, end, replacement in replacements:
+        if start >= cursor:
+            kept.append((start, end, replacement))
+            cursor = end
+    for start, end, replacement in reversed(kept):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+@pytest.mark.parametrize("replacements, expected", [
+    ([], "abcdef"),
+    ([(0, 2, "X")], "Xcdef"),
+    ([(4, 6, "X")], "abcdX"),
+    ([(0, 6, "X")], "X"),
+    ([(1, 2, "X"), (2, 3, "Y")], "aXYdef"),           # adjacent
+    ([(1, 4, "X"), (2, 5, "Y")], "aXef"),             # overlapping: later span skipped
+    ([(1, 4, "X"), (1, 2, "Y"), (4, 5, "Z")], "aXZf"),  # same start skipped, adjacent kept
+    ([(2, 2, "X")], "abXcdef"),                       # empty span inserts
+    ([(1, 3, "")], "adef"),                           # empty replacement deletes
+])
+def test_splice(replacements, expected):
+    assert splice("abcdef", replacements) == expected
+    assert splice("abcdef", replacements) == naive("abcdef", replacements)
+
+def test_splice_unicode_and_long_replacements():
+    text = "naïve café: 日本語 and émoji 🙂 end"
+    start = text.index("日本語")
+    emoji = text.index("🙂")
+    replacements = [(start, start + 3, "[LOCATION_0123abcd]"), (emoji, emoji + 1, "[EMOJI_ffffffff]")]
+    assert splice(text, replacements) == naive(text, replacements)
+    assert "日本語" not in splice(text, replacements)
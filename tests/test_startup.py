@@ -0,0 +1,35 @@
+import asyncio
+import gunicorn_conf
+from api.config import settings
+from api.main import app, lifespan
+from api.services.container import services
+
+def test_post_fork_warms_up_before_serving(monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "WARM_UP_ON_STARTUP", True)
+    monkeypatch.setattr(services, "reconnect", lambda: calls.append("reconnect"))
+    monkeypatch.setattr(services, "warm_up", lambda: calls.append("warm_up"))
+    gunicorn_conf.post_fork(server=None, worker=None)
+    assert calls == ["reconnect", "warm_up"]
+
+def test_lifespan_skips_warm_up_when_ready(monkeypatch):
+    calls = []
+
+    async def aclose():
+        calls.append("aclose")
+
+    monkeypatch.setattr(settings, "WARM_UP_ON_STARTUP", True)
+    monkeypatch.setattr(services, "warm_up", lambda: calls.append("warm_up"))
+    monkeypatch.setattr(services, "aclose", aclose)
+
+    async def run():
+        async with lifespan(app):
+            pass
+
+    monkeypatch.setattr(services, "ready", True)
+    asyncio.run(run())
+    assert calls == ["aclose"]
+
+    monkeypatch.setattr(services, "ready", False)
+    asyncio.run(run())
+    assert calls == ["aclose", "warm_up", "aclose"]
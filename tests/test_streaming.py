@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from api.config import settings
+from api.services.streaming import StreamWindow
+
+def entity(start, end):
+    return {"type": "EMAIL_ADDRESS", "start": start, "end": end}
+
+def test_commit_point_keeps_carry_and_cuts_at_boundary():
+    window = StreamWindow(window_chars=100, carry_chars=20)
+    window.feed("word " * 40)
+    assert window.ready()
+    cut = window.commit_point([], final=False)
+    assert 50 <= cut <= 80
+    assert window.buffer[cut - 1] == " "
+
+def test_commit_point_never_splits_an_entity():
+    window = StreamWindow(window_chars=100, carry_chars=20)
+    window.feed("word " * 40)
+    cut = window.commit_point([], final=False)
+    assert window.commit_point([entity(cut - 3, cut + 5)], final=False) == cut - 3
+
+def test_commit_point_final_emits_everything():
+    window = StreamWindow(window_chars=100, carry_chars=20)
+    window.feed("short tail")
+    assert window.commit_point([], final=True) == len("short tail")
+
+def test_advance_tracks_offset():
+    window = StreamWindow(window_chars=100, carry_chars=20)
+    window.feed("abc def ghi")
+    window.advance(4)
+    assert (window.buffer, window.offset) == ("def ghi", 4)
+
+async def chunks(parts, fail_after=None):
+    for i, part in enumerate(parts):
+        if i == fail_after:
+            raise ConnectionResetError("client went away")
+        yield part
+
+async def collect(stream):
+    return "".join([part async for part in stream])
+
+def test_mask_stream_matches_mask(masking, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_WINDOW_CHARS", 60)
+    monkeypatch.setattr(settings, "STREAM_CARRY_CHARS", 20)
+    text = " ".join(f"mail user{i}@example.com now." for i in range(20))
+    parts = [text[i:i + 7] for i in range(0, len(text), 7)]
+    masked = asyncio.run(collect(masking.amask_stream(chunks(parts), "s1")))
+    assert "@" not in masked
+    assert masked.count("[EMAIL_ADDRESS_") == 20
+
+    (event,) = masking.audit.events
+    assert event["metadata"]["completed"] is True
+    assert event["metadata"]["characters"] == len(text)
+
+def test_aborted_mask_stream_is_audited(masking, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_WINDOW_CHARS", 60)
+    monkeypatch.setattr(settings, "STREAM_CARRY_CHARS", 20)
+    parts = ["mail a@example.com and some more padding text here. " * 3] * 3
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(collect(masking.amask_stream(chunks(parts, fail_after=2), "s1")))
+
+    (event,) = masking.audit.events
+    assert event["success"] is False
+    assert event["metadata"]["completed"] is False
+    assert event["metadata"]["entities_count"] > 0
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from api.models.request import MaskRequest, UnmaskRequest
+
+ADMIN = {"user_role": "admin"}
+
+def masked_reply(masking):
+    masked = masking.mask(MaskRequest(text="Write to ana@example.com or bo@example.org", session_id="s1")).masked_text
+    return f"Sure! {masked}. Done [NOT_A_TOKEN] [EMAIL_zz]"
+
+def test_split_holds_back_only_a_partial_token(masking):
+    unmasker = masking.unmask_stream("s1", ADMIN)
+    text, permitted, missing = unmasker._split("hello [EMAIL_ADDRESS_1a")
+    assert (text, unmasker.held) == ("hello ", "[EMAIL_ADDRESS_1a")
+    assert permitted == [] and missing == []
+
+    text, _, _ = unmasker._split("2b] and [brackets] stay")
+    assert text == "[EMAIL_ADDRESS_1a2b] and [brackets] stay"
+    assert unmasker.held == ""
+
+def test_split_does_not_hold_text_that_cannot_become_a_token(masking):
+    unmasker = masking.unmask_stream("s1", ADMIN)
+    for fragment in ("a [b", "see [x]", "[" + "A" * 80):
+        unmasker.held = ""
+        text, _, _ = unmasker._split(fragment)
+        assert text + unmasker.held == fragment
+    assert unmasker._split("list [1, 2")[0] == "list [1, 2"
+
+@pytest.mark.parametrize("size", [1, 2, 5, 13])
+def test_fragments_unmask_like_whole_text(masking, size):
+    reply = masked_reply(masking)
+    whole = masking.unmask(UnmaskRequest(text=reply, session_id="s1", context=ADMIN)).unmasked_text
+    unmasker = masking.unmask_stream("s1", ADMIN)
+    streamed = "".join(unmasker.feed(reply[i:i + size]) for i in range(0, len(reply), size)) + unmasker.close()
+    assert streamed == whole
+    assert "ana@example.com" in streamed
+    assert unmasker.vault_lookups <= 2
+
+def test_access_checks_apply(masking):
+    reply = masked_reply(masking)
+    unmasker = masking.unmask_stream("s1", {"user_role": "guest"})
+    assert unmasker.feed(reply) + unmasker.close() == reply
+
+async def fragments(text, fail_after=None):
+    for i in range(0, len(text), 4):
+        if fail_after is not None and i >= fail_after:
+            raise ConnectionResetError("client went away")
+        yield text[i:i + 4]
+
+async def collect(stream):
+    return "".join([part async for part in stream])
+
+def test_aborted_unmask_stream_is_audited(masking):
+    reply = masked_reply(masking)
+    masking.audit.events.clear()
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(collect(masking.aunmask_stream(fragments(reply, fail_after=len(reply) - 8), "s1", ADMIN)))
+
+    (event,) = masking.audit.events
+    assert event["operation"] == "UNMASK"
+    assert event["success"] is False
+    assert event["metadata"]["completed"] is False
+    assert event["metadata"]["entities_count"] == 2
+
+def test_completed_unmask_stream_is_audited_once(masking):
+    reply = masked_reply(masking)
+    masking.audit.events.clear()
+    asyncio.run(collect(masking.aunmask_stream(fragments(reply), "s1", ADMIN)))
+    (event,) = masking.audit.events
+    assert event["metadata"]["completed"] is True
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import pytest
+
+def entries(session_id, count, start=0):
+    return [(session_id, f"t{i}", {"type": "EMAIL_ADDRESS", "value": f"u{i}@example.com"}) for i in range(start, start + count)]
+
+def test_markers_are_capped_per_session(vault):
+    vault.max_marked_tokens_per_session = 5
+    assert vault.store_tokens(entries("bulk", 12))
+    assert list(vault._stored["bulk"]) == ["t7", "t8", "t9", "t10", "t11"]
+    assert vault._marked_tokens == 5
+
+    # A marker hit counts as use: t7 survives the next eviction, t8 doesn't
+    assert vault._is_marked("bulk", "t7")
+    vault.store_tokens(entries("bulk", 1, start=12))
+    assert "t7" in vault._stored["bulk"] and "t8" not in vault._stored["bulk"]
+
+    # Evicted tokens are simply written again
+    assert vault.get_tokens("bulk", ["t0", "t11"]) == {
+        "t0": {"type": "EMAIL_ADDRESS", "value": "u0@example.com"},
+        "t11": {"type": "EMAIL_ADDRESS", "value": "u11@example.com"},
+    }
+
+def test_markers_are_capped_in_total(vault):
+    vault.max_marked_tokens = 10
+    for n in range(5):
+        vault.store_tokens(entries(f"s{n}", 4))
+    assert vault._marked_tokens <= 10
+    assert list(vault._stored) == ["s3", "s4"]
+    assert vault._marked_tokens == sum(len(tokens) for tokens in vault._stored.values())
+
+def count_pipelines(monkeypatch, client):
+    calls = []
+    pipeline = client.pipeline
+    monkeypatch.setattr(client, "pipeline", lambda **kwargs: calls.append(kwargs) or pipeline(**kwargs))
+    return calls
+
+def test_store_is_one_pipelined_round_trip(vault, monkeypatch):
+    pipelines = count_pipelines(monkeypatch, vault.redis)
+    assert vault.store_tokens(entries("s1", 5), ttl=600)
+    assert len(pipelines) == 1
+    key = "session:s1:t3"
+    assert json.loads(vault.decrypt(vault.redis.get(key))) == {"type": "EMAIL_ADDRESS", "value": "u3@example.com"}
+    assert 590 < vault.redis.ttl(key) <= 600
+
+def test_stored_tokens_get_expire_not_a_rewrite(vault, monkeypatch):
+    vault.store_tokens(entries("s1", 2), ttl=600)
+    blob = vault.redis.get("session:s1:t0")
+    vault.redis.expire("session:s1:t0", 5)
+    monkeypatch.setattr(vault, "encrypt", lambda data: pytest.fail("marked token re-encrypted"))
+    assert vault.store_tokens(entries("s1", 2), ttl=600)
+    assert vault.redis.get("session:s1:t0") == blob
+    assert vault.redis.ttl("session:s1:t0") > 5
+
+def test_marked_token_whose_key_vanished_is_written_again(vault, monkeypatch):
+    vault.store_tokens(entries("s1", 3))
+    vault.redis.delete("session:s1:t1")
+    pipelines = count_pipelines(monkeypatch, vault.redis)
+    assert vault.store_tokens(entries("s1", 3))
+    assert len(pipelines) == 2  # EXPIRE replied False for t1: one extra trip to rewrite it
+    assert vault.get_tokens("s1", ["t1"]) == {"t1": {"type": "EMAIL_ADDRESS", "value": "u1@example.com"}}
+
+def test_async_store_and_rewrite(vault):
+    async def run():
+        assert await vault.astore_tokens(entries("s2", 3))
+        await vault.aredis.delete("session:s2:t2")
+        assert await vault.astore_tokens(entries("s2", 3))
+        return await vault.aget_tokens("s2", ["t0", "t2", "t0"])
+
+    assert asyncio.run(run()) == {
+        "t0": {"type": "EMAIL_ADDRESS", "value": "u0@example.com"},
+        "t2": {"type": "EMAIL_ADDRESS", "value": "u2@example.com"},
+    }
+
+def test_get_tokens_is_one_mget(vault, monkeypatch):
+    vault.store_tokens(entries("s1", 3))
+    calls = []
+    mget = vault.redis.mget
+    monkeypatch.setattr(vault.redis, "mget", lambda keys: calls.append(keys) or mget(keys))
+    found = vault.get_tokens("s1", ["t0", "t2", "missing", "t0"])
+    assert calls == [["session:s1:t0", "session:s1:t2", "session:s1:missing"]]
+    assert set(found) == {"t0", "t2"}
+    assert vault.get_tokens("s1", []) == {}
+
+def test_undecryptable_tokens_are_skipped(vault):
+    vault.store_tokens(entries("s1", 2))
+    vault.redis.set("session:s1:t1", "not-a-fernet-token")
+    assert vault.get_tokens("s1", ["t0", "t1"]) == {"t0": {"type": "EMAIL_ADDRESS", "value": "u0@example.com"}}
+
+def test_redis_errors_are_reported_not_raised(vault, monkeypatch):
+    def down(*args, **kwargs):
+        raise ConnectionError("redis down")
+    monkeypatch.setattr(vault.redis, "pipeline", down)
+    monkeypatch.setattr(vault.redis, "mget", down)
+    assert vault.store_tokens(entries("s3", 1)) is False
+    assert vault.get_tokens("s3", ["t0"]) == {}
+    assert not vault._is_marked("s3", "t0")
@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError
+import pytest
+from api.services import worker_pool
+from api.services.worker_pool import DetectionWorkerPool
+
+TEXTS = ["Contact jane.doe@example.com", "card 4111 1111 1111 1111", "nothing here"]
+
+def spans(results):
+    return [sorted((r.entity_type, r.start, r.end) for r in text_results) for text_results in results]
+
+class SlowInWorkers:
+    """The real detector in this process; every job hangs in a forked worker."""
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.pid = os.getpid()
+
+    def analyze_presidio_local(self, *args):
+        if os.getpid() != self.pid:
+            time.sleep(60)
+        return self.detector.analyze_presidio_local(*args)
+
+def wait_for_pool(pool, seconds=60):
+    deadline = time.monotonic() + seconds
+    while pool._executor is None and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert pool._executor is not None
+
+@pytest.fixture
+def pools():
+    started = []
+    yield started
+    for pool in started:
+        pool.close()
+
+def test_forked_pool_matches_in_process(detector, pools):
+    pool = DetectionWorkerPool(detector, 2, job_timeout=30)
+    pools.append(pool)
+    pool.start("fork")
+    expected = detector.analyze_presidio_local(TEXTS, "en", 0.4, "accurate")
+    assert spans(pool.analyze_batch(TEXTS, "en", 0.4, "accurate")) == spans(expected)
+
+def test_never_forks_while_other_threads_run(detector, pools, monkeypatch):
+    methods = []
+    get_context = worker_pool.multiprocessing.get_context
+    monkeypatch.setattr(worker_pool.multiprocessing, "get_context", lambda method: methods.append(method) or get_context(method))
+    monkeypatch.setattr(threading, "active_count", lambda: 3)
+    pool = DetectionWorkerPool(detector, 1)
+    pools.append(pool)
+    pool.start()
+    assert methods == ["spawn"]
+
+def test_timed_out_job_is_replaced_in_the_background(detector, pools):
+    pool = DetectionWorkerPool(SlowInWorkers(detector), 1, job_timeout=0.5)
+    pools.append(pool)
+    pool.start("fork")
+    stuck = list(pool._executor._processes.values())
+    expected = spans(detector.analyze_presidio_local(TEXTS, "en", 0.4, "accurate"))
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        pool.analyze_batch(TEXTS, "en", 0.4, "accurate")
+    # The replacement loads in the background: neither this call nor the next waits for it
+    assert pool.stats()["restarting"]
+    assert spans(pool.analyze_batch(TEXTS, "en", 0.4, "accurate")) == expected
+    assert time.monotonic() - started < 2.5
+    assert pool.stats()["in_process_jobs"] == 1
+    assert pool.stats()["timeouts"] == 1 and pool.stats()["restarts"] == 1
+    for process in stuck:
+        process.join(5)
+        assert not process.is_alive()
+
+    wait_for_pool(pool)
+    assert pool._executor._mp_context.get_start_method() == "spawn"
+    assert spans(pool.analyze_batch(TEXTS, "en", 0.4, "accurate")) == expected
+    assert pool.stats()["in_process_jobs"] == 1